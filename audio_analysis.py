@@ -0,0 +1,287 @@
+import hashlib
+import os
+import struct
+import subprocess
+import time
+
+import numpy as np
+
+from ffmpeg_utils import get_ffmpeg_exe, probe_video
+
+# Audio is analysed as mono 16-bit at this rate: plenty for waveforms and
+# loudness, and a fraction of the data of a 48 kHz stereo track
+ANALYSIS_SAMPLE_RATE = 16000
+
+# Finest peak level holds one min/max pair per BASE_BLOCK samples (16 ms);
+# each coarser level merges LEVEL_FACTOR blocks of the one below
+BASE_BLOCK = 256
+LEVEL_FACTOR = 4
+MIN_LEVEL_BLOCKS = 256
+
+PEAKS_CACHE_DIR = os.environ.get(
+    "VIDEO_EDITOR_PEAKS_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "video-editor", "peaks"),
+)
+
+# magic, version, sample rate, base block, level factor, level count,
+# source size, source mtime_ns
+_PEAKS_HEADER = struct.Struct("<4sHIIIHqq")
+_PEAKS_MAGIC = b"VEPK"
+_PEAKS_VERSION = 1
+
+
+def decode_audio(video_path, sample_rate=ANALYSIS_SAMPLE_RATE, chunk_seconds=10):
+    """
+    Stream the first audio track as mono int16 chunks of chunk_seconds,
+    without ever holding the whole track in memory. Yields nothing when the
+    file has no audio.
+    """
+    if probe_video(video_path)["audio_codec"] is None:
+        return
+    args = [
+        get_ffmpeg_exe(), "-hide_banner", "-nostdin", "-loglevel", "error",
+        "-i", video_path, "-map", "0:a:0", "-vn",
+        "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-",
+    ]
+    chunk_bytes = int(sample_rate * chunk_seconds) * 2
+    proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            data = proc.stdout.read(chunk_bytes)
+            if not data:
+                break
+            # A short read at the end may split a sample
+            yield np.frombuffer(data[: len(data) // 2 * 2], dtype=np.int16)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+
+class PeakPyramid:
+    """
+    Min/max waveform peaks at several zoom levels.
+    - levels[0] holds one (min, max) int16 pair per BASE_BLOCK samples, each
+      following level LEVEL_FACTOR times fewer
+    - columns() reduces the level closest to the requested zoom down to one
+      pair per pixel, so drawing costs the same at any zoom
+    """
+
+    def __init__(self, levels, sample_rate=ANALYSIS_SAMPLE_RATE, base_block=BASE_BLOCK, factor=LEVEL_FACTOR):
+        self.levels = levels
+        self.sample_rate = sample_rate
+        self.base_block = base_block
+        self.factor = factor
+
+    @classmethod
+    def from_chunks(cls, chunks, sample_rate=ANALYSIS_SAMPLE_RATE):
+        blocks = []
+        remainder = np.empty(0, dtype=np.int16)
+        for chunk in chunks:
+            samples = np.concatenate([remainder, chunk]) if len(remainder) else chunk
+            usable = len(samples) // BASE_BLOCK * BASE_BLOCK
+            shaped = samples[:usable].reshape(-1, BASE_BLOCK)
+            blocks.append(np.stack([shaped.min(axis=1), shaped.max(axis=1)], axis=1))
+            remainder = samples[usable:]
+        if len(remainder):
+            blocks.append(np.array([[remainder.min(), remainder.max()]], dtype=np.int16))
+        if not blocks:
+            return None
+
+        levels = [np.concatenate(blocks)]
+        while len(levels[-1]) >= MIN_LEVEL_BLOCKS * LEVEL_FACTOR:
+            previous = levels[-1]
+            padded = len(previous) // LEVEL_FACTOR * LEVEL_FACTOR
+            grouped = previous[:padded].reshape(-1, LEVEL_FACTOR, 2)
+            level = np.stack([grouped[:, :, 0].min(axis=1), grouped[:, :, 1].max(axis=1)], axis=1)
+            if padded < len(previous):
+                tail = previous[padded:]
+                level = np.concatenate([level, [[tail[:, 0].min(), tail[:, 1].max()]]]).astype(np.int16)
+            levels.append(level)
+        return cls(levels, sample_rate)
+
+    @property
+    def duration(self):
+        return len(self.levels[0]) * self.base_block / self.sample_rate
+
+    def block_size(self, level):
+        return self.base_block * self.factor ** level
+
+    def columns(self, start, end, width):
+        """
+        (mins, maxs) float arrays in [-1, 1], one pair per pixel column for
+        the time range start..end seconds
+        """
+        samples_per_column = (end - start) * self.sample_rate / max(1, width)
+        level = 0
+        while level + 1 < len(self.levels) and self.block_size(level + 1) <= samples_per_column:
+            level += 1
+        peaks = self.levels[level]
+        block_seconds = self.block_size(level) / self.sample_rate
+
+        first = int(start / block_seconds)
+        last = max(first + 1, int(np.ceil(end / block_seconds)))
+        # Columns past the end of the audio stay flat
+        starts = np.linspace(first, last, width, endpoint=False).astype(np.int64)
+        valid = starts < len(peaks)
+        mins = np.zeros(width, dtype=np.float32)
+        maxs = np.zeros(width, dtype=np.float32)
+        if valid.any():
+            section = peaks[: min(last, len(peaks))]
+            # reduceat reduces between consecutive starts, and repeats a
+            # block when zoomed in past the finest level
+            column_starts = starts[valid]
+            mins[valid] = np.minimum.reduceat(section[:, 0], column_starts) / 32768.0
+            maxs[valid] = np.maximum.reduceat(section[:, 1], column_starts) / 32768.0
+        return mins, maxs
+
+    def save(self, path, source_stat):
+        header = _PEAKS_HEADER.pack(
+            _PEAKS_MAGIC, _PEAKS_VERSION, self.sample_rate, self.base_block, self.factor,
+            len(self.levels), source_stat.st_size, source_stat.st_mtime_ns,
+        )
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(header)
+            f.write(struct.pack(f"<{len(self.levels)}I", *(len(level) for level in self.levels)))
+            for level in self.levels:
+                f.write(level.astype("<i2").tobytes())
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path, source_stat):
+        """The pyramid stored at path, or None if missing or made from another version of the source"""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < _PEAKS_HEADER.size:
+            return None
+        magic, version, sample_rate, base_block, factor, level_count, size, mtime_ns = (
+            _PEAKS_HEADER.unpack_from(data)
+        )
+        if (magic, version) != (_PEAKS_MAGIC, _PEAKS_VERSION):
+            return None
+        if (size, mtime_ns) != (source_stat.st_size, source_stat.st_mtime_ns):
+            return None
+
+        offset = _PEAKS_HEADER.size
+        counts = struct.unpack_from(f"<{level_count}I", data, offset)
+        offset += 4 * level_count
+        levels = []
+        for count in counts:
+            levels.append(np.frombuffer(data, dtype="<i2", count=count * 2, offset=offset).reshape(count, 2))
+            offset += count * 4
+        return cls(levels, sample_rate, base_block, factor)
+
+
+def _peak_file_candidates(video_path):
+    # Next to the video when possible, in the user cache otherwise
+    # (read-only shares, ...)
+    name = hashlib.sha1(os.path.abspath(video_path).encode()).hexdigest() + ".peaks"
+    return [video_path + ".peaks", os.path.join(PEAKS_CACHE_DIR, name)]
+
+
+def get_peaks(video_path):
+    """
+    Waveform peaks for video_path, read from its peak file when it is still
+    current and computed (then stored) otherwise. None if there is no audio.
+    """
+    source_stat = os.stat(video_path)
+    candidates = _peak_file_candidates(video_path)
+    for path in candidates:
+        pyramid = PeakPyramid.load(path, source_stat)
+        if pyramid is not None:
+            return pyramid
+
+    start_time = time.time()
+    pyramid = PeakPyramid.from_chunks(decode_audio(video_path))
+    if pyramid is None:
+        return None
+    for path in candidates:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            pyramid.save(path, source_stat)
+            break
+        except OSError:
+            continue
+    print(
+        f"Computed waveform peaks for {os.path.basename(video_path)} "
+        f"in {round(time.time() - start_time, 2)}s"
+    )
+    return pyramid
+
+
+def _runs(mask):
+    """(starts, ends) index pairs of the True runs in a boolean array"""
+    edges = np.diff(np.concatenate([[False], mask, [False]]).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def window_loudness(chunks, sample_rate=ANALYSIS_SAMPLE_RATE, window=0.02):
+    """RMS level in dBFS of every window seconds of audio, computed chunk by chunk"""
+    window_samples = max(1, int(sample_rate * window))
+    levels = []
+    remainder = np.empty(0, dtype=np.int16)
+    for chunk in chunks:
+        samples = np.concatenate([remainder, chunk]) if len(remainder) else chunk
+        usable = len(samples) // window_samples * window_samples
+        shaped = samples[:usable].reshape(-1, window_samples).astype(np.float32) / 32768.0
+        levels.append(np.einsum("ij,ij->i", shaped, shaped) / window_samples)
+        remainder = samples[usable:]
+    if len(remainder):
+        tail = remainder.astype(np.float32) / 32768.0
+        levels.append(np.array([np.dot(tail, tail) / len(tail)], dtype=np.float32))
+    if not levels:
+        return np.empty(0, dtype=np.float32)
+    # Floor at -100 dBFS so digital silence doesn't produce -inf
+    return 10 * np.log10(np.maximum(np.concatenate(levels), 1e-10))
+
+
+def detect_silence(
+    video_path, threshold_db=-40.0, min_silence=0.5, min_sound=0.1, padding=0.1, window=0.02
+):
+    """
+    Silent stretches of video_path's audio as [(start, end), ...] seconds.
+    - Windows quieter than threshold_db (RMS, dBFS) count as silent
+    - Sounds shorter than min_sound between silences (clicks, breaths) are
+      folded into the silence around them
+    - Only silences of at least min_silence are returned, shrunk by padding
+      on each side so cuts don't clip the start or end of speech
+    """
+    levels = window_loudness(decode_audio(video_path), window=window)
+    silent = levels < threshold_db
+
+    starts, ends = _runs(~silent)
+    short = (ends - starts) < max(1, int(round(min_sound / window)))
+    # A short sound is only dropped when it sits between two silences
+    inner = (starts > 0) & (ends < len(silent))
+    for start, end in zip(starts[short & inner], ends[short & inner]):
+        silent[start:end] = True
+
+    silences = []
+    starts, ends = _runs(silent)
+    for start, end in zip(starts, ends):
+        if (end - start) * window < min_silence:
+            continue
+        # Silence at the very start or end is cut right up to the edge
+        cut_start = start * window + (padding if start > 0 else 0)
+        cut_end = end * window - (padding if end < len(silent) else 0)
+        if cut_end > cut_start:
+            silences.append((round(float(cut_start), 3), round(float(cut_end), 3)))
+    return silences
+
+
+def keep_segments(duration, silences, min_keep=0.05):
+    """The complement of silences within 0..duration, the parts to keep"""
+    segments = []
+    position = 0.0
+    for start, end in silences:
+        if start - position >= min_keep:
+            segments.append((round(float(position), 3), round(float(start), 3)))
+        position = max(position, end)
+    if duration - position >= min_keep:
+        segments.append((round(float(position), 3), round(float(duration), 3)))
+    return segments
@@ -0,0 +1,74 @@
+"""
+Import-time (startup) cost of the entry points, measured with python -X importtime.
+
+    python benchmarks/bench_startup.py [--runs 5] [--check]
+
+Each module is imported in a fresh interpreter; the best of --runs is
+reported together with the heavy video backends the import pulled in.
+--check exits non-zero if an entry point that should start light imports
+one of them.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ["main", "gui", "render_cache", "jobs", "job_server", "watch_daemon", "ffmpeg_utils", "preview"]
+HEAVY_MODULES = ["cv2", "numpy", "moviepy", "matplotlib", "PIL", "imageio_ffmpeg"]
+
+# Entry points that must not import any heavy backend at startup
+LIGHT_ENTRY_POINTS = ["main", "gui", "render_cache", "jobs", "job_server", "watch_daemon"]
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module):
+    """Returns (cumulative import microseconds, heavy modules loaded, slowest direct imports)"""
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total = 0
+    children = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        # importtime indents each nesting level by two spaces
+        if len(indent) == 3:
+            children.append((int(cumulative_us), name))
+        elif len(indent) == 1 and name == module:
+            total = int(cumulative_us)
+            break
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return total, loaded, sorted(children, reverse=True)[:3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="fail if a light entry point imports a backend")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':>14} {'import ms':>10}  heavy backends loaded / slowest imports")
+    for module in ENTRY_POINTS:
+        runs = [measure(module) for _ in range(args.runs)]
+        total, loaded, slowest = min(runs)
+        slowest_text = ", ".join(f"{name} {us / 1000:.0f}ms" for us, name in slowest)
+        print(f"{module:>14} {total / 1000:>10.1f}  [{', '.join(loaded) or '-'}] {slowest_text}")
+        if module in LIGHT_ENTRY_POINTS and loaded:
+            failures.append(f"{module} imports {', '.join(loaded)} at startup")
+
+    if args.check and failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
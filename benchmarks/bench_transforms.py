@@ -0,0 +1,90 @@
+"""
+Per-frame vs batched transform throughput on synthetic frames.
+
+    python benchmarks/bench_transforms.py [--frames 256] [--batch-size 16]
+
+Small resolutions are where per-call overhead dominates and batching pays off.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transforms import blur_region, blur_region_batch, crop_batch, resize_batch  # noqa: E402
+
+RESOLUTIONS = [(64, 36), (160, 90), (320, 180), (640, 360), (1280, 720)]
+
+
+def fps(func, frames, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return len(frames) / best
+
+
+def bench_resolution(width, height, frame_count, batch_size):
+    frames = np.random.randint(0, 256, (frame_count, height, width, 3), dtype=np.uint8)
+    box = (width // 4, height // 4, width * 3 // 4, height * 3 // 4)
+    size = (width // 2, height // 2)
+    batches = [frames[i:i + batch_size] for i in range(0, frame_count, batch_size)]
+    resized = np.empty((batch_size, size[1], size[0], 3), dtype=np.uint8)
+
+    def crop_per_frame():
+        for frame in frames:
+            np.ascontiguousarray(frame[box[1]:box[3], box[0]:box[2]])
+
+    def crop_batched():
+        for batch in batches:
+            np.ascontiguousarray(crop_batch(batch, box))
+
+    def resize_per_frame():
+        for frame in frames:
+            cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+
+    def resize_batched():
+        for batch in batches:
+            resize_batch(batch, size, out=resized[:len(batch)])
+
+    def blur_per_frame():
+        for frame in frames:
+            blur_region(frame, box)
+
+    def blur_batched():
+        for batch in batches:
+            blur_region_batch(batch, box)
+
+    results = []
+    for name, per_frame, batched in (
+        ("crop", crop_per_frame, crop_batched),
+        ("resize", resize_per_frame, resize_batched),
+        ("blur", blur_per_frame, blur_batched),
+    ):
+        single = fps(per_frame, frames)
+        batch = fps(batched, frames)
+        results.append((name, single, batch))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{'resolution':>12} {'op':>7} {'per-frame fps':>14} {'batched fps':>12} {'speedup':>8}")
+    for width, height in RESOLUTIONS:
+        for name, single, batch in bench_resolution(width, height, args.frames, args.batch_size):
+            print(
+                f"{f'{width}x{height}':>12} {name:>7} {single:>14.0f} {batch:>12.0f} {batch / single:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import os
+
+import cv2
+import numpy as np
+
+# The last .cube file expanded to a full 8-bit table (48 MB, so only one is
+# kept), by (path, size, mtime)
+_cube_cache = {}
+
+# apply_cube gathers this many pixels at a time, bounding its index arrays
+_CUBE_CHUNK_PIXELS = 1 << 20
+
+
+def tone_lut(brightness=0.0, contrast=1.0, gamma=1.0):
+    """
+    256-entry uint8 table for cv2.LUT applying, in order:
+    - gamma: out = in ** (1 / gamma), so gamma > 1 brightens the midtones
+    - contrast: scales around mid grey (1.0 leaves it unchanged)
+    - brightness: offset in levels, -255..255
+    """
+    levels = np.arange(256, dtype=np.float64) / 255.0
+    levels = levels ** (1.0 / max(gamma, 1e-3))
+    levels = (levels - 0.5) * contrast + 0.5
+    levels = levels * 255.0 + brightness
+    return np.clip(np.round(levels), 0, 255).astype(np.uint8)
+
+
+def parse_cube(path):
+    """
+    A .cube 3D LUT as (table, domain_min, domain_max); table is a float32
+    (N, N, N, 3) array indexed [b][g][r] holding RGB outputs
+    """
+    size = None
+    domain_min = np.zeros(3, dtype=np.float32)
+    domain_max = np.ones(3, dtype=np.float32)
+    values = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            keyword = line.split()[0].upper()
+            if keyword == "LUT_3D_SIZE":
+                size = int(line.split()[1])
+            elif keyword == "LUT_1D_SIZE":
+                raise ValueError(f"{os.path.basename(path)} is a 1D LUT, only 3D .cube LUTs are supported")
+            elif keyword == "DOMAIN_MIN":
+                domain_min = np.array(line.split()[1:4], dtype=np.float32)
+            elif keyword == "DOMAIN_MAX":
+                domain_max = np.array(line.split()[1:4], dtype=np.float32)
+            elif keyword[0].isdigit() or keyword[0] in "-.":
+                values.append(line.split()[:3])
+            # TITLE and other keywords don't affect the mapping
+    if size is None or size < 2:
+        raise ValueError(f"{os.path.basename(path)} has no usable LUT_3D_SIZE")
+    if len(values) != size ** 3:
+        raise ValueError(f"{os.path.basename(path)} has {len(values)} entries, expected {size ** 3}")
+    # Red changes fastest in the file, so rows reshape to [b][g][r]
+    table = np.array(values, dtype=np.float32).reshape(size, size, size, 3)
+    return table, domain_min, domain_max
+
+
+def _axis_weights(size, low, high):
+    # For every 8-bit input level: lower lattice index, upper index, weight
+    position = (np.arange(256, dtype=np.float32) / 255.0 - low) / max(high - low, 1e-6) * (size - 1)
+    position = np.clip(position, 0, size - 1)
+    lower = np.minimum(np.floor(position).astype(np.int64), size - 2)
+    upper = np.minimum(lower + 1, size - 1)
+    return lower, upper, (position - lower).astype(np.float32)
+
+
+def _interpolate_axis(table, axis, weights):
+    lower, upper, fraction = weights
+    shape = [1] * table.ndim
+    shape[axis] = 256
+    fraction = fraction.reshape(shape)
+    return np.take(table, lower, axis=axis) * (1 - fraction) + np.take(table, upper, axis=axis) * fraction
+
+
+def expand_cube(table, domain_min, domain_max):
+    """
+    Trilinearly expand a (N, N, N, 3) [b][g][r] lattice to a full
+    (256, 256, 256, 3) uint8 table indexed [b][g][r] holding BGR outputs,
+    so applying it is a single gather per pixel.
+    - Interpolation is separable, one axis at a time; the last axis is
+      done in slices so no full-size float table is ever held
+    """
+    size = table.shape[0]
+    weights = [_axis_weights(size, domain_min[c], domain_max[c]) for c in range(3)]
+    # Outputs to BGR and 0..255 once, before expanding
+    lattice = table[..., ::-1] * 255.0
+    lattice = _interpolate_axis(lattice, 2, weights[0])
+    lattice = _interpolate_axis(lattice, 1, weights[1])
+
+    lower, upper, fraction = weights[2]
+    expanded = np.empty((256, 256, 256, 3), dtype=np.uint8)
+    for blue in range(256):
+        plane = lattice[lower[blue]] * (1 - fraction[blue]) + lattice[upper[blue]] * fraction[blue]
+        np.clip(plane + 0.5, 0, 255, out=plane)
+        expanded[blue] = plane
+    return expanded
+
+
+def load_cube(path):
+    """The expanded table for a .cube file, built once until the file changes"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _cube_cache:
+        _cube_cache.clear()
+        _cube_cache[key] = expand_cube(*parse_cube(path))
+    return _cube_cache[key]
+
+
+def apply_cube(pixels, expanded):
+    """Map a (..., 3) BGR uint8 array through an expanded table in place"""
+    flat = pixels.reshape(-1, 3)
+    table = expanded.reshape(-1, 3)
+    for start in range(0, len(flat), _CUBE_CHUNK_PIXELS):
+        chunk = flat[start:start + _CUBE_CHUNK_PIXELS]
+        index = chunk[:, 0].astype(np.int32) << 16
+        index |= chunk[:, 1].astype(np.int32) << 8
+        index |= chunk[:, 2]
+        np.take(table, index, axis=0, out=chunk)
+    return pixels
+
+
+def _as_image(frames):
+    # A (N, H, W, 3) batch is one (N*H, W, 3) image to OpenCV: one call each
+    return frames.reshape(-1, frames.shape[-2], frames.shape[-1])
+
+
+def grade_batch(frames, brightness=0.0, contrast=1.0, gamma=1.0, saturation=1.0, lut_path=None):
+    """
+    Color-grade a (N, H, W, 3) BGR batch (or a single frame) in place.
+    - brightness/contrast/gamma go through one precomputed 256-entry table
+      (cv2.LUT), saturation blends each pixel with its luma (1.0 = as is,
+      0.0 = greyscale), and lut_path's .cube is applied last
+    """
+    if not frames.flags.c_contiguous:
+        raise ValueError("grade_batch needs a contiguous batch")
+    image = _as_image(frames)
+    if (brightness, contrast, gamma) != (0.0, 1.0, 1.0):
+        cv2.LUT(image, tone_lut(brightness, contrast, gamma), dst=image)
+    if saturation != 1.0:
+        luma = cv2.cvtColor(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+        cv2.addWeighted(image, saturation, luma, 1.0 - saturation, 0, dst=image)
+    if lut_path:
+        apply_cube(image, load_cube(lut_path))
+    return frames
+
+
+def grade_frame(frame, **params):
+    if not frame.flags.c_contiguous:
+        frame = np.ascontiguousarray(frame)
+    return grade_batch(frame, **params)
@@ -0,0 +1,569 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from fractions import Fraction
+
+import numpy as np
+
+_keyframe_cache = {}
+
+PASSLOG_DIR = os.environ.get(
+    "VIDEO_EDITOR_PASSLOG_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "video-editor", "passlogs"),
+)
+MAX_PASSLOGS = int(os.environ.get("VIDEO_EDITOR_MAX_PASSLOGS", "32"))
+# First passes left behind by a crashed process
+STALE_PASSLOG_SECONDS = 24 * 60 * 60
+
+
+def get_ffmpeg_exe():
+    # imageio-ffmpeg ships a static build (and honours IMAGEIO_FFMPEG_EXE),
+    # the same binary moviepy uses. Imported here, it is slow to import.
+    import imageio_ffmpeg
+
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def run_ffmpeg(args, check=True):
+    cmd = [get_ffmpeg_exe(), "-hide_banner", "-nostdin", "-y", *args]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if check and result.returncode != 0:
+        stderr = result.stderr.decode(errors="replace").strip().splitlines()
+        raise RuntimeError(f"ffmpeg failed: {' | '.join(stderr[-5:])}")
+    return result
+
+
+def _parse_fps(text):
+    fps = float(text)
+    if fps.is_integer():
+        return Fraction(int(fps))
+    # ffmpeg prints NTSC rates rounded (29.97, 59.94, 23.98); recover the
+    # exact x/1001 rate instead of a truncated decimal
+    ntsc = round(fps * 1.001)
+    if abs(ntsc / 1.001 - fps) < 0.01:
+        return Fraction(ntsc * 1000, 1001)
+    return Fraction(fps).limit_denominator(1001)
+
+
+def parse_rate(rate):
+    """
+    An exact frame rate from a Fraction, a number or a string: "30000/1001"
+    is taken as is and decimals like 29.97 become their NTSC x/1001 rate
+    """
+    if isinstance(rate, Fraction):
+        return rate
+    text = str(rate).strip()
+    fps = Fraction(text) if "/" in text else _parse_fps(text)
+    if fps <= 0:
+        raise ValueError(f"Frame rate must be positive, not {rate}")
+    return fps
+
+
+def probe_video(video_path):
+    """
+    Container/stream metadata from `ffmpeg -i` (no decoding).
+    - Returns duration, video codec, pix_fmt, width, height, fps (Fraction),
+      the video time base's denominator (timescale), audio codec (None if
+      there is no audio), audio sample rate and channel layout
+    """
+    result = run_ffmpeg(["-i", video_path], check=False)
+    info = result.stderr.decode(errors="replace")
+
+    video = re.search(
+        r"Stream #\S+.*?: Video: (\w+)[^,\n]*, (\w+)(?:\([^)]*\))?, (\d+)x(\d+)", info
+    )
+    if not video:
+        raise ValueError(f"No video stream found in {video_path}")
+
+    duration = None
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", info)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    fps = None
+    match = re.search(r"(\d+(?:\.\d+)?) fps", info)
+    if match:
+        fps = _parse_fps(match.group(1))
+
+    timescale = None
+    match = re.search(r"Stream #\S+.*?: Video: .*?(\d+(?:\.\d+)?)(k?) tbn", info)
+    if match:
+        timescale = int(round(float(match.group(1)) * (1000 if match.group(2) else 1)))
+
+    audio = re.search(r"Stream #\S+.*?: Audio: (\w+)[^,\n]*, (\d+) Hz, ([^,\n]+)", info)
+
+    return {
+        "duration": duration,
+        "video_codec": video.group(1),
+        "pix_fmt": video.group(2),
+        "width": int(video.group(3)),
+        "height": int(video.group(4)),
+        "fps": fps,
+        "timescale": timescale,
+        "audio_codec": audio.group(1) if audio else None,
+        "sample_rate": int(audio.group(2)) if audio else None,
+        "channels": audio.group(3) if audio else None,
+    }
+
+
+def get_keyframe_times(video_path):
+    """
+    Presentation times (seconds) of every keyframe, read with
+    -skip_frame nokey so only the keyframes are decoded.
+    - Cached until the file changes on disk
+    """
+    stat = os.stat(video_path)
+    cache_key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+    if cache_key in _keyframe_cache:
+        return _keyframe_cache[cache_key]
+
+    result = run_ffmpeg(
+        [
+            "-skip_frame", "nokey",
+            "-i", video_path,
+            "-map", "0:v:0",
+            "-vf", "showinfo",
+            "-f", "null", "-",
+        ]
+    )
+    info = result.stderr.decode(errors="replace")
+    times = sorted(float(t) for t in re.findall(r"pts_time:\s*(-?\d+(?:\.\d+)?)", info))
+    _keyframe_cache[cache_key] = times
+    return times
+
+
+def copy_frames(video_path, start_time, frame_count, output_path):
+    """
+    Stream-copy frame_count video frames starting at the keyframe at
+    start_time. Nothing is decoded or re-encoded.
+    """
+    run_ffmpeg(
+        [
+            "-ss", f"{start_time:.6f}",
+            "-i", video_path,
+            "-map", "0:v:0",
+            "-frames:v", str(frame_count),
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            output_path,
+        ]
+    )
+    return output_path
+
+
+def copy_segment(video_path, start_time, end_time, output_path):
+    """
+    Stream-copy [start_time, end_time) with its audio. The cut starts on the
+    keyframe at or before start_time, so start_time should be a keyframe.
+    """
+    args = ["-ss", f"{start_time:.6f}", "-i", video_path]
+    if end_time is not None:
+        args += ["-t", f"{end_time - start_time:.6f}"]
+    args += [
+        "-map", "0:v:0",
+        "-map", "0:a?",
+        "-c", "copy",
+        "-avoid_negative_ts", "make_zero",
+        output_path,
+    ]
+    run_ffmpeg(args)
+    return output_path
+
+
+def concat_copy(video_paths, output_path):
+    """Join files with identical stream parameters without re-encoding"""
+    list_dir = tempfile.mkdtemp(prefix="concat_")
+    try:
+        list_path = os.path.join(list_dir, "segments.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in video_paths:
+                escaped = os.path.abspath(path).replace("'", r"'\''")
+                f.write(f"file '{escaped}'\n")
+        run_ffmpeg(
+            ["-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_path]
+        )
+    finally:
+        shutil.rmtree(list_dir, ignore_errors=True)
+    return output_path
+
+
+def encoder_args(profile):
+    """
+    ffmpeg output arguments for an encoder profile, a dict with:
+    - codec: any libavcodec encoder name (libx264, libx265, libvpx-vp9, mpeg4, ...)
+    - crf / bitrate / preset / pix_fmt: optional, passed through when set
+    - keyframe_interval: optional seconds between forced keyframes; short
+      GOPs keep stream-copy cuts and incremental re-renders fine-grained
+    - extra: optional list of additional ffmpeg output arguments
+    """
+    args = ["-c:v", profile["codec"]]
+    if profile.get("crf") is not None:
+        args += ["-crf", str(profile["crf"])]
+        if profile["codec"].startswith("libvpx") and not profile.get("bitrate"):
+            # libvpx only honours -crf in constant quality mode
+            args += ["-b:v", "0"]
+    if profile.get("bitrate"):
+        args += ["-b:v", str(profile["bitrate"])]
+    if profile.get("preset"):
+        args += ["-preset", profile["preset"]]
+    if profile.get("pix_fmt"):
+        args += ["-pix_fmt", profile["pix_fmt"]]
+    if profile.get("keyframe_interval"):
+        interval = profile["keyframe_interval"]
+        args += ["-force_key_frames", f"expr:gte(t,n_forced*{interval})"]
+    return args + list(profile.get("extra", []))
+
+
+def frame_shape(pix_fmt, width, height):
+    """
+    Array shape of one raw frame; yuv420p is planar and kept flat, as its
+    chroma planes are ((w + 1) // 2, (h + 1) // 2) and don't line up into
+    rows for odd sizes (see yuv_planes)
+    """
+    if pix_fmt in ("bgr24", "rgb24"):
+        return (height, width, 3)
+    if pix_fmt == "gray":
+        return (height, width, 1)
+    if pix_fmt == "yuv420p":
+        return (width * height + 2 * ((width + 1) // 2) * ((height + 1) // 2),)
+    raise ValueError(f"Unsupported raw pixel format: {pix_fmt}")
+
+
+def yuv_planes(frame, width, height):
+    """The Y, U and V planes of a flat yuv420p frame, as views"""
+    chroma_width, chroma_height = (width + 1) // 2, (height + 1) // 2
+    luma = width * height
+    chroma = chroma_width * chroma_height
+    return (
+        frame[:luma].reshape(height, width),
+        frame[luma:luma + chroma].reshape(chroma_height, chroma_width),
+        frame[luma + chroma:luma + 2 * chroma].reshape(chroma_height, chroma_width),
+    )
+
+
+def yuv420p_to_bgr(frame, width, height):
+    """A flat yuv420p frame as BGR; odd sizes are padded to even for the conversion and cropped back"""
+    import cv2
+
+    y, u, v = yuv_planes(frame, width, height)
+    even_width, even_height = u.shape[1] * 2, u.shape[0] * 2
+    if (even_width, even_height) != (width, height):
+        y = np.pad(y, ((0, even_height - height), (0, even_width - width)), mode="edge")
+    i420 = np.concatenate([y.ravel(), u.ravel(), v.ravel()]).reshape(even_height * 3 // 2, even_width)
+    return cv2.cvtColor(i420, cv2.COLOR_YUV2BGR_I420)[:height, :width]
+
+
+class FFmpegReader:
+    """
+    Decode a video to raw frames over a pipe.
+    - read() fills one preallocated (H, W, C) array with readinto, so no
+      per-frame buffers are allocated; the array is reused by the next read,
+      copy it if it has to outlive the iteration
+    - start (seconds) seeks before decoding, frames limits how many are read
+    - size=(w, h) scales in ffmpeg, pix_fmt picks bgr24/rgb24/gray/yuv420p
+    - select is an ffmpeg select expression; frames it rejects are dropped
+      in the decoder's filter chain, before they are scaled and converted
+    - keyframes_only decodes just the keyframes (see get_keyframe_times for
+      their timestamps), skipping every other frame in the decoder
+    """
+
+    def __init__(
+        self, video_path, start=None, frames=None, size=None, pix_fmt="bgr24", info=None, select=None,
+        keyframes_only=False,
+    ):
+        self.video_path = video_path
+        self.info = info or probe_video(video_path)
+        self.fps = self.info["fps"]
+        self.width, self.height = size or (self.info["width"], self.info["height"])
+        self.pix_fmt = pix_fmt
+        self.shape = frame_shape(pix_fmt, self.width, self.height)
+
+        args = [get_ffmpeg_exe(), "-hide_banner", "-nostdin", "-loglevel", "error"]
+        if start:
+            args += ["-ss", f"{float(start):.6f}"]
+        if keyframes_only:
+            args += ["-skip_frame", "nokey"]
+        args += ["-i", video_path, "-map", "0:v:0", "-fps_mode", "passthrough"]
+        if frames is not None:
+            args += ["-frames:v", str(frames)]
+        filters = []
+        if select:
+            filters.append(f"select='{select}'")
+        if size:
+            filters.append(f"scale={self.width}:{self.height}")
+        if filters:
+            args += ["-vf", ",".join(filters)]
+        args += ["-f", "rawvideo", "-pix_fmt", pix_fmt, "-"]
+
+        self.frame = np.empty(self.shape, dtype=np.uint8)
+        self._view = memoryview(self.frame).cast("B")
+        self.proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def readinto(self, buffer):
+        """Fill buffer (a uint8 array of one frame) and return True, or False at the end"""
+        view = buffer if isinstance(buffer, memoryview) else memoryview(buffer).cast("B")
+        filled = 0
+        while filled < len(view):
+            count = self.proc.stdout.readinto(view[filled:])
+            if not count:
+                return False
+            filled += count
+        return True
+
+    def read(self):
+        return self.frame if self.readinto(self._view) else None
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def batches(self, batch_size):
+        """
+        Yield (N, H, W, C) batches of up to batch_size frames, read into one
+        preallocated array that is reused for every batch
+        """
+        batch = np.empty((batch_size, *self.shape), dtype=np.uint8)
+        while True:
+            count = 0
+            while count < batch_size and self.readinto(batch[count]):
+                count += 1
+            if count:
+                yield batch[:count]
+            if count < batch_size:
+                return
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.stdout.close()
+        self.proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FFmpegWriter:
+    """
+    Encode raw BGR frames written over a pipe with any libavcodec encoder.
+    - audio_source muxes that file's audio back in (copied when possible)
+    - Odd dimensions are padded to even for chroma-subsampled pixel formats
+    - If the with-block raises, ffmpeg is killed and nothing is finalised
+    """
+
+    def __init__(self, output_path, size, fps, profile, audio_source=None):
+        self.output_path = output_path
+        width, height = size
+
+        args = [
+            get_ffmpeg_exe(), "-hide_banner", "-nostdin", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "-",
+        ]
+        if audio_source:
+            args += ["-i", audio_source, "-map", "0:v:0", "-map", "1:a?"]
+            args += ["-c:a", _audio_codec_for(audio_source, output_path, profile)]
+
+        pix_fmt = profile.get("pix_fmt") or ""
+        if ("420" in pix_fmt or "422" in pix_fmt) and (width % 2 or height % 2):
+            args += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+        args += encoder_args(profile) + [output_path]
+
+        self._stderr = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(args, stdin=subprocess.PIPE, stderr=self._stderr)
+
+    def write(self, frame):
+        # Takes one frame or a (N, H, W, C) batch, written with a single call
+        if not frame.flags.c_contiguous:
+            frame = np.ascontiguousarray(frame)
+        self.proc.stdin.write(frame.data)
+
+    def close(self, abort=False):
+        if abort:
+            self.proc.kill()
+        try:
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self.proc.wait()
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode(errors="replace").strip().splitlines()
+        self._stderr.close()
+        if returncode != 0 and not abort:
+            raise RuntimeError(f"ffmpeg encode failed: {' | '.join(stderr[-5:])}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(abort=exc_type is not None)
+
+
+def _audio_codec_for(audio_source, output_path, profile):
+    if profile.get("audio_codec"):
+        return profile["audio_codec"]
+    # Copying is free, but only safe into the same kind of container
+    same_container = (
+        os.path.splitext(audio_source)[1].lower() == os.path.splitext(output_path)[1].lower()
+    )
+    if same_container:
+        return "copy"
+    return "libopus" if output_path.lower().endswith(".webm") else "aac"
+
+
+def mux_audio(video_path, audio_source, output_path):
+    """Copy video_path's video and audio_source's audio (if any) into output_path"""
+    run_ffmpeg(
+        [
+            "-i", video_path,
+            "-i", audio_source,
+            "-map", "0:v:0",
+            "-map", "1:a?",
+            "-c", "copy",
+            output_path,
+        ]
+    )
+    return output_path
+
+
+@contextmanager
+def filter_script(graph):
+    """
+    Write a filter graph to a temp file for -filter_complex_script: graphs
+    built from keep-lists of long recordings easily exceed the command line
+    limit
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as script:
+        script.write(graph)
+    try:
+        yield script.name
+    finally:
+        os.remove(script.name)
+
+
+def filtered_audio_codec(output_path, profile):
+    # Filtered audio can't be stream-copied
+    return profile.get("audio_codec") or ("libopus" if output_path.lower().endswith(".webm") else "aac")
+
+
+def render_segments(video_path, segments, output_path, profile):
+    """
+    Keep only segments [(start, end), ...] seconds of video_path and join
+    them, decoding and encoding once.
+    - Frames and samples outside the segments are dropped with select /
+      aselect and the timestamps are rebuilt, so video and audio stay in sync
+    """
+    if not segments:
+        raise ValueError("Nothing to keep, every segment was cut")
+    info = probe_video(video_path)
+    condition = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in segments)
+    # select leaves the stream without a frame rate, so the source's is
+    # given to both the timestamps and the encoder (ffmpeg would pick 25)
+    graph = f"[0:v]select='{condition}',setpts=N/({info['fps']})/TB[v]"
+    has_audio = info["audio_codec"] is not None
+    if has_audio:
+        graph += f";[0:a]aselect='{condition}',asetpts=N/SR/TB[a]"
+
+    with filter_script(graph) as script_path:
+        args = ["-i", video_path, "-filter_complex_script", script_path, "-map", "[v]", "-r", str(info["fps"])]
+        if has_audio:
+            args += ["-map", "[a]", "-c:a", filtered_audio_codec(output_path, profile)]
+        run_ffmpeg(args + encoder_args(profile) + [output_path])
+    return output_path
+
+
+def _passlog_prefix(video_path, profile):
+    # First-pass stats depend on the source and the encoder settings, not on
+    # the target bitrate, so retries at another bitrate reuse them
+    stat = os.stat(video_path)
+    settings = {k: v for k, v in profile.items() if k not in ("bitrate", "crf")}
+    key = repr((os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns, sorted(settings.items())))
+    return os.path.join(PASSLOG_DIR, hashlib.sha1(key.encode()).hexdigest())
+
+
+def _prune_passlogs(keep):
+    """Drop all but the MAX_PASSLOGS most recently used first passes"""
+    passlogs = {}
+    now = time.time()
+    for name in os.listdir(PASSLOG_DIR):
+        path = os.path.join(PASSLOG_DIR, name)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            continue
+        if "_temp" in name:
+            if now - mtime > STALE_PASSLOG_SECONDS:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            continue
+        # A first pass is <sha1>-0.log plus encoder extras (.mbtree, ...)
+        files, last_used = passlogs.get(name[:40], ([], 0))
+        passlogs[name[:40]] = (files + [path], max(last_used, mtime))
+
+    passlogs.pop(keep, None)
+    by_age = sorted(passlogs.values(), key=lambda passlog: passlog[1], reverse=True)
+    for files, _ in by_age[max(MAX_PASSLOGS - 1, 0):]:
+        for path in files:
+            try:
+                os.remove(path)
+            except OSError:
+                # Another process pruned it first
+                pass
+
+
+def encode_two_pass(video_path, output_path, profile, video_kbps, audio_kbps=None):
+    """
+    Two-pass average-bitrate encode of video_path at video_kbps.
+    - The first pass is analysis only (no audio, no output file) and its
+      stats file is cached in PASSLOG_DIR, so encoding the same source again
+      at another bitrate runs only the second pass; only the MAX_PASSLOGS
+      most recently used stats files are kept
+    - audio_kbps re-encodes the audio at that bitrate; None drops it
+    Returns True if the first pass came from the cache.
+    """
+    profile = dict(profile, crf=None, bitrate=f"{int(video_kbps)}k")
+    prefix = _passlog_prefix(video_path, profile)
+    cached = os.path.exists(prefix + "-0.log")
+    if not cached:
+        os.makedirs(PASSLOG_DIR, exist_ok=True)
+        temp_prefix = f"{prefix}_{os.getpid()}_temp"
+        run_ffmpeg(
+            ["-i", video_path, "-map", "0:v:0"] + encoder_args(profile)
+            + ["-pass", "1", "-passlogfile", temp_prefix, "-an", "-f", "null", os.devnull]
+        )
+        # The encoder may write several files (x264 adds .mbtree); publish
+        # them under the final name only once the pass has finished
+        temp_name = os.path.basename(temp_prefix)
+        for name in os.listdir(PASSLOG_DIR):
+            if name.startswith(temp_name):
+                os.replace(
+                    os.path.join(PASSLOG_DIR, name),
+                    os.path.join(PASSLOG_DIR, os.path.basename(prefix) + name[len(temp_name):]),
+                )
+        _prune_passlogs(keep=os.path.basename(prefix))
+    else:
+        # mtime is the last-used time _prune_passlogs orders by
+        try:
+            os.utime(prefix + "-0.log")
+        except OSError:
+            pass
+
+    args = ["-i", video_path, "-map", "0:v:0"]
+    if audio_kbps:
+        args += ["-map", "0:a?", "-c:a", filtered_audio_codec(output_path, profile), "-b:a", f"{int(audio_kbps)}k"]
+    run_ffmpeg(args + encoder_args(profile) + ["-pass", "2", "-passlogfile", prefix, output_path])
+    return cached
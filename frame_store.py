@@ -0,0 +1,188 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import weakref
+
+import numpy as np
+
+from ffmpeg_utils import FFmpegReader, frame_shape, probe_video, yuv420p_to_bgr
+
+STORE_ROOT = os.path.join(tempfile.gettempdir(), "video-editor-frames")
+DEFAULT_MAX_MB = int(os.environ.get("VIDEO_EDITOR_FRAME_STORE_MB", "4096"))
+
+# Frames to map when the container has no duration, and the minimum the
+# file grows by whenever the decoder outruns the estimate
+GROWTH_FRAMES = 256
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Exists but belongs to someone else (or Windows semantics)
+        return True
+    return True
+
+
+def cleanup_stale_stores():
+    """Remove stores left behind by processes that no longer exist"""
+    if not os.path.isdir(STORE_ROOT):
+        return
+    for name in os.listdir(STORE_ROOT):
+        pid = name.split("_", 1)[0]
+        if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            shutil.rmtree(os.path.join(STORE_ROOT, name), ignore_errors=True)
+
+
+class FrameStore:
+    """
+    Decode a video once into an uncompressed, memory-mapped frame file so
+    multi-pass operations (analysis then render, palette then encode, ...)
+    don't decode the source again.
+    - pix_fmt "bgr24" stores (N, H, W, 3) frames; "yuv420p" halves the size,
+      stores flat frames (see ffmpeg_utils.yuv_planes) and is converted on
+      read with bgr()
+    - frames[i] / yuv(i) are zero-copy numpy.memmap views
+    - size=(w, h) decodes scaled-down frames for analysis passes
+    - The file is sized from the container's duration and grows when the
+      decoder returns more frames than that
+    - Raises ValueError rather than store more than max_mb, up front when
+      the duration already says so; the files are deleted on close(),
+      when the store is garbage collected, at exit, or by the next process
+      if this one crashed
+    - Picklable: worker processes reopen the same file read-only
+    """
+
+    def __init__(self, video_path, pix_fmt="bgr24", size=None, max_mb=DEFAULT_MAX_MB):
+        cleanup_stale_stores()
+        info = probe_video(video_path)
+        width, height = size or (info["width"], info["height"])
+        shape = frame_shape(pix_fmt, width, height)
+        frame_bytes = int(np.prod(shape))
+        self.max_frames = max_mb * 1024 * 1024 // frame_bytes
+        name = os.path.basename(video_path)
+
+        if info["duration"] and info["fps"]:
+            estimated = int(info["duration"] * float(info["fps"]))
+            if estimated > self.max_frames:
+                raise ValueError(
+                    f"Decoding {name} needs ~{estimated * frame_bytes // 2**20} MB, "
+                    f"over the {max_mb} MB frame store limit; use a smaller size or yuv420p"
+                )
+            # Container durations are approximate, leave room for a few more
+            # frames; a video that turns out longer than the limit fails below
+            capacity = min(estimated + 16, self.max_frames)
+        else:
+            capacity = min(GROWTH_FRAMES, self.max_frames)
+
+        os.makedirs(STORE_ROOT, exist_ok=True)
+        self.store_dir = tempfile.mkdtemp(prefix=f"{os.getpid()}_", dir=STORE_ROOT)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.store_dir, True)
+
+        start_time = time.time()
+        self.data_path = os.path.join(self.store_dir, "frames.raw")
+        mapped = np.memmap(self.data_path, dtype=np.uint8, mode="w+", shape=(capacity, *shape))
+        count = 0
+        try:
+            with FFmpegReader(video_path, size=size, pix_fmt=pix_fmt, info=info) as reader:
+                # Decode straight into the mapped file, no intermediate buffers
+                while True:
+                    if count == capacity:
+                        if capacity == self.max_frames:
+                            if not reader.readinto(np.empty(shape, dtype=np.uint8)):
+                                break
+                            raise ValueError(
+                                f"{name} has more than {capacity} frames, over the {max_mb} MB frame store limit"
+                            )
+                        capacity = min(self.max_frames, max(capacity + GROWTH_FRAMES, capacity * 5 // 4))
+                        mapped.flush()
+                        del mapped
+                        os.truncate(self.data_path, capacity * frame_bytes)
+                        mapped = np.memmap(self.data_path, dtype=np.uint8, mode="r+", shape=(capacity, *shape))
+                    if not reader.readinto(mapped[count]):
+                        break
+                    count += 1
+            mapped.flush()
+            del mapped
+            if not count:
+                raise ValueError(f"Could not decode any frames from {video_path}")
+        except BaseException:
+            self._finalizer()
+            raise
+        os.truncate(self.data_path, count * frame_bytes)
+
+        self.meta = {
+            "source": os.path.abspath(video_path),
+            "pix_fmt": pix_fmt,
+            "width": width,
+            "height": height,
+            "shape": list(shape),
+            "count": count,
+            "fps": [info["fps"].numerator, info["fps"].denominator],
+        }
+        with open(os.path.join(self.store_dir, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+
+        self._open()
+        print(
+            f"Decoded {count} frames of {os.path.basename(video_path)} into a "
+            f"{count * frame_bytes // 2**20} MB frame store in {round(time.time() - start_time, 2)}s"
+        )
+
+    def _open(self):
+        shape = (self.meta["count"], *self.meta["shape"])
+        self.frames = np.memmap(self.data_path, dtype=np.uint8, mode="r", shape=shape)
+        numerator, denominator = self.meta["fps"]
+        self.fps = numerator / denominator
+        self.timestamps = np.arange(self.meta["count"]) / self.fps
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def yuv(self, index):
+        return self.frames[index]
+
+    def bgr(self, index):
+        """Frame index as BGR; a view for bgr24 stores, converted for yuv420p"""
+        frame = self.frames[index]
+        if self.meta["pix_fmt"] == "yuv420p":
+            return yuv420p_to_bgr(np.asarray(frame), self.meta["width"], self.meta["height"])
+        return frame
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.bgr(index)
+
+    def batches(self, batch_size):
+        """(N, H, W, 3) BGR batches of up to batch_size frames, as FFmpegReader.batches"""
+        for first in range(0, len(self), batch_size):
+            last = min(first + batch_size, len(self))
+            if self.meta["pix_fmt"] == "yuv420p":
+                yield np.stack([self.bgr(index) for index in range(first, last)])
+            else:
+                yield self.frames[first:last]
+
+    def __getstate__(self):
+        return {"store_dir": self.store_dir, "data_path": self.data_path, "meta": self.meta}
+
+    def __setstate__(self, state):
+        # Worker copies only read; the owning process removes the files
+        self.__dict__.update(state)
+        self._finalizer = None
+        self._open()
+
+    def close(self):
+        self.frames = None
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
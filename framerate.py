@@ -0,0 +1,160 @@
+import os
+import time
+from fractions import Fraction
+
+import numpy as np
+
+from ffmpeg_utils import (
+    FFmpegReader, FFmpegWriter, encoder_args, filtered_audio_codec, parse_rate, probe_video, run_ffmpeg
+)
+from main import BATCH_SIZE, ENCODER_PROFILE
+
+MODES = ("nearest", "blend", "motion")
+
+# Blend weights are applied in 1/BLEND_STEPS steps with integer arithmetic
+BLEND_STEPS = 256
+
+
+def _ratio(source_fps, target_fps):
+    # Source frames per output frame as (a, b): the cadence repeats every a
+    # source frames, b output frames
+    ratio = Fraction(source_fps) / Fraction(target_fps)
+    return ratio.numerator, ratio.denominator
+
+
+def _ceil_div(numerator, denominator):
+    return -(-numerator // denominator)
+
+
+def cadence(source_fps, target_fps):
+    """
+    How many times each source frame is shown when every output frame takes
+    the nearest source frame, as (pattern, lead):
+    - pattern holds the counts for one period of the cadence; source frame n
+      is shown pattern[n % len(pattern)] times (60 -> 30 is [1, 0], 24 -> 30
+      is [1, 1, 2, 1]), so the whole mapping is known before decoding
+    - the first frame is shown lead fewer times, as no output frame comes
+      before it
+    """
+    a, b = _ratio(source_fps, target_fps)
+    # Output j shows frame round(j * a / b): frame n covers the j in
+    # [(2n - 1) b / 2a, (2n + 1) b / 2a)
+    n = np.arange(a, dtype=np.int64)
+    pattern = _ceil_div((2 * n + 1) * b, 2 * a) - _ceil_div((2 * n - 1) * b, 2 * a)
+    return pattern, b // (2 * a)
+
+
+def blend_plan(source_fps, target_fps):
+    """
+    Where each output frame falls between source frames, for one period of
+    b output frames: (a, lower, weights) where output j blends frame
+    (j // b) * a + lower[j % b] with the next one by weights[j % b] / BLEND_STEPS
+    """
+    a, b = _ratio(source_fps, target_fps)
+    j = np.arange(b, dtype=np.int64)
+    lower = j * a // b
+    weights = (j * a % b * BLEND_STEPS * 2 + b) // (2 * b)
+    # A weight rounded all the way up is just the next frame
+    rounded_up = weights == BLEND_STEPS
+    lower[rounded_up] += 1
+    weights[rounded_up] = 0
+    return a, lower, weights.astype(np.uint16)
+
+
+def _convert_nearest(reader, out, source_fps, target_fps):
+    pattern, lead = cadence(source_fps, target_fps)
+    first = 0
+    written = 0
+    for batch in reader.batches(BATCH_SIZE):
+        repeats = pattern[np.arange(first, first + len(batch)) % len(pattern)]
+        if first == 0:
+            repeats[0] = max(0, repeats[0] - lead)
+        # Dropped frames are never copied, processed or encoded
+        if repeats.any():
+            out.write(np.repeat(batch, repeats, axis=0))
+        first += len(batch)
+        written += int(repeats.sum())
+    return first, written
+
+
+def _convert_blend(reader, out, source_fps, target_fps):
+    period, lower, weights = blend_plan(source_fps, target_fps)
+    outputs = len(lower)
+    first = 0
+    next_output = 0
+    previous = None
+    for batch in reader.batches(BATCH_SIZE):
+        # The window starts one frame back so blends can span two batches
+        window = batch if previous is None else np.concatenate([previous, batch])
+        base = first if previous is None else first - 1
+        last = first + len(batch) - 1
+
+        # Output frames whose neighbours are both decoded by now
+        j = np.arange(next_output, next_output + (len(batch) + 2) * outputs // period + 2)
+        start = j // outputs * period + lower[j % outputs]
+        weight = weights[j % outputs]
+        ready = (start < last) | ((start == last) & (weight == 0))
+        count = int(np.argmin(ready)) if not ready.all() else len(j)
+        if count:
+            start, weight = start[:count] - base, weight[:count, None, None, None]
+            blended = window[start].astype(np.uint16) * (BLEND_STEPS - weight)
+            blended += window[np.minimum(start + 1, len(window) - 1)] * weight
+            blended += BLEND_STEPS // 2
+            blended //= BLEND_STEPS
+            out.write(blended.astype(np.uint8))
+        next_output += count
+        previous = batch[-1:].copy()
+        first += len(batch)
+    return first, next_output
+
+
+def _convert_motion(video_path, output_path, target_fps, profile):
+    # Motion-compensated interpolation is left to ffmpeg's minterpolate;
+    # the audio isn't touched, so it is copied when the container allows
+    same_container = os.path.splitext(video_path)[1].lower() == os.path.splitext(output_path)[1].lower()
+    run_ffmpeg(
+        [
+            "-i", video_path, "-map", "0:v:0", "-map", "0:a?",
+            "-vf", f"minterpolate=fps={target_fps}:mi_mode=mci:mc_mode=aobmc:vsbmc=1",
+            "-c:a", "copy" if same_container else filtered_audio_codec(output_path, profile),
+        ]
+        + encoder_args(profile) + [output_path]
+    )
+
+
+def convert_frame_rate(video_path, output_path, target_fps, mode="nearest", encoder_profile=None):
+    """
+    Re-time video_path to target_fps (exact, see ffmpeg_utils.parse_rate)
+    keeping its duration, so the audio is muxed back unchanged and stays
+    in sync.
+    - nearest: every output frame is the nearest source frame, following
+      the cadence planned up front; frames are dropped before any work is
+      done on them, so halving the rate halves the encoding
+    - blend: every output frame mixes the two source frames around its
+      time, weighted by distance
+    - motion: motion-compensated interpolation, much slower
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown frame rate mode {mode!r}, expected one of {', '.join(MODES)}")
+    target_fps = parse_rate(target_fps)
+    profile = encoder_profile or ENCODER_PROFILE
+    info = probe_video(video_path)
+    start_time = time.time()
+
+    if mode == "motion":
+        _convert_motion(video_path, output_path, target_fps, profile)
+        print(f"Interpolated {os.path.basename(video_path)} to {target_fps} fps in {round(time.time() - start_time, 2)}s")
+        return output_path
+
+    with FFmpegReader(video_path, info=info) as reader:
+        with FFmpegWriter(
+            output_path, (reader.width, reader.height), target_fps, profile, audio_source=video_path
+        ) as out:
+            convert = _convert_nearest if mode == "nearest" else _convert_blend
+            decoded, written = convert(reader, out, info["fps"], target_fps)
+
+    print(
+        f"Converted {os.path.basename(video_path)} from {info['fps']} to {target_fps} fps "
+        f"({decoded} -> {written} frames, {mode}) in {round(time.time() - start_time, 2)}s"
+    )
+    return output_path
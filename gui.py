@@ -1,16 +1,183 @@
 import os
-import time
 import threading
+import time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from PIL import Image, ImageTk
-import cv2
-import numpy as np
 from main import (
     mp4_to_webm, webm_to_mp4, mkv_to_mp4, convert_mp4_to_gif, mp4_to_mp3,
-    crop_video, get_subclip, speed_up_mp4_video, blur_video,
-    stretch_video_dims, get_vid_dims, mute_video, get_video_duration
+    get_vid_dims, get_video_duration, run_operation, convert_to_target_size, find_conversion_crf
 )
+from jobs import DEFAULT_WORKERS, JobScheduler
+from render_cache import render_non_destructive
+
+# Video backends (cv2, moviepy, numpy, PIL) are imported after the window is
+# up, see warm_backends; nothing imported above pulls them in.
+
+BATCH_EXTENSIONS = (".mp4", ".webm", ".mkv", ".avi", ".mov")
+BATCH_POLL_MS = 500
+
+# Operations that can draw the watermark tab's overlay in their own frame loop
+WATERMARKED_OPERATIONS = ("crop", "blur", "resize", "color")
+
+
+class BatchPanel:
+    """
+    Multi-file mode for a tab: a list of files run through a JobScheduler
+    with a chosen number of parallel workers.
+    - make_task() is called on the Tk thread when a batch starts and returns
+      (step, task): task(input_path) -> output path does the work and step,
+      an (operation, params) pair, describes it. It raises ValueError when
+      the tab's settings aren't valid
+    - Each file's row shows its status and time; when the batch finishes a
+      throughput summary replaces the per-file success dialogs
+    """
+
+    def __init__(self, root, parent, make_task):
+        self.root = root
+        self.make_task = make_task
+        self.files = []
+        self.jobs = {}
+        self.scheduler = None
+        self.started_at = None
+
+        self.frame = ttk.LabelFrame(parent, text="Batch (multiple files)")
+
+        buttons = ttk.Frame(self.frame)
+        buttons.pack(fill='x', padx=5, pady=5)
+        ttk.Button(buttons, text="Add Files", command=self.add_files).pack(side='left', padx=2)
+        ttk.Button(buttons, text="Add Folder", command=self.add_folder).pack(side='left', padx=2)
+        ttk.Button(buttons, text="Clear", command=self.clear).pack(side='left', padx=2)
+        ttk.Label(buttons, text="Parallel jobs:").pack(side='left', padx=(10, 2))
+        self.workers_var = tk.IntVar(value=DEFAULT_WORKERS)
+        ttk.Spinbox(buttons, from_=1, to=os.cpu_count() or 1, textvariable=self.workers_var,
+                    width=4).pack(side='left', padx=2)
+        ttk.Button(buttons, text="Cancel", command=self.cancel).pack(side='right', padx=2)
+        ttk.Button(buttons, text="Run Batch", command=self.run).pack(side='right', padx=2)
+
+        tree_frame = ttk.Frame(self.frame)
+        tree_frame.pack(fill='x', padx=5)
+        self.tree = ttk.Treeview(tree_frame, columns=("status", "time", "output"), height=4)
+        self.tree.heading('#0', text="File")
+        self.tree.heading('status', text="Status")
+        self.tree.heading('time', text="Time")
+        self.tree.heading('output', text="Output")
+        self.tree.column('#0', width=220)
+        self.tree.column('status', width=90)
+        self.tree.column('time', width=60, anchor='e')
+        self.tree.column('output', width=220)
+        scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side='left', fill='x', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        self.progress = ttk.Progressbar(self.frame, mode='determinate')
+        self.progress.pack(fill='x', padx=5, pady=5)
+        self.summary = tk.StringVar(value="No files added")
+        ttk.Label(self.frame, textvariable=self.summary).pack(padx=5, pady=(0, 5))
+
+    def add_files(self):
+        filenames = filedialog.askopenfilenames(
+            title="Select Video Files",
+            filetypes=[("Video files", " ".join("*" + ext for ext in BATCH_EXTENSIONS)), ("All files", "*.*")]
+        )
+        self.add_paths(filenames)
+
+    def add_folder(self):
+        folder = filedialog.askdirectory(title="Select Folder of Videos")
+        if folder:
+            self.add_paths(sorted(
+                entry.path for entry in os.scandir(folder)
+                if entry.is_file() and entry.name.lower().endswith(BATCH_EXTENSIONS)
+            ))
+
+    def add_paths(self, paths):
+        if self.scheduler is not None:
+            return
+        for path in paths:
+            path = os.path.abspath(path)
+            if path not in self.files:
+                self.files.append(path)
+                self.tree.insert('', 'end', iid=path, text=os.path.basename(path), values=("", "", ""))
+        self.summary.set(f"{len(self.files)} file(s) ready")
+
+    def clear(self):
+        if self.scheduler is not None:
+            return
+        self.files = []
+        self.jobs = {}
+        self.tree.delete(*self.tree.get_children())
+        self.progress['value'] = 0
+        self.summary.set("No files added")
+
+    def run(self):
+        if self.scheduler is not None:
+            return
+        if not self.files:
+            messagebox.showerror("Error", "Add files to the batch first")
+            return
+        try:
+            step, task = self.make_task()
+            workers = max(1, self.workers_var.get())
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        self.scheduler = JobScheduler(min(workers, len(self.files)))
+        self.jobs = {}
+        # Sizes before the run: operations without keep-original overwrite their input
+        self.input_sizes = {path: os.path.getsize(path) for path in self.files if os.path.isfile(path)}
+        for path in self.files:
+            try:
+                self.jobs[path] = self.scheduler.submit(path, [step], task=task)
+                self.tree.item(path, values=("queued", "", ""))
+            except ValueError as e:
+                self.tree.item(path, values=("failed", "", str(e)))
+        self.started_at = time.time()
+        self.progress.config(maximum=len(self.files), value=0)
+        self.poll()
+
+    def cancel(self):
+        """Drop the files still queued; running ones finish"""
+        if self.scheduler is not None:
+            for job in self.jobs.values():
+                self.scheduler.cancel(job.id)
+
+    def poll(self):
+        now = time.time()
+        for path, job in self.jobs.items():
+            if job.status == "running":
+                elapsed = now - job.started_at
+            elif job.finished and job.started_at is not None:
+                elapsed = job.finished_at - job.started_at
+            else:
+                elapsed = None
+            output = os.path.basename(job.result_path) if job.result_path else (job.error or "")
+            self.tree.item(path, values=(
+                job.status, "" if elapsed is None else f"{elapsed:.1f}s", output
+            ))
+
+        finished = sum(job.finished for job in self.jobs.values())
+        self.progress['value'] = finished + len(self.files) - len(self.jobs)
+        if finished < len(self.jobs):
+            running = sum(job.status == "running" for job in self.jobs.values())
+            self.summary.set(f"{finished}/{len(self.jobs)} finished, {running} running")
+            self.root.after(BATCH_POLL_MS, self.poll)
+            return
+
+        self.scheduler.shutdown(wait=False)
+        self.scheduler = None
+        self.summary.set(self.throughput_summary())
+        print(f"Batch: {self.summary.get()}")
+
+    def throughput_summary(self):
+        done = [job for job in self.jobs.values() if job.status == "done"]
+        failed = len(self.files) - len(done)
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        input_mb = sum(self.input_sizes[job.input_path] for job in done) / (1024 * 1024)
+        return (
+            f"{len(done)}/{len(self.files)} done, {failed} failed or cancelled in {elapsed:.1f}s: "
+            f"{len(done) / elapsed * 60:.1f} files/min, {input_mb / elapsed:.2f} MB/s of input"
+        )
 
 
 class VideoEditorGUI:
@@ -38,6 +205,11 @@ class VideoEditorGUI:
         self.tab_bar = tk.Frame(self.main_container, bg='#f0f0f0', height=50)
         self.tab_bar.pack(fill='x', side='top')
 
+        # Non-destructive mode renders into the cache instead of overwriting the input
+        self.keep_original_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.tab_bar, text="Keep original (render to cache)",
+                       variable=self.keep_original_var, bg='#f0f0f0').pack(side='right', padx=10)
+
         # Content frame
         self.content_frame = tk.Frame(self.main_container, bg='white')
         self.content_frame.pack(fill='both', expand=True, side='top')
@@ -46,17 +218,47 @@ class VideoEditorGUI:
         self.tab_buttons = []
         self.current_tab_index = 0
 
+        # Frames are decoded off the Tk thread and delivered back via root.after.
+        # Created on first use, see the preview_service property.
+        self._preview_service = None
+
         self.create_format_conversion_tab()
         self.create_crop_tab()
         self.create_trim_tab()
         self.create_speed_tab()
         self.create_blur_tab()
         self.create_resize_tab()
+        self.create_color_tab()
+        self.create_watermark_tab()
         self.create_audio_tab()
+        self.create_timeline_tab()
 
         # Show first tab by default
         self.show_tab(0)
 
+        # Runs once the mainloop has drawn the window
+        self.root.after(100, self.warm_backends)
+
+    @property
+    def preview_service(self):
+        if self._preview_service is None:
+            from preview import PreviewService
+
+            self._preview_service = PreviewService(self.root)
+        return self._preview_service
+
+    def warm_backends(self):
+        """
+        Import the video backends on a background thread once the window is
+        showing, so the first preview or operation doesn't stall on them
+        """
+        def import_backends():
+            import moviepy  # noqa: F401
+            import preview  # noqa: F401
+            import transforms  # noqa: F401
+
+        threading.Thread(target=import_backends, daemon=True).start()
+
     def darken_color(self, hex_color, factor=0.15):
         """Darken a hex color by a given factor (0-1)"""
         # Remove the '#' if present
@@ -117,6 +319,68 @@ class VideoEditorGUI:
         self.tabs[index].pack(fill='both', expand=True)
         self.current_tab_index = index
 
+    def with_watermark(self, name, params):
+        """params plus the watermark tab's overlay when exports are set to carry it"""
+        if name in WATERMARKED_OPERATIONS and self.watermark_exports_var.get():
+            overlays = self.get_watermark_edits(captions=False)
+            if overlays:
+                return dict(params, overlays=overlays)
+        return params
+
+    def apply_operation(self, name, input_path, **params):
+        """Run a main.OPERATIONS entry, honouring the keep-original and watermark toggles"""
+        params = self.with_watermark(name, params)
+        # Incremental renders write a file of their own and never touch the input
+        if self.keep_original_var.get() and not params.get("incremental"):
+            return render_non_destructive(input_path, [(name, params)])
+        return run_operation(name, input_path, **params)
+
+    def operation_task(self, name, **params):
+        """A BatchPanel task running one main.OPERATIONS entry, honouring the keep-original and watermark toggles"""
+        params = self.with_watermark(name, params)
+        keep_original = self.keep_original_var.get() and not params.get("incremental")
+
+        def task(input_path):
+            if keep_original:
+                return render_non_destructive(input_path, [(name, params)])
+            return run_operation(name, input_path, **params)
+
+        return (name, params), task
+
+    def create_time_range_frame(self, parent, allow_stream_copy=True):
+        """Optional start/end inputs for applying an effect to part of a video"""
+        frame = ttk.LabelFrame(parent, text="Time Range (leave blank for whole video)")
+
+        ttk.Label(frame, text="Start (seconds):").grid(row=0, column=0, padx=10, pady=5, sticky='w')
+        start_var = tk.StringVar()
+        ttk.Entry(frame, textvariable=start_var, width=10).grid(row=0, column=1, padx=10, pady=5)
+
+        ttk.Label(frame, text="End (seconds):").grid(row=0, column=2, padx=10, pady=5, sticky='w')
+        end_var = tk.StringVar()
+        ttk.Entry(frame, textvariable=end_var, width=10).grid(row=0, column=3, padx=10, pady=5)
+
+        stream_copy_var = tk.BooleanVar(value=False)
+        if allow_stream_copy:
+            ttk.Checkbutton(frame, text="Stream copy outside range (no re-encode)",
+                            variable=stream_copy_var).grid(row=1, column=0, columnspan=4, padx=10, pady=5, sticky='w')
+
+        return frame, start_var, end_var, stream_copy_var
+
+    def get_time_range_params(self, start_var, end_var, stream_copy_var=None):
+        """Operation params for a time range frame; raises ValueError on bad input"""
+        params = {}
+        for key, var in (("start", start_var), ("end", end_var)):
+            text = var.get().strip()
+            if text:
+                params[key] = float(text)
+
+        if "start" in params and "end" in params and params["start"] >= params["end"]:
+            raise ValueError("Start time must be less than end time")
+
+        if params and stream_copy_var is not None and stream_copy_var.get():
+            params["stream_copy"] = True
+        return params
+
     def create_format_conversion_tab(self):
         tab = tk.Frame(self.content_frame, bg='white')
         self.add_tab(tab, "Format Conversion")
@@ -148,13 +412,36 @@ class VideoEditorGUI:
         self.mp4_crf_var = tk.IntVar(value=20)
         self.mp4_preset_var = tk.StringVar(value="medium")
 
-        ttk.Button(tab, text="Convert", command=self.convert_format).grid(row=3, column=0, columnspan=3, pady=20)
+        # Size-limited two-pass encoding or a searched CRF instead of the
+        # CRF slider (MP4 and WEBM)
+        size_frame = ttk.LabelFrame(tab, text="Rate Control")
+        size_frame.grid(row=3, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+
+        self.target_size_enabled_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(size_frame, text="Fit output in (MB):",
+                       variable=self.target_size_enabled_var).grid(row=0, column=0, padx=10, pady=5, sticky='w')
+        self.target_size_mb_var = tk.DoubleVar(value=25.0)
+        ttk.Entry(size_frame, textvariable=self.target_size_mb_var, width=10).grid(row=0, column=1, padx=10, pady=5, sticky='w')
+        ttk.Label(size_frame, text="Two-pass encode; replaces the CRF setting").grid(row=0, column=2, padx=10, pady=5, sticky='w')
+
+        self.auto_quality_enabled_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(size_frame, text="Auto quality, target SSIM:",
+                       variable=self.auto_quality_enabled_var).grid(row=1, column=0, padx=10, pady=5, sticky='w')
+        self.auto_quality_ssim_var = tk.DoubleVar(value=0.98)
+        ttk.Entry(size_frame, textvariable=self.auto_quality_ssim_var, width=10).grid(row=1, column=1, padx=10, pady=5, sticky='w')
+        ttk.Label(size_frame, text="Picks the highest CRF meeting the target from sampled segments").grid(
+            row=1, column=2, padx=10, pady=5, sticky='w')
+
+        ttk.Button(tab, text="Convert", command=self.convert_format).grid(row=4, column=0, columnspan=3, pady=20)
 
         self.format_progress = ttk.Progressbar(tab, mode='indeterminate')
-        self.format_progress.grid(row=4, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+        self.format_progress.grid(row=5, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
 
         self.format_status = tk.StringVar(value="Ready")
-        ttk.Label(tab, textvariable=self.format_status).grid(row=5, column=0, columnspan=3, pady=5)
+        ttk.Label(tab, textvariable=self.format_status).grid(row=6, column=0, columnspan=3, pady=5)
+
+        self.format_batch = BatchPanel(self.root, tab, self.format_batch_task)
+        self.format_batch.frame.grid(row=7, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
 
     def on_format_change(self, event=None):
         for widget in self.format_options_frame.winfo_children():
@@ -193,30 +480,92 @@ class VideoEditorGUI:
         if filename:
             self.format_input_path.set(filename)
 
+    def get_format_settings(self):
+        """Format tab settings for convert_file; raises ValueError on bad input"""
+        settings = {
+            "format": self.format_output_type.get(),
+            "webm_crf": self.webm_crf_var.get(),
+            "use_opus": self.use_opus_var.get(),
+            "mp4_crf": self.mp4_crf_var.get(),
+            "preset": self.mp4_preset_var.get(),
+            "target_mb": None,
+            "target_ssim": None,
+        }
+
+        if self.target_size_enabled_var.get():
+            if settings["format"] not in ("WEBM", "MP4"):
+                raise ValueError("A size limit only applies to WEBM and MP4 output")
+            try:
+                settings["target_mb"] = self.target_size_mb_var.get()
+            except tk.TclError:
+                settings["target_mb"] = 0
+            if settings["target_mb"] <= 0:
+                raise ValueError("Size limit must be a positive number of MB")
+
+        elif self.auto_quality_enabled_var.get():
+            if settings["format"] not in ("WEBM", "MP4"):
+                raise ValueError("Auto quality only applies to WEBM and MP4 output")
+            try:
+                settings["target_ssim"] = self.auto_quality_ssim_var.get()
+            except tk.TclError:
+                settings["target_ssim"] = 0
+            if not 0 < settings["target_ssim"] < 1:
+                raise ValueError("Target SSIM must be between 0 and 1")
+        return settings
+
+    def convert_file(self, input_path, settings, on_status=None):
+        """Convert one file with get_format_settings() settings; returns the output path"""
+        on_status = on_status or (lambda message: None)
+        format_type = settings["format"]
+        target_mb = settings["target_mb"]
+        target_ssim = settings["target_ssim"]
+
+        if target_mb is not None:
+            on_status(f"Two-pass encoding to fit {target_mb:g} MB...")
+            return convert_to_target_size(input_path, target_mb, format_type.lower(), preset=settings["preset"])
+
+        if format_type == "WEBM":
+            crf = settings["webm_crf"]
+            if target_ssim is not None:
+                on_status(f"Searching for a CRF meeting SSIM {target_ssim}...")
+                crf = find_conversion_crf(input_path, "webm", target_ssim)
+                on_status(f"Converting at CRF {crf}...")
+            return mp4_to_webm(input_path, crf=crf, use_opus=settings["use_opus"])
+        if format_type == "MP4":
+            crf = settings["mp4_crf"]
+            if target_ssim is not None:
+                on_status(f"Searching for a CRF meeting SSIM {target_ssim}...")
+                crf = find_conversion_crf(input_path, "mp4", target_ssim, settings["preset"])
+                on_status(f"Converting at CRF {crf}...")
+            if input_path.lower().endswith('.mkv'):
+                return mkv_to_mp4(input_path, crf=crf, preset=settings["preset"])
+            return webm_to_mp4(input_path, crf=crf, preset=settings["preset"])
+        if format_type == "GIF":
+            return convert_mp4_to_gif(input_path)
+        return mp4_to_mp3(input_path)
+
+    def format_batch_task(self):
+        settings = self.get_format_settings()
+        return ("convert", {"format": settings["format"]}), lambda path: self.convert_file(path, settings)
+
     def convert_format(self):
         input_path = self.format_input_path.get()
         if not input_path or not os.path.exists(input_path):
             messagebox.showerror("Error", "Please select a valid input video")
             return
 
+        try:
+            settings = self.get_format_settings()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
         def convert_thread():
             try:
                 self.format_progress.start()
                 self.format_status.set("Converting...")
 
-                format_type = self.format_output_type.get()
-
-                if format_type == "WEBM":
-                    output = mp4_to_webm(input_path, crf=self.webm_crf_var.get(), use_opus=self.use_opus_var.get())
-                elif format_type == "MP4":
-                    if input_path.lower().endswith('.mkv'):
-                        output = mkv_to_mp4(input_path, crf=self.mp4_crf_var.get(), preset=self.mp4_preset_var.get())
-                    else:
-                        output = webm_to_mp4(input_path, crf=self.mp4_crf_var.get(), preset=self.mp4_preset_var.get())
-                elif format_type == "GIF":
-                    output = convert_mp4_to_gif(input_path)
-                elif format_type == "MP3":
-                    output = mp4_to_mp3(input_path)
+                output = self.convert_file(input_path, settings, self.format_status.set)
 
                 self.format_progress.stop()
                 self.format_status.set(f"Done! Saved to: {os.path.basename(output)}")
@@ -263,13 +612,36 @@ class VideoEditorGUI:
         self.crop_coords = tk.StringVar(value="Not selected")
         ttk.Label(coords_frame, textvariable=self.crop_coords).pack(side='left', padx=5)
 
-        ttk.Button(tab, text="Crop Video", command=self.crop_video_action).grid(row=4, column=0, columnspan=3, pady=10)
+        options_frame = ttk.Frame(tab)
+        options_frame.grid(row=4, column=0, columnspan=3, padx=10, pady=5)
+
+        range_frame, self.crop_start_var, self.crop_end_var, self.crop_stream_copy_var = \
+            self.create_time_range_frame(options_frame)
+        range_frame.pack(side='left', padx=5, fill='y')
+
+        # Stabilising warps and crops in one pass; the region is optional then
+        stabilize_frame = ttk.LabelFrame(options_frame, text="Stabilize (whole video)")
+        stabilize_frame.pack(side='left', padx=5, fill='y')
+        self.crop_stabilize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(stabilize_frame, text="Stabilize", variable=self.crop_stabilize_var).grid(
+            row=0, column=0, columnspan=2, padx=10, pady=5, sticky='w')
+        ttk.Label(stabilize_frame, text="Smoothing (frames):").grid(row=1, column=0, padx=10, pady=2, sticky='w')
+        self.crop_smoothing_var = tk.IntVar(value=30)
+        ttk.Entry(stabilize_frame, textvariable=self.crop_smoothing_var, width=6).grid(row=1, column=1, padx=10, pady=2)
+        ttk.Label(stabilize_frame, text="Border margin (%):").grid(row=2, column=0, padx=10, pady=2, sticky='w')
+        self.crop_margin_var = tk.DoubleVar(value=5.0)
+        ttk.Entry(stabilize_frame, textvariable=self.crop_margin_var, width=6).grid(row=2, column=1, padx=10, pady=2)
+
+        ttk.Button(tab, text="Crop Video", command=self.crop_video_action).grid(row=5, column=0, columnspan=3, pady=10)
 
         self.crop_progress = ttk.Progressbar(tab, mode='indeterminate')
-        self.crop_progress.grid(row=5, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+        self.crop_progress.grid(row=6, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
 
         self.crop_status = tk.StringVar(value="Ready")
-        ttk.Label(tab, textvariable=self.crop_status).grid(row=6, column=0, columnspan=3, pady=5)
+        ttk.Label(tab, textvariable=self.crop_status).grid(row=7, column=0, columnspan=3, pady=5)
+
+        self.crop_batch = BatchPanel(self.root, tab, self.crop_batch_task)
+        self.crop_batch.frame.grid(row=8, column=0, columnspan=3, padx=10, pady=5, sticky='ew')
 
     def browse_crop_input(self):
         filename = filedialog.askopenfilename(
@@ -285,32 +657,16 @@ class VideoEditorGUI:
             messagebox.showerror("Error", "Please select a valid input video")
             return
 
-        cap = cv2.VideoCapture(input_path)
-        ret, frame = cap.read()
-        cap.release()
-
-        if not ret:
-            messagebox.showerror("Error", "Could not read video frame")
-            return
-
-        self.crop_original_frame = frame
-        original_height, original_width = frame.shape[:2]
-
-        max_width = 640
-        max_height = 360
-
-        width_scale = max_width / original_width
-        height_scale = max_height / original_height
-        self.crop_scale_factor = min(width_scale, height_scale, 1.0)
-
-        if self.crop_scale_factor < 1.0:
-            display_width = int(original_width * self.crop_scale_factor)
-            display_height = int(original_height * self.crop_scale_factor)
-            frame = cv2.resize(frame, (display_width, display_height))
+        self.crop_status.set("Loading preview...")
+        self.preview_service.request(
+            "crop", input_path, self.show_crop_preview,
+            on_error=lambda error: messagebox.showerror("Error", error)
+        )
 
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        self.crop_image = Image.fromarray(frame_rgb)
-        self.crop_photo = ImageTk.PhotoImage(self.crop_image)
+    def show_crop_preview(self, photo, image, scale):
+        self.crop_scale_factor = scale
+        self.crop_image = image
+        self.crop_photo = photo
 
         self.crop_canvas.config(width=self.crop_image.width, height=self.crop_image.height)
         self.crop_canvas.create_image(0, 0, anchor='nw', image=self.crop_photo)
@@ -348,19 +704,47 @@ class VideoEditorGUI:
         self.crop_box = (orig_x1, orig_y1, orig_x2, orig_y2)
         self.crop_coords.set(f"({orig_x1}, {orig_y1}, {orig_x2}, {orig_y2})")
 
-    def crop_video_action(self):
-        if not hasattr(self, 'crop_box'):
-            messagebox.showerror("Error", "Please select a crop region first")
-            return
+    def get_crop_operation(self):
+        """(operation, params) for the crop tab's settings; raises ValueError on bad input"""
+        range_params = self.get_time_range_params(
+            self.crop_start_var, self.crop_end_var, self.crop_stream_copy_var)
+        box = getattr(self, 'crop_box', None)
+
+        if self.crop_stabilize_var.get():
+            if range_params:
+                raise ValueError("Stabilization applies to the whole video, clear the time range")
+            try:
+                smoothing = self.crop_smoothing_var.get()
+                margin = self.crop_margin_var.get() / 100
+            except tk.TclError:
+                raise ValueError("Smoothing and margin must be numbers")
+            if smoothing < 0 or not 0 <= margin < 0.5:
+                raise ValueError("Smoothing must be positive and the margin below 50%")
+            return "stabilize", {"smoothing": smoothing, "margin": margin, "box": box}
+
+        if box is None:
+            raise ValueError("Please select a crop region first")
+        return "crop", dict(box=box, **range_params)
+
+    def crop_batch_task(self):
+        name, params = self.get_crop_operation()
+        return self.operation_task(name, **params)
 
+    def crop_video_action(self):
         input_path = self.crop_input_path.get()
 
+        try:
+            operation, params = self.get_crop_operation()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
         def crop_thread():
             try:
                 self.crop_progress.start()
-                self.crop_status.set("Cropping video...")
+                self.crop_status.set("Stabilizing video..." if operation == "stabilize" else "Cropping video...")
 
-                output = crop_video(input_path, self.crop_box)
+                output = self.apply_operation(operation, input_path, **params)
 
                 self.crop_progress.stop()
                 self.crop_status.set(f"Done! Saved to: {os.path.basename(output)}")
@@ -416,12 +800,38 @@ class VideoEditorGUI:
 
         ttk.Button(left_frame, text="Trim Video", command=self.trim_video_action).pack(fill='x', pady=10)
 
+        silence_frame = ttk.LabelFrame(left_frame, text="Remove Silence")
+        silence_frame.pack(fill='x', pady=5)
+
+        ttk.Label(silence_frame, text="Threshold (dB):").grid(row=0, column=0, padx=10, pady=5, sticky='w')
+        self.silence_threshold_var = tk.DoubleVar(value=-40.0)
+        ttk.Entry(silence_frame, textvariable=self.silence_threshold_var, width=8).grid(row=0, column=1, padx=10, pady=5)
+
+        ttk.Label(silence_frame, text="Min silence (seconds):").grid(row=1, column=0, padx=10, pady=5, sticky='w')
+        self.silence_min_var = tk.DoubleVar(value=0.5)
+        ttk.Entry(silence_frame, textvariable=self.silence_min_var, width=8).grid(row=1, column=1, padx=10, pady=5)
+
+        ttk.Label(silence_frame, text="Padding (seconds):").grid(row=2, column=0, padx=10, pady=5, sticky='w')
+        self.silence_padding_var = tk.DoubleVar(value=0.1)
+        ttk.Entry(silence_frame, textvariable=self.silence_padding_var, width=8).grid(row=2, column=1, padx=10, pady=5)
+
+        ttk.Button(silence_frame, text="Detect Silence", command=self.detect_silence_action).grid(
+            row=3, column=0, padx=10, pady=5, sticky='ew')
+        ttk.Button(silence_frame, text="Remove Silence", command=self.remove_silence_action).grid(
+            row=3, column=1, padx=10, pady=5, sticky='ew')
+
+        # Keep-list from the last detection, previewed on the waveform
+        self.trim_keep_segments = None
+
         self.trim_progress = ttk.Progressbar(left_frame, mode='indeterminate')
         self.trim_progress.pack(fill='x', pady=5)
 
         self.trim_status = tk.StringVar(value="Ready")
         ttk.Label(left_frame, textvariable=self.trim_status).pack(pady=5)
 
+        self.trim_batch = BatchPanel(self.root, left_frame, self.trim_batch_task)
+        self.trim_batch.frame.pack(fill='x', pady=5)
+
         # Right side - preview
         preview_frame = ttk.LabelFrame(content_frame, text="Video Scrubber Preview")
         preview_frame.pack(side='right', fill='both', expand=True)
@@ -440,6 +850,35 @@ class VideoEditorGUI:
                                         orient='horizontal', command=self.on_scrubber_change)
         self.scrubber_scale.pack(fill='x', pady=5)
 
+        # Waveform under the scrubber, drawn from peaks computed in the background
+        waveform_frame = ttk.Frame(preview_frame)
+        waveform_frame.pack(fill='x', padx=10, pady=(0, 10))
+
+        self.waveform_canvas = tk.Canvas(waveform_frame, height=90, bg='#1e1e1e', highlightthickness=0)
+        self.waveform_canvas.pack(fill='x')
+        self.waveform_canvas.bind('<Configure>', lambda event: self.draw_waveform())
+        self.waveform_canvas.bind('<Button-1>', self.on_waveform_click)
+        self.waveform_canvas.bind('<MouseWheel>', lambda event: self.zoom_waveform(2 if event.delta > 0 else 0.5))
+        self.waveform_canvas.bind('<Button-4>', lambda event: self.zoom_waveform(2))
+        self.waveform_canvas.bind('<Button-5>', lambda event: self.zoom_waveform(0.5))
+
+        waveform_buttons = ttk.Frame(waveform_frame)
+        waveform_buttons.pack(fill='x', pady=(5, 0))
+        ttk.Button(waveform_buttons, text="Zoom In", command=lambda: self.zoom_waveform(2)).pack(side='left', padx=2)
+        ttk.Button(waveform_buttons, text="Zoom Out", command=lambda: self.zoom_waveform(0.5)).pack(side='left', padx=2)
+        ttk.Button(waveform_buttons, text="Fit", command=self.fit_waveform).pack(side='left', padx=2)
+        ttk.Button(waveform_buttons, text="Set End Here",
+                   command=lambda: self.trim_end_var.set(round(self.scrubber_var.get(), 2))).pack(side='right', padx=2)
+        ttk.Button(waveform_buttons, text="Set Start Here",
+                   command=lambda: self.trim_start_var.set(round(self.scrubber_var.get(), 2))).pack(side='right', padx=2)
+
+        self.trim_peaks = None
+        self.trim_waveform_path = None
+        self.waveform_message = "Load a video to see its waveform"
+        self.waveform_view = (0.0, 0.0)
+        self.trim_start_var.trace_add('write', lambda *args: self.draw_waveform())
+        self.trim_end_var.trace_add('write', lambda *args: self.draw_waveform())
+
     def browse_trim_input(self):
         filename = filedialog.askopenfilename(
             title="Select Video File",
@@ -460,43 +899,144 @@ class VideoEditorGUI:
             self.trim_duration_var.set(f"Duration: {duration:.2f} seconds ({self.format_time(duration)})")
             self.trim_end_var.set(duration)
 
-            self.trim_video_cap = cv2.VideoCapture(input_path)
+            # The scrubber keeps one capture open in the preview service
+            self.release_trim_capture()
+            self.trim_preview_path = input_path
             self.scrubber_scale.config(to=duration)
             self.scrubber_var.set(0)
             self.on_scrubber_change(0)
+            self.trim_keep_segments = None
+            self.load_trim_waveform(input_path, duration)
 
         except Exception as e:
             messagebox.showerror("Error", f"Could not load video info: {str(e)}")
 
+    def release_trim_capture(self):
+        """Release the scrubber's capture so nothing holds the trim input open"""
+        if getattr(self, 'trim_preview_path', None) is not None:
+            self.preview_service.release(self.trim_preview_path)
+            self.trim_preview_path = None
+
     def on_scrubber_change(self, value):
-        if not hasattr(self, 'trim_video_cap') or self.trim_video_cap is None:
+        if getattr(self, 'trim_preview_path', None) is None:
             return
 
-        try:
-            timestamp = float(value)
-            self.scrubber_time_label.set(f"{timestamp:.2f}s")
+        timestamp = float(value)
+        self.scrubber_time_label.set(f"{timestamp:.2f}s")
 
-            self.trim_video_cap.set(cv2.CAP_PROP_POS_MSEC, timestamp * 1000)
-            ret, frame = self.trim_video_cap.read()
+        self.preview_service.request(
+            "trim", self.trim_preview_path, self.show_trim_preview,
+            timestamp=timestamp, allow_upscale=True, keep_open=True,
+            on_error=lambda error: print(f"Error updating preview: {error}")
+        )
+        self.draw_waveform_cursor()
 
-            if ret:
-                max_width = 640
-                max_height = 360
+    def show_trim_preview(self, photo, image, scale):
+        self.trim_preview_label.config(image=photo, width=image.width, height=image.height)
+        self.trim_preview_label.image = photo
 
-                h, w = frame.shape[:2]
-                scale = min(max_width / w, max_height / h)
-                new_w = int(w * scale)
-                new_h = int(h * scale)
+    def load_trim_waveform(self, input_path, duration):
+        """Compute (or read the cached) waveform peaks off the Tk thread"""
+        self.trim_peaks = None
+        self.trim_waveform_path = input_path
+        self.waveform_view = (0.0, duration)
+        self.waveform_message = "Loading waveform..."
+        self.draw_waveform()
 
-                frame = cv2.resize(frame, (new_w, new_h))
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                img = Image.fromarray(frame_rgb)
-                photo = ImageTk.PhotoImage(img)
+        def peaks_thread():
+            from audio_analysis import get_peaks
 
-                self.trim_preview_label.config(image=photo, width=new_w, height=new_h)
-                self.trim_preview_label.image = photo
-        except Exception as e:
-            print(f"Error updating preview: {e}")
+            try:
+                peaks = get_peaks(input_path)
+                error = None if peaks is not None else "No audio track"
+            except Exception as e:
+                peaks, error = None, f"Could not load waveform: {e}"
+            self.root.after(0, self.show_trim_waveform, input_path, peaks, error)
+
+        threading.Thread(target=peaks_thread, daemon=True).start()
+
+    def show_trim_waveform(self, input_path, peaks, error):
+        # Another file may have been loaded while the peaks were computed
+        if input_path != self.trim_waveform_path:
+            return
+        self.trim_peaks = peaks
+        self.waveform_message = error
+        self.draw_waveform()
+
+    def waveform_x(self, timestamp, width):
+        view_start, view_end = self.waveform_view
+        return (timestamp - view_start) / max(view_end - view_start, 1e-6) * width
+
+    def draw_waveform(self):
+        canvas = self.waveform_canvas
+        canvas.delete('all')
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if self.trim_peaks is None or width < 2:
+            canvas.create_text(width // 2, height // 2, text=self.waveform_message or "", fill='#888888')
+            return
+
+        # Selected trim range
+        try:
+            start, end = self.trim_start_var.get(), self.trim_end_var.get()
+        except tk.TclError:
+            start = end = 0
+        if end > start:
+            canvas.create_rectangle(
+                self.waveform_x(start, width), 0, self.waveform_x(end, width), height,
+                fill='#2d4a6b', outline=''
+            )
+
+        # Parts a silence cut would remove
+        if self.trim_keep_segments is not None:
+            position = 0.0
+            for keep_start, keep_end in self.trim_keep_segments + [(self.trim_peaks.duration, None)]:
+                if keep_start > position:
+                    canvas.create_rectangle(
+                        self.waveform_x(position, width), 0, self.waveform_x(keep_start, width), height,
+                        fill='#5a2a2a', outline=''
+                    )
+                position = keep_end if keep_end is not None else position
+
+        # One polygon: the max envelope left to right, the min envelope back
+        mins, maxs = self.trim_peaks.columns(*self.waveform_view, width)
+        middle = height / 2
+        top = [coord for x, value in enumerate(maxs) for coord in (x, middle - value * middle)]
+        bottom = [coord for x, value in reversed(list(enumerate(mins))) for coord in (x, middle - value * middle + 1)]
+        canvas.create_polygon(top + bottom, fill='#4fc3f7', outline='')
+        self.draw_waveform_cursor()
+
+    def draw_waveform_cursor(self):
+        canvas = self.waveform_canvas
+        canvas.delete('cursor')
+        if self.trim_peaks is None:
+            return
+        x = self.waveform_x(self.scrubber_var.get(), canvas.winfo_width())
+        canvas.create_line(x, 0, x, canvas.winfo_height(), fill='#ff5252', tags='cursor')
+
+    def on_waveform_click(self, event):
+        if self.trim_peaks is None:
+            return
+        view_start, view_end = self.waveform_view
+        timestamp = view_start + event.x / max(1, self.waveform_canvas.winfo_width()) * (view_end - view_start)
+        timestamp = min(max(timestamp, 0.0), float(self.scrubber_scale.cget('to')))
+        self.scrubber_var.set(timestamp)
+        self.on_scrubber_change(timestamp)
+
+    def zoom_waveform(self, factor):
+        """Zoom the waveform around the scrubber position; redraws from the cached peaks"""
+        if self.trim_peaks is None:
+            return
+        duration = float(self.scrubber_scale.cget('to')) or self.trim_peaks.duration
+        view_start, view_end = self.waveform_view
+        span = min(max((view_end - view_start) / factor, 0.5), duration)
+        center = self.scrubber_var.get()
+        view_start = min(max(center - span / 2, 0.0), duration - span)
+        self.waveform_view = (view_start, view_start + span)
+        self.draw_waveform()
+
+    def fit_waveform(self):
+        self.waveform_view = (0.0, float(self.scrubber_scale.cget('to')))
+        self.draw_waveform()
 
     def format_time(self, seconds):
         minutes = int(seconds // 60)
@@ -512,6 +1052,17 @@ class VideoEditorGUI:
         except:
             pass
 
+    def trim_batch_task(self):
+        try:
+            start_time = self.trim_start_var.get()
+            end_time = self.trim_end_var.get()
+        except tk.TclError:
+            raise ValueError("Start and end times must be numbers")
+        if start_time >= end_time:
+            raise ValueError("Start time must be less than end time")
+        self.release_trim_capture()
+        return self.operation_task("trim", start_time=start_time, end_time=end_time)
+
     def trim_video_action(self):
         input_path = self.trim_input_path.get()
         if not input_path or not os.path.exists(input_path):
@@ -526,21 +1077,14 @@ class VideoEditorGUI:
             return
 
         # Release the video capture before processing
-        if hasattr(self, 'trim_video_cap') and self.trim_video_cap is not None:
-            self.trim_video_cap.release()
-            self.trim_video_cap = None
+        self.release_trim_capture()
 
         def trim_thread():
             try:
-                # Force garbage collection and wait to ensure file handles are released
-                import gc
-                gc.collect()
-                time.sleep(1.0)
-
                 self.trim_progress.start()
                 self.trim_status.set("Trimming video...")
 
-                output = get_subclip(input_path, start_time, end_time)
+                output = self.apply_operation("trim", input_path, start_time=start_time, end_time=end_time)
 
                 self.trim_progress.stop()
                 self.trim_status.set(f"Done! Saved to: {os.path.basename(output)}")
@@ -552,6 +1096,89 @@ class VideoEditorGUI:
 
         threading.Thread(target=trim_thread, daemon=True).start()
 
+    def get_silence_params(self):
+        return {
+            "threshold_db": self.silence_threshold_var.get(),
+            "min_silence": self.silence_min_var.get(),
+            "padding": self.silence_padding_var.get(),
+        }
+
+    def detect_silence_action(self):
+        input_path = self.trim_input_path.get()
+        if not input_path or not os.path.exists(input_path):
+            messagebox.showerror("Error", "Please select a valid input video")
+            return
+        try:
+            params = self.get_silence_params()
+        except tk.TclError:
+            messagebox.showerror("Error", "Silence settings must be numbers")
+            return
+
+        if getattr(self, 'trim_waveform_path', None) != input_path:
+            self.load_trim_info()
+
+        def detect_thread():
+            from audio_analysis import detect_silence, keep_segments
+
+            try:
+                self.trim_progress.start()
+                self.trim_status.set("Detecting silence...")
+                silences = detect_silence(
+                    input_path, params["threshold_db"], params["min_silence"], padding=params["padding"]
+                )
+                segments = keep_segments(get_video_duration(input_path), silences)
+                self.root.after(0, self.show_silence_preview, input_path, params, segments, silences)
+            except Exception as e:
+                self.trim_progress.stop()
+                self.trim_status.set("Error occurred")
+                messagebox.showerror("Error", f"Silence detection failed: {str(e)}")
+
+        threading.Thread(target=detect_thread, daemon=True).start()
+
+    def show_silence_preview(self, input_path, params, segments, silences):
+        self.trim_progress.stop()
+        if input_path != self.trim_input_path.get():
+            return
+        self.trim_keep_segments = segments
+        self.trim_keep_params = (input_path, params)
+        removed = sum(end - start for start, end in silences)
+        self.trim_status.set(f"{len(silences)} silences, {removed:.1f}s would be cut (shaded red)")
+        self.draw_waveform()
+
+    def remove_silence_action(self):
+        input_path = self.trim_input_path.get()
+        if not input_path or not os.path.exists(input_path):
+            messagebox.showerror("Error", "Please select a valid input video")
+            return
+        try:
+            params = self.get_silence_params()
+        except tk.TclError:
+            messagebox.showerror("Error", "Silence settings must be numbers")
+            return
+
+        # Render exactly the previewed keep-list when the settings still match
+        if self.trim_keep_segments is not None and getattr(self, 'trim_keep_params', None) == (input_path, params):
+            params["segments"] = [list(segment) for segment in self.trim_keep_segments]
+
+        self.release_trim_capture()
+
+        def remove_thread():
+            try:
+                self.trim_progress.start()
+                self.trim_status.set("Removing silence...")
+
+                output = self.apply_operation("silence", input_path, **params)
+
+                self.trim_progress.stop()
+                self.trim_status.set(f"Done! Saved to: {os.path.basename(output)}")
+                messagebox.showinfo("Success", f"Silence removed!\n{output}")
+            except Exception as e:
+                self.trim_progress.stop()
+                self.trim_status.set("Error occurred")
+                messagebox.showerror("Error", f"Silence removal failed: {str(e)}")
+
+        threading.Thread(target=remove_thread, daemon=True).start()
+
     def create_speed_tab(self):
         tab = tk.Frame(self.content_frame, bg='white')
         self.add_tab(tab, "Speed Adjustment")
@@ -586,13 +1213,49 @@ class VideoEditorGUI:
             ttk.Button(presets_frame, text=f"{preset}x",
                       command=lambda p=preset: self.speed_factor_var.set(p)).pack(side='left', padx=2)
 
-        ttk.Button(tab, text="Apply Speed Change", command=self.speed_video_action).grid(row=2, column=0, columnspan=3, pady=20)
+        range_frame, self.speed_start_var, self.speed_end_var, _ = \
+            self.create_time_range_frame(tab, allow_stream_copy=False)
+        range_frame.grid(row=2, column=0, columnspan=3, padx=10, pady=5, sticky='ew')
+
+        ttk.Button(tab, text="Apply Speed Change", command=self.speed_video_action).grid(row=3, column=0, columnspan=3, pady=20)
+
+        # Frame rate conversion keeps the playback speed and duration
+        fps_frame = ttk.LabelFrame(tab, text="Frame Rate Conversion")
+        fps_frame.grid(row=4, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+
+        ttk.Label(fps_frame, text="Target FPS:").grid(row=0, column=0, padx=10, pady=5, sticky='w')
+        self.fps_target_var = tk.StringVar(value="30")
+        ttk.Combobox(fps_frame, textvariable=self.fps_target_var, width=12,
+                     values=["23.976", "24", "25", "29.97", "30", "50", "59.94", "60"]).grid(
+            row=0, column=1, padx=10, pady=5, sticky='w')
+
+        ttk.Label(fps_frame, text="Method:").grid(row=1, column=0, padx=10, pady=5, sticky='w')
+        self.fps_mode_var = tk.StringVar(value="nearest")
+        modes_frame = ttk.Frame(fps_frame)
+        modes_frame.grid(row=1, column=1, columnspan=2, padx=10, pady=5, sticky='w')
+        for text, value in [("Drop/duplicate", "nearest"), ("Blend", "blend"), ("Motion interpolate (slow)", "motion")]:
+            ttk.Radiobutton(modes_frame, text=text, value=value, variable=self.fps_mode_var).pack(side='left', padx=5)
+
+        ttk.Button(fps_frame, text="Convert Frame Rate", command=self.fps_video_action).grid(
+            row=2, column=0, columnspan=3, pady=10)
 
         self.speed_progress = ttk.Progressbar(tab, mode='indeterminate')
-        self.speed_progress.grid(row=3, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+        self.speed_progress.grid(row=5, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
 
         self.speed_status = tk.StringVar(value="Ready")
-        ttk.Label(tab, textvariable=self.speed_status).grid(row=4, column=0, columnspan=3, pady=5)
+        ttk.Label(tab, textvariable=self.speed_status).grid(row=6, column=0, columnspan=3, pady=5)
+
+        batch_action_frame = ttk.Frame(tab)
+        batch_action_frame.grid(row=7, column=0, columnspan=3, padx=10, pady=(10, 0), sticky='w')
+        ttk.Label(batch_action_frame, text="Batch operation:").pack(side='left', padx=5)
+        self.speed_batch_action_var = tk.StringVar(value="speed")
+        ttk.Radiobutton(batch_action_frame, text="Speed Change", value="speed",
+                        variable=self.speed_batch_action_var).pack(side='left', padx=5)
+        ttk.Radiobutton(batch_action_frame, text="Frame Rate Conversion", value="fps",
+                        variable=self.speed_batch_action_var).pack(side='left', padx=5)
+
+        self.speed_batch = BatchPanel(self.root, tab, self.speed_batch_task)
+        self.speed_batch.frame.grid(row=8, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
 
     def browse_speed_input(self):
         filename = filedialog.askopenfilename(
@@ -602,6 +1265,53 @@ class VideoEditorGUI:
         if filename:
             self.speed_input_path.set(filename)
 
+    def speed_batch_task(self):
+        if self.speed_batch_action_var.get() == "fps":
+            return self.operation_task("fps", **self.get_fps_params())
+        range_params = self.get_time_range_params(self.speed_start_var, self.speed_end_var)
+        return self.operation_task("speed", speed_factor=self.speed_factor_var.get(), **range_params)
+
+    def get_fps_params(self):
+        """change_frame_rate params; raises ValueError on a bad rate"""
+        from ffmpeg_utils import parse_rate
+
+        text = self.fps_target_var.get().strip()
+        try:
+            fps = parse_rate(text)
+        except (ValueError, ZeroDivisionError):
+            raise ValueError(f"{text!r} is not a frame rate")
+        # Kept as text ("30000/1001") so the operation params stay plain JSON
+        return {"fps": str(fps), "mode": self.fps_mode_var.get()}
+
+    def fps_video_action(self):
+        input_path = self.speed_input_path.get()
+        if not input_path or not os.path.exists(input_path):
+            messagebox.showerror("Error", "Please select a valid input video")
+            return
+
+        try:
+            params = self.get_fps_params()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        def fps_thread():
+            try:
+                self.speed_progress.start()
+                self.speed_status.set(f"Converting to {params['fps']} fps...")
+
+                output = self.apply_operation("fps", input_path, **params)
+
+                self.speed_progress.stop()
+                self.speed_status.set(f"Done! Saved to: {os.path.basename(output)}")
+                messagebox.showinfo("Success", f"Frame rate conversion complete!\n{output}")
+            except Exception as e:
+                self.speed_progress.stop()
+                self.speed_status.set("Error occurred")
+                messagebox.showerror("Error", f"Frame rate conversion failed: {str(e)}")
+
+        threading.Thread(target=fps_thread, daemon=True).start()
+
     def speed_video_action(self):
         input_path = self.speed_input_path.get()
         if not input_path or not os.path.exists(input_path):
@@ -610,12 +1320,18 @@ class VideoEditorGUI:
 
         speed_factor = self.speed_factor_var.get()
 
+        try:
+            range_params = self.get_time_range_params(self.speed_start_var, self.speed_end_var)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid time range: {str(e)}")
+            return
+
         def speed_thread():
             try:
                 self.speed_progress.start()
                 self.speed_status.set(f"Applying {speed_factor}x speed...")
 
-                output = speed_up_mp4_video(input_path, speed_factor)
+                output = self.apply_operation("speed", input_path, speed_factor=speed_factor, **range_params)
 
                 self.speed_progress.stop()
                 self.speed_status.set(f"Done! Saved to: {os.path.basename(output)}")
@@ -660,13 +1376,24 @@ class VideoEditorGUI:
         self.blur_coords = tk.StringVar(value="Not selected")
         ttk.Label(coords_frame, textvariable=self.blur_coords).pack(side='left', padx=5)
 
-        ttk.Button(tab, text="Apply Blur", command=self.blur_video_action).grid(row=4, column=0, columnspan=3, pady=10)
+        range_frame, self.blur_start_var, self.blur_end_var, self.blur_stream_copy_var = \
+            self.create_time_range_frame(tab)
+        range_frame.grid(row=4, column=0, columnspan=3, padx=10, pady=5)
+
+        self.blur_incremental_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tab, text="Save as <name>_blurred, re-rendering only what changed since the last blur",
+                        variable=self.blur_incremental_var).grid(row=5, column=0, columnspan=3, padx=10, pady=5, sticky='w')
+
+        ttk.Button(tab, text="Apply Blur", command=self.blur_video_action).grid(row=6, column=0, columnspan=3, pady=10)
 
         self.blur_progress = ttk.Progressbar(tab, mode='indeterminate')
-        self.blur_progress.grid(row=5, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+        self.blur_progress.grid(row=7, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
 
         self.blur_status = tk.StringVar(value="Ready")
-        ttk.Label(tab, textvariable=self.blur_status).grid(row=6, column=0, columnspan=3, pady=5)
+        ttk.Label(tab, textvariable=self.blur_status).grid(row=8, column=0, columnspan=3, pady=5)
+
+        self.blur_batch = BatchPanel(self.root, tab, self.blur_batch_task)
+        self.blur_batch.frame.grid(row=9, column=0, columnspan=3, padx=10, pady=5, sticky='ew')
 
     def browse_blur_input(self):
         filename = filedialog.askopenfilename(
@@ -682,32 +1409,16 @@ class VideoEditorGUI:
             messagebox.showerror("Error", "Please select a valid input video")
             return
 
-        cap = cv2.VideoCapture(input_path)
-        ret, frame = cap.read()
-        cap.release()
-
-        if not ret:
-            messagebox.showerror("Error", "Could not read video frame")
-            return
-
-        self.blur_original_frame = frame
-        original_height, original_width = frame.shape[:2]
-
-        max_width = 640
-        max_height = 360
-
-        width_scale = max_width / original_width
-        height_scale = max_height / original_height
-        self.blur_scale_factor = min(width_scale, height_scale, 1.0)
-
-        if self.blur_scale_factor < 1.0:
-            display_width = int(original_width * self.blur_scale_factor)
-            display_height = int(original_height * self.blur_scale_factor)
-            frame = cv2.resize(frame, (display_width, display_height))
+        self.blur_status.set("Loading preview...")
+        self.preview_service.request(
+            "blur", input_path, self.show_blur_preview,
+            on_error=lambda error: messagebox.showerror("Error", error)
+        )
 
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        self.blur_image = Image.fromarray(frame_rgb)
-        self.blur_photo = ImageTk.PhotoImage(self.blur_image)
+    def show_blur_preview(self, photo, image, scale):
+        self.blur_scale_factor = scale
+        self.blur_image = image
+        self.blur_photo = photo
 
         self.blur_canvas.config(width=self.blur_image.width, height=self.blur_image.height)
         self.blur_canvas.create_image(0, 0, anchor='nw', image=self.blur_photo)
@@ -745,6 +1456,15 @@ class VideoEditorGUI:
         self.blur_box = (orig_x1, orig_y1, orig_x2, orig_y2)
         self.blur_coords.set(f"({orig_x1}, {orig_y1}, {orig_x2}, {orig_y2})")
 
+    def blur_batch_task(self):
+        if not hasattr(self, 'blur_box'):
+            raise ValueError("Please select a blur region first")
+        range_params = self.get_time_range_params(
+            self.blur_start_var, self.blur_end_var, self.blur_stream_copy_var)
+        if self.blur_incremental_var.get():
+            range_params["incremental"] = True
+        return self.operation_task("blur", region=self.blur_box, **range_params)
+
     def blur_video_action(self):
         if not hasattr(self, 'blur_box'):
             messagebox.showerror("Error", "Please select a blur region first")
@@ -752,12 +1472,21 @@ class VideoEditorGUI:
 
         input_path = self.blur_input_path.get()
 
+        try:
+            range_params = self.get_time_range_params(
+                self.blur_start_var, self.blur_end_var, self.blur_stream_copy_var)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid time range: {str(e)}")
+            return
+        if self.blur_incremental_var.get():
+            range_params["incremental"] = True
+
         def blur_thread():
             try:
                 self.blur_progress.start()
                 self.blur_status.set("Blurring video...")
 
-                output = blur_video(input_path, self.blur_box)
+                output = self.apply_operation("blur", input_path, region=self.blur_box, **range_params)
 
                 self.blur_progress.stop()
                 self.blur_status.set(f"Done! Saved to: {os.path.basename(output)}")
@@ -821,6 +1550,9 @@ class VideoEditorGUI:
         self.resize_status = tk.StringVar(value="Ready")
         ttk.Label(tab, textvariable=self.resize_status).grid(row=7, column=0, columnspan=3, pady=5)
 
+        self.resize_batch = BatchPanel(self.root, tab, self.resize_batch_task)
+        self.resize_batch.frame.grid(row=8, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+
     def browse_resize_input(self):
         filename = filedialog.askopenfilename(
             title="Select Video File",
@@ -873,6 +1605,14 @@ class VideoEditorGUI:
             except:
                 pass
 
+    def resize_batch_task(self):
+        try:
+            new_width = self.new_width_var.get()
+            new_height = self.new_height_var.get()
+        except tk.TclError:
+            raise ValueError("Width and height must be whole numbers")
+        return self.operation_task("resize", new_x=new_width, new_y=new_height)
+
     def resize_video_action(self):
         input_path = self.resize_input_path.get()
         if not input_path or not os.path.exists(input_path):
@@ -887,7 +1627,7 @@ class VideoEditorGUI:
                 self.resize_progress.start()
                 self.resize_status.set(f"Resizing to {new_width}x{new_height}...")
 
-                output = stretch_video_dims(input_path, new_width, new_height)
+                output = self.apply_operation("resize", input_path, new_x=new_width, new_y=new_height)
 
                 self.resize_progress.stop()
                 self.resize_status.set(f"Done! Saved to: {os.path.basename(output)}")
@@ -899,6 +1639,394 @@ class VideoEditorGUI:
 
         threading.Thread(target=resize_thread, daemon=True).start()
 
+    def create_color_tab(self):
+        tab = tk.Frame(self.content_frame, bg='white')
+        self.add_tab(tab, "Color")
+
+        top_frame = ttk.Frame(tab)
+        top_frame.pack(fill='x', padx=10, pady=10)
+
+        ttk.Label(top_frame, text="Input Video:").pack(side='left', padx=5)
+        self.color_input_path = tk.StringVar()
+        ttk.Entry(top_frame, textvariable=self.color_input_path, width=50).pack(side='left', padx=5)
+        ttk.Button(top_frame, text="Browse", command=self.browse_color_input).pack(side='left', padx=5)
+        ttk.Button(top_frame, text="Load Preview", command=self.load_color_preview).pack(side='left', padx=5)
+
+        content_frame = ttk.Frame(tab)
+        content_frame.pack(fill='both', expand=True, padx=10, pady=5)
+
+        left_frame = ttk.Frame(content_frame)
+        left_frame.pack(side='left', fill='both', expand=False, padx=(0, 10))
+
+        adjust_frame = ttk.LabelFrame(left_frame, text="Adjustments")
+        adjust_frame.pack(fill='x', pady=5)
+
+        # (label, variable name, default, from, to)
+        self.color_vars = {}
+        sliders = [
+            ("Brightness:", "brightness", 0.0, -100.0, 100.0),
+            ("Contrast:", "contrast", 1.0, 0.25, 3.0),
+            ("Gamma:", "gamma", 1.0, 0.25, 3.0),
+            ("Saturation:", "saturation", 1.0, 0.0, 3.0),
+        ]
+        for row, (label, name, default, low, high) in enumerate(sliders):
+            var = tk.DoubleVar(value=default)
+            self.color_vars[name] = var
+            ttk.Label(adjust_frame, text=label).grid(row=row, column=0, padx=10, pady=5, sticky='w')
+            ttk.Scale(adjust_frame, from_=low, to=high, variable=var, orient='horizontal', length=220).grid(
+                row=row, column=1, padx=10, pady=5, sticky='ew')
+            value_label = ttk.Label(adjust_frame, text=f"{default:.2f}", width=6)
+            value_label.grid(row=row, column=2, padx=5, pady=5)
+            var.trace_add('write', lambda *args, v=var, l=value_label: l.config(text=f"{v.get():.2f}"))
+            var.trace_add('write', lambda *args: self.schedule_color_preview())
+
+        ttk.Button(adjust_frame, text="Reset", command=self.reset_color).grid(
+            row=len(sliders), column=0, columnspan=3, pady=5)
+
+        lut_frame = ttk.LabelFrame(left_frame, text="3D LUT (.cube)")
+        lut_frame.pack(fill='x', pady=5)
+        self.color_lut_path = tk.StringVar()
+        ttk.Entry(lut_frame, textvariable=self.color_lut_path, width=30, state='readonly').grid(
+            row=0, column=0, padx=10, pady=5)
+        ttk.Button(lut_frame, text="Browse", command=self.browse_color_lut).grid(row=0, column=1, padx=5, pady=5)
+        ttk.Button(lut_frame, text="Clear", command=lambda: self.set_color_lut("")).grid(
+            row=0, column=2, padx=5, pady=5)
+
+        range_frame, self.color_start_var, self.color_end_var, self.color_stream_copy_var = \
+            self.create_time_range_frame(left_frame)
+        range_frame.pack(fill='x', pady=5)
+
+        ttk.Button(left_frame, text="Apply Color", command=self.color_video_action).pack(fill='x', pady=10)
+
+        self.color_progress = ttk.Progressbar(left_frame, mode='indeterminate')
+        self.color_progress.pack(fill='x', pady=5)
+
+        self.color_status = tk.StringVar(value="Ready")
+        ttk.Label(left_frame, textvariable=self.color_status).pack(pady=5)
+
+        self.color_batch = BatchPanel(self.root, left_frame, self.color_batch_task)
+        self.color_batch.frame.pack(fill='x', pady=5)
+
+        preview_frame = ttk.LabelFrame(content_frame, text="Live Preview")
+        preview_frame.pack(side='right', fill='both', expand=True)
+
+        self.color_preview_label = tk.Label(preview_frame, bg='black', width=60, height=25)
+        self.color_preview_label.pack(padx=10, pady=10)
+
+        self.color_show_original_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(preview_frame, text="Show original", variable=self.color_show_original_var,
+                        command=self.update_color_preview).pack(pady=2)
+
+        self.color_scrubber_var = tk.DoubleVar(value=0)
+        self.color_scrubber = ttk.Scale(preview_frame, from_=0, to=100, variable=self.color_scrubber_var,
+                                        orient='horizontal', command=self.on_color_scrubber_change)
+        self.color_scrubber.pack(fill='x', padx=10, pady=(0, 10))
+
+        # Source preview frame (BGR array) the adjustments are applied to
+        self.color_source = None
+        self.color_preview_path = None
+        self.color_preview_pending = False
+        self.color_lut_ready = False
+
+    def browse_color_input(self):
+        filename = filedialog.askopenfilename(
+            title="Select Video File",
+            filetypes=[("Video files", "*.mp4 *.webm *.avi *.mov"), ("All files", "*.*")]
+        )
+        if filename:
+            self.color_input_path.set(filename)
+
+    def browse_color_lut(self):
+        filename = filedialog.askopenfilename(
+            title="Select 3D LUT",
+            filetypes=[("Cube LUTs", "*.cube"), ("All files", "*.*")]
+        )
+        if filename:
+            self.set_color_lut(filename)
+
+    def set_color_lut(self, lut_path):
+        self.color_lut_path.set(lut_path)
+        self.color_lut_ready = False
+        if not lut_path:
+            self.update_color_preview()
+            return
+
+        # Expanding the cube takes a moment; the preview waits for it
+        self.color_status.set("Loading LUT...")
+
+        def lut_thread():
+            from color import load_cube
+
+            try:
+                load_cube(lut_path)
+                self.color_status.set(f"Loaded {os.path.basename(lut_path)}")
+                self.root.after(0, self.on_color_lut_loaded, lut_path)
+            except Exception as e:
+                self.color_status.set("Error occurred")
+                self.root.after(0, self.color_lut_path.set, "")
+                messagebox.showerror("Error", f"Could not load LUT: {str(e)}")
+
+        threading.Thread(target=lut_thread, daemon=True).start()
+
+    def on_color_lut_loaded(self, lut_path):
+        if lut_path == self.color_lut_path.get():
+            self.color_lut_ready = True
+            self.update_color_preview()
+
+    def reset_color(self):
+        for name, var in self.color_vars.items():
+            var.set(0.0 if name == "brightness" else 1.0)
+
+    def get_color_params(self):
+        params = {name: round(var.get(), 3) for name, var in self.color_vars.items()}
+        params["lut_path"] = self.color_lut_path.get() or None
+        return params
+
+    def load_color_preview(self):
+        input_path = self.color_input_path.get()
+        if not input_path or not os.path.exists(input_path):
+            messagebox.showerror("Error", "Please select a valid input video")
+            return
+
+        try:
+            duration = get_video_duration(input_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not load video info: {str(e)}")
+            return
+        self.release_color_capture()
+        self.color_preview_path = input_path
+        self.color_scrubber.config(to=duration or 0)
+        self.color_scrubber_var.set(0)
+        self.on_color_scrubber_change(0)
+
+    def release_color_capture(self):
+        if self.color_preview_path is not None:
+            self.preview_service.release(self.color_preview_path)
+            self.color_preview_path = None
+
+    def on_color_scrubber_change(self, value):
+        if self.color_preview_path is None:
+            return
+        self.preview_service.request(
+            "color", self.color_preview_path, self.show_color_source,
+            timestamp=float(value), allow_upscale=True, keep_open=True,
+            on_error=lambda error: print(f"Error updating preview: {error}")
+        )
+
+    def show_color_source(self, photo, image, scale):
+        import numpy as np
+
+        # PIL gives RGB; the grade works on BGR like the render path
+        self.color_source = np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+        self.update_color_preview()
+
+    def schedule_color_preview(self):
+        # Coalesce slider drags into one re-grade per Tk idle cycle
+        if not self.color_preview_pending:
+            self.color_preview_pending = True
+            self.root.after(15, self.update_color_preview)
+
+    def update_color_preview(self):
+        from PIL import Image, ImageTk
+
+        from color import grade_frame
+
+        self.color_preview_pending = False
+        if self.color_source is None:
+            return
+        frame = self.color_source.copy()
+        if not self.color_show_original_var.get():
+            try:
+                params = self.get_color_params()
+            except tk.TclError:
+                return
+            if not self.color_lut_ready:
+                params["lut_path"] = None
+            grade_frame(frame, **params)
+        image = Image.fromarray(frame[:, :, ::-1])
+        photo = ImageTk.PhotoImage(image)
+        self.color_preview_label.config(image=photo, width=image.width, height=image.height)
+        self.color_preview_label.image = photo
+
+    def color_batch_task(self):
+        params = self.get_color_params()
+        params.update(self.get_time_range_params(
+            self.color_start_var, self.color_end_var, self.color_stream_copy_var))
+        return self.operation_task("color", **params)
+
+    def color_video_action(self):
+        input_path = self.color_input_path.get()
+        if not input_path or not os.path.exists(input_path):
+            messagebox.showerror("Error", "Please select a valid input video")
+            return
+
+        try:
+            params = self.get_color_params()
+            params.update(self.get_time_range_params(
+                self.color_start_var, self.color_end_var, self.color_stream_copy_var))
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Error", f"Invalid settings: {str(e)}")
+            return
+
+        # The preview keeps a capture open on the input
+        self.release_color_capture()
+
+        def color_thread():
+            try:
+                self.color_progress.start()
+                self.color_status.set("Grading video...")
+
+                output = self.apply_operation("color", input_path, **params)
+
+                self.color_progress.stop()
+                self.color_status.set(f"Done! Saved to: {os.path.basename(output)}")
+                messagebox.showinfo("Success", f"Color grading complete!\n{output}")
+            except Exception as e:
+                self.color_progress.stop()
+                self.color_status.set("Error occurred")
+                messagebox.showerror("Error", f"Color grading failed: {str(e)}")
+
+        threading.Thread(target=color_thread, daemon=True).start()
+
+    def create_watermark_tab(self):
+        tab = tk.Frame(self.content_frame, bg='white')
+        self.add_tab(tab, "Watermark")
+
+        ttk.Label(tab, text="Input Video:").grid(row=0, column=0, padx=10, pady=10, sticky='w')
+        self.watermark_input_path = tk.StringVar()
+        ttk.Entry(tab, textvariable=self.watermark_input_path, width=50).grid(row=0, column=1, padx=10, pady=10)
+        ttk.Button(tab, text="Browse", command=self.browse_watermark_input).grid(row=0, column=2, padx=10, pady=10)
+
+        overlay_frame = ttk.LabelFrame(tab, text="Overlay")
+        overlay_frame.grid(row=1, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+
+        ttk.Label(overlay_frame, text="Image (PNG alpha kept):").grid(row=0, column=0, padx=10, pady=5, sticky='w')
+        self.watermark_image_path = tk.StringVar()
+        ttk.Entry(overlay_frame, textvariable=self.watermark_image_path, width=40).grid(row=0, column=1, padx=10, pady=5)
+        ttk.Button(overlay_frame, text="Browse", command=self.browse_watermark_image).grid(row=0, column=2, padx=5, pady=5)
+
+        ttk.Label(overlay_frame, text="Text:").grid(row=1, column=0, padx=10, pady=5, sticky='w')
+        self.watermark_text = tk.StringVar()
+        ttk.Entry(overlay_frame, textvariable=self.watermark_text, width=40).grid(row=1, column=1, padx=10, pady=5)
+
+        ttk.Label(overlay_frame, text="Position:").grid(row=2, column=0, padx=10, pady=5, sticky='w')
+        self.watermark_position = tk.StringVar(value="bottom-right")
+        ttk.Combobox(overlay_frame, textvariable=self.watermark_position, state='readonly', width=15,
+                     values=["top-left", "top-right", "bottom-left", "bottom-right", "center"]).grid(
+            row=2, column=1, padx=10, pady=5, sticky='w')
+
+        ttk.Label(overlay_frame, text="Opacity:").grid(row=3, column=0, padx=10, pady=5, sticky='w')
+        self.watermark_opacity = tk.DoubleVar(value=0.8)
+        ttk.Scale(overlay_frame, from_=0.1, to=1.0, variable=self.watermark_opacity, orient='horizontal',
+                  length=220).grid(row=3, column=1, padx=10, pady=5, sticky='w')
+
+        ttk.Label(overlay_frame, text="Captions (.srt):").grid(row=4, column=0, padx=10, pady=5, sticky='w')
+        self.watermark_srt_path = tk.StringVar()
+        ttk.Entry(overlay_frame, textvariable=self.watermark_srt_path, width=40).grid(row=4, column=1, padx=10, pady=5)
+        ttk.Button(overlay_frame, text="Browse", command=self.browse_watermark_srt).grid(row=4, column=2, padx=5, pady=5)
+
+        # The other tabs draw the image/text in their own pass, at no extra decode or encode
+        self.watermark_exports_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(tab, text="Also watermark Crop, Blur, Resize and Color exports (image/text only)",
+                        variable=self.watermark_exports_var).grid(row=2, column=0, columnspan=3, padx=10, pady=5, sticky='w')
+
+        range_frame, self.watermark_start_var, self.watermark_end_var, _ = \
+            self.create_time_range_frame(tab, allow_stream_copy=False)
+        range_frame.grid(row=3, column=0, columnspan=3, padx=10, pady=5)
+
+        ttk.Button(tab, text="Apply Overlay", command=self.watermark_video_action).grid(row=4, column=0, columnspan=3, pady=20)
+
+        self.watermark_progress = ttk.Progressbar(tab, mode='indeterminate')
+        self.watermark_progress.grid(row=5, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+
+        self.watermark_status = tk.StringVar(value="Ready")
+        ttk.Label(tab, textvariable=self.watermark_status).grid(row=6, column=0, columnspan=3, pady=5)
+
+        self.watermark_batch = BatchPanel(self.root, tab, self.watermark_batch_task)
+        self.watermark_batch.frame.grid(row=7, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+
+    def browse_watermark_input(self):
+        filename = filedialog.askopenfilename(
+            title="Select Video File",
+            filetypes=[("Video files", "*.mp4 *.webm *.avi *.mov"), ("All files", "*.*")]
+        )
+        if filename:
+            self.watermark_input_path.set(filename)
+
+    def browse_watermark_image(self):
+        filename = filedialog.askopenfilename(
+            title="Select Watermark Image",
+            filetypes=[("Images", "*.png *.jpg *.jpeg *.webp *.bmp"), ("All files", "*.*")]
+        )
+        if filename:
+            self.watermark_image_path.set(filename)
+
+    def browse_watermark_srt(self):
+        filename = filedialog.askopenfilename(
+            title="Select Captions",
+            filetypes=[("SubRip captions", "*.srt"), ("All files", "*.*")]
+        )
+        if filename:
+            self.watermark_srt_path.set(filename)
+
+    def get_overlay_params(self, captions=True):
+        """overlay_video params for the watermark tab; raises ValueError on bad input"""
+        params = {
+            "image_path": self.watermark_image_path.get().strip() or None,
+            "text": self.watermark_text.get().strip() or None,
+            "srt_path": (self.watermark_srt_path.get().strip() or None) if captions else None,
+            "position": self.watermark_position.get(),
+            "opacity": round(self.watermark_opacity.get(), 2),
+        }
+        for key in ("image_path", "srt_path"):
+            if params[key] and not os.path.exists(params[key]):
+                raise ValueError(f"{os.path.basename(params[key])} does not exist")
+        if not (params["image_path"] or params["text"] or params["srt_path"]):
+            raise ValueError("Choose an image, enter text or pick captions to overlay")
+        return params
+
+    def get_watermark_edits(self, captions=True):
+        """The watermark tab's overlay as frame edits, for other operations to draw"""
+        from overlay import overlay_edits
+
+        params = self.get_overlay_params(captions)
+        return overlay_edits(**params)
+
+    def watermark_batch_task(self):
+        params = self.get_overlay_params()
+        params.update(self.get_time_range_params(self.watermark_start_var, self.watermark_end_var))
+        return self.operation_task("overlay", **params)
+
+    def watermark_video_action(self):
+        input_path = self.watermark_input_path.get()
+        if not input_path or not os.path.exists(input_path):
+            messagebox.showerror("Error", "Please select a valid input video")
+            return
+
+        try:
+            params = self.get_overlay_params()
+            params.update(self.get_time_range_params(self.watermark_start_var, self.watermark_end_var))
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        def watermark_thread():
+            try:
+                self.watermark_progress.start()
+                self.watermark_status.set("Applying overlay...")
+
+                output = self.apply_operation("overlay", input_path, **params)
+
+                self.watermark_progress.stop()
+                self.watermark_status.set(f"Done! Saved to: {os.path.basename(output)}")
+                messagebox.showinfo("Success", f"Overlay complete!\n{output}")
+            except Exception as e:
+                self.watermark_progress.stop()
+                self.watermark_status.set("Error occurred")
+                messagebox.showerror("Error", f"Overlay failed: {str(e)}")
+
+        threading.Thread(target=watermark_thread, daemon=True).start()
+
     def create_audio_tab(self):
         tab = tk.Frame(self.content_frame, bg='white')
         self.add_tab(tab, "Audio Operations")
@@ -923,6 +2051,18 @@ class VideoEditorGUI:
         self.audio_status = tk.StringVar(value="Ready")
         ttk.Label(tab, textvariable=self.audio_status).grid(row=3, column=0, columnspan=3, pady=5)
 
+        batch_action_frame = ttk.Frame(tab)
+        batch_action_frame.grid(row=4, column=0, columnspan=3, padx=10, pady=(10, 0), sticky='w')
+        ttk.Label(batch_action_frame, text="Batch operation:").pack(side='left', padx=5)
+        self.audio_batch_action_var = tk.StringVar(value="mute")
+        ttk.Radiobutton(batch_action_frame, text="Mute Video", value="mute",
+                        variable=self.audio_batch_action_var).pack(side='left', padx=5)
+        ttk.Radiobutton(batch_action_frame, text="Extract Audio (MP3)", value="extract",
+                        variable=self.audio_batch_action_var).pack(side='left', padx=5)
+
+        self.audio_batch = BatchPanel(self.root, tab, self.audio_batch_task)
+        self.audio_batch.frame.grid(row=5, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+
     def browse_audio_input(self):
         filename = filedialog.askopenfilename(
             title="Select Video File",
@@ -931,6 +2071,11 @@ class VideoEditorGUI:
         if filename:
             self.audio_input_path.set(filename)
 
+    def audio_batch_task(self):
+        if self.audio_batch_action_var.get() == "extract":
+            return ("extract_audio", {}), mp4_to_mp3
+        return self.operation_task("mute")
+
     def mute_video_action(self):
         input_path = self.audio_input_path.get()
         if not input_path or not os.path.exists(input_path):
@@ -942,7 +2087,7 @@ class VideoEditorGUI:
                 self.audio_progress.start()
                 self.audio_status.set("Muting video...")
 
-                output = mute_video(input_path)
+                output = self.apply_operation("mute", input_path)
 
                 self.audio_progress.stop()
                 self.audio_status.set(f"Done! Saved to: {os.path.basename(output)}")
@@ -977,6 +2122,145 @@ class VideoEditorGUI:
 
         threading.Thread(target=extract_thread, daemon=True).start()
 
+    def create_timeline_tab(self):
+        tab = tk.Frame(self.content_frame, bg='white')
+        self.add_tab(tab, "Join Clips")
+
+        ttk.Label(tab, text="Clip:").grid(row=0, column=0, padx=10, pady=10, sticky='w')
+        self.timeline_clip_path = tk.StringVar()
+        ttk.Entry(tab, textvariable=self.timeline_clip_path, width=50).grid(row=0, column=1, padx=10, pady=10)
+        ttk.Button(tab, text="Browse", command=self.browse_timeline_clip).grid(row=0, column=2, padx=10, pady=10)
+
+        range_frame = ttk.Frame(tab)
+        range_frame.grid(row=1, column=0, columnspan=3, pady=5)
+
+        ttk.Label(range_frame, text="In (seconds):").pack(side='left', padx=5)
+        self.timeline_in_var = tk.StringVar(value="0")
+        ttk.Entry(range_frame, textvariable=self.timeline_in_var, width=10).pack(side='left', padx=5)
+        ttk.Label(range_frame, text="Out (seconds, blank = end):").pack(side='left', padx=5)
+        self.timeline_out_var = tk.StringVar()
+        ttk.Entry(range_frame, textvariable=self.timeline_out_var, width=10).pack(side='left', padx=5)
+        ttk.Button(range_frame, text="Add Segment", command=self.add_timeline_segment).pack(side='left', padx=10)
+
+        segments_frame = ttk.LabelFrame(tab, text="Timeline (in order)")
+        segments_frame.grid(row=2, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+
+        self.timeline_segments = []
+        self.timeline_listbox = tk.Listbox(segments_frame, width=90, height=8)
+        self.timeline_listbox.pack(side='left', padx=10, pady=10)
+
+        buttons_frame = ttk.Frame(segments_frame)
+        buttons_frame.pack(side='left', padx=10)
+        ttk.Button(buttons_frame, text="Move Up", command=lambda: self.move_timeline_segment(-1)).pack(fill='x', pady=2)
+        ttk.Button(buttons_frame, text="Move Down", command=lambda: self.move_timeline_segment(1)).pack(fill='x', pady=2)
+        ttk.Button(buttons_frame, text="Remove", command=self.remove_timeline_segment).pack(fill='x', pady=2)
+
+        ttk.Label(tab, text="Output Video:").grid(row=3, column=0, padx=10, pady=10, sticky='w')
+        self.timeline_output_path = tk.StringVar()
+        ttk.Entry(tab, textvariable=self.timeline_output_path, width=50).grid(row=3, column=1, padx=10, pady=10)
+        ttk.Button(tab, text="Browse", command=self.browse_timeline_output).grid(row=3, column=2, padx=10, pady=10)
+
+        ttk.Button(tab, text="Join Clips", command=self.join_clips_action).grid(row=4, column=0, columnspan=3, pady=20)
+
+        self.timeline_progress = ttk.Progressbar(tab, mode='indeterminate')
+        self.timeline_progress.grid(row=5, column=0, columnspan=3, padx=10, pady=10, sticky='ew')
+
+        self.timeline_status = tk.StringVar(value="Ready")
+        ttk.Label(tab, textvariable=self.timeline_status).grid(row=6, column=0, columnspan=3, pady=5)
+
+    def browse_timeline_clip(self):
+        filename = filedialog.askopenfilename(
+            title="Select Video File",
+            filetypes=[("Video files", "*.mp4 *.webm *.mkv *.avi *.mov"), ("All files", "*.*")]
+        )
+        if filename:
+            self.timeline_clip_path.set(filename)
+
+    def browse_timeline_output(self):
+        filename = filedialog.asksaveasfilename(
+            title="Save Joined Video As",
+            defaultextension=".mp4",
+            filetypes=[("MP4 files", "*.mp4"), ("All files", "*.*")]
+        )
+        if filename:
+            self.timeline_output_path.set(filename)
+
+    def refresh_timeline_listbox(self):
+        self.timeline_listbox.delete(0, 'end')
+        for path, in_time, out_time in self.timeline_segments:
+            out_text = "end" if out_time is None else f"{out_time:.2f}s"
+            self.timeline_listbox.insert('end', f"{os.path.basename(path)}  [{in_time:.2f}s - {out_text}]")
+
+    def add_timeline_segment(self):
+        path = self.timeline_clip_path.get()
+        if not path or not os.path.exists(path):
+            messagebox.showerror("Error", "Please select a valid clip")
+            return
+
+        try:
+            in_time = float(self.timeline_in_var.get() or 0)
+            out_text = self.timeline_out_var.get().strip()
+            out_time = float(out_text) if out_text else None
+        except ValueError:
+            messagebox.showerror("Error", "In/out times must be numbers")
+            return
+
+        if out_time is not None and out_time <= in_time:
+            messagebox.showerror("Error", "Out time must be greater than in time")
+            return
+
+        self.timeline_segments.append((path, in_time, out_time))
+        self.refresh_timeline_listbox()
+
+    def move_timeline_segment(self, offset):
+        selection = self.timeline_listbox.curselection()
+        if not selection:
+            return
+        index = selection[0]
+        new_index = index + offset
+        if 0 <= new_index < len(self.timeline_segments):
+            segments = self.timeline_segments
+            segments[index], segments[new_index] = segments[new_index], segments[index]
+            self.refresh_timeline_listbox()
+            self.timeline_listbox.selection_set(new_index)
+
+    def remove_timeline_segment(self):
+        selection = self.timeline_listbox.curselection()
+        if selection:
+            del self.timeline_segments[selection[0]]
+            self.refresh_timeline_listbox()
+
+    def join_clips_action(self):
+        if not self.timeline_segments:
+            messagebox.showerror("Error", "Please add at least one segment")
+            return
+
+        output_path = self.timeline_output_path.get()
+        if not output_path:
+            messagebox.showerror("Error", "Please choose an output file")
+            return
+
+        segments = list(self.timeline_segments)
+
+        def join_thread():
+            from timeline import assemble_timeline
+
+            try:
+                self.timeline_progress.start()
+                self.timeline_status.set(f"Joining {len(segments)} segments...")
+
+                output = assemble_timeline(segments, output_path)
+
+                self.timeline_progress.stop()
+                self.timeline_status.set(f"Done! Saved to: {os.path.basename(output)}")
+                messagebox.showinfo("Success", f"Join complete!\n{output}")
+            except Exception as e:
+                self.timeline_progress.stop()
+                self.timeline_status.set("Error occurred")
+                messagebox.showerror("Error", f"Join failed: {str(e)}")
+
+        threading.Thread(target=join_thread, daemon=True).start()
+
 
 if __name__ == "__main__":
     root = tk.Tk()
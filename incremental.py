@@ -0,0 +1,243 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+
+from ffmpeg_utils import (
+    FFmpegReader, FFmpegWriter, concat_copy, copy_frames, get_keyframe_times, mux_audio, probe_video
+)
+from main import BATCH_SIZE, ENCODER_PROFILE, atomic_output, open_video_capture
+from render_cache import referenced_files
+from transforms import EditSchedule, apply_edits_batch
+
+# Above this share of re-rendered frames a plain full render is cheaper than
+# splitting, re-encoding and splicing
+MAX_INCREMENTAL_SHARE = 0.5
+
+# Encoder to re-render GOPs with when splicing them into a stream-copied
+# source, by the source's codec
+SPLICE_ENCODERS = {
+    "h264": "libx264",
+    "hevc": "libx265",
+    "mpeg4": "mpeg4",
+    "vp8": "libvpx",
+    "vp9": "libvpx-vp9",
+}
+
+
+def _sidecar_path(output_path):
+    return output_path + ".edits.json"
+
+
+def _source_fingerprint(source_path):
+    stat = os.stat(source_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _normalize(edits):
+    # Round-trip through JSON so tuples/lists compare equal to the sidecar
+    return json.loads(json.dumps(edits))
+
+
+def _load_previous(source_path, output_path):
+    sidecar = _sidecar_path(output_path)
+    if not os.path.exists(output_path) or not os.path.exists(sidecar):
+        return None
+    with open(sidecar, encoding="utf-8") as f:
+        previous = json.load(f)
+    if previous.get("source") != _source_fingerprint(source_path):
+        return None
+    return previous
+
+
+def _file_fingerprints(edits):
+    # Files the edits read (watermarks, LUTs), which can change on disk
+    # under the same path
+    return {path: _source_fingerprint(path) for path in referenced_files(edits)}
+
+
+def _changed_frame_ranges(old_edits, new_edits, fps, frame_count, stale_files=()):
+    changed = [e for e in old_edits if e not in new_edits]
+    changed += [e for e in new_edits if e not in old_edits]
+    # An unchanged edit still renders differently when a file it reads changed
+    changed += [e for e in new_edits if e in old_edits and set(referenced_files(e)) & set(stale_files)]
+
+    ranges = []
+    for edit in changed:
+        start = edit.get("start") or 0
+        end = edit.get("end")
+        first = max(0, int(round(start * fps)))
+        last = frame_count if end is None else min(frame_count, int(round(end * fps)))
+        if last > first:
+            ranges.append((first, last))
+    return ranges
+
+
+def _expand_to_gops(ranges, keyframes, frame_count):
+    """Grow each frame range to whole GOPs of the previous output and merge them"""
+    expanded = []
+    for first, last in sorted(ranges):
+        gop_start = max([k for k in keyframes if k <= first], default=0)
+        gop_end = min([k for k in keyframes if k >= last], default=frame_count)
+        if expanded and gop_start <= expanded[-1][1]:
+            expanded[-1] = (expanded[-1][0], max(expanded[-1][1], gop_end))
+        else:
+            expanded.append((gop_start, gop_end))
+    return expanded
+
+
+def _video_timing(source_path):
+    with open_video_capture(source_path) as cap:
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    return probe_video(source_path)["fps"], frame_count
+
+
+def render_frames(
+    source_path, output_path, edits, first_frame=0, last_frame=None, encoder_profile=None, audio=True
+):
+    """Decode source frames [first_frame, last_frame), apply edits and encode them"""
+    info = probe_video(source_path)
+    fps = info["fps"]
+    frames = None if last_frame is None else last_frame - first_frame
+    with FFmpegReader(source_path, start=float(first_frame / fps), frames=frames, info=info) as reader:
+        with FFmpegWriter(
+            output_path,
+            (reader.width, reader.height),
+            fps,
+            encoder_profile or ENCODER_PROFILE,
+            audio_source=source_path if audio else None,
+        ) as out:
+            schedule = EditSchedule(edits)
+            frame_index = first_frame
+            for batch in reader.batches(BATCH_SIZE):
+                timestamps = [float((frame_index + i) / fps) for i in range(len(batch))]
+                out.write(apply_edits_batch(batch, schedule, timestamps))
+                frame_index += len(batch)
+    return output_path
+
+
+def render_with_edits(source_path, output_path, edits, encoder_profile=None):
+    """
+    Render source_path with a list of frame edits (see transforms.apply_edits)
+    into output_path.
+    - The applied edits are recorded in a sidecar next to output_path
+    - When output_path was previously rendered from the same source, only the
+      GOPs overlapping edits that changed are re-encoded; the rest is
+      stream-copied from the previous output and spliced back together
+    - Files the edits read (see render_cache.referenced_files) are recorded
+      by size and mtime; an edit whose file changed counts as changed
+    """
+    start_time = time.time()
+    edits = _normalize(edits)
+    encoder_profile = _normalize(encoder_profile or ENCODER_PROFILE)
+    fps, frame_count = _video_timing(source_path)
+    files = _file_fingerprints(edits)
+
+    previous = _load_previous(source_path, output_path)
+    dirty = None
+    # Re-rendered GOPs must come out of the same encoder settings as the rest
+    if previous is not None and previous.get("encoder") == encoder_profile:
+        previous_edits = previous["edits"]
+        previous_files = previous.get("files", {})
+        stale_files = [path for path, fingerprint in files.items() if previous_files.get(path) != fingerprint]
+        changed = _changed_frame_ranges(previous_edits, edits, fps, frame_count, stale_files)
+        if not changed:
+            print(f"{os.path.basename(output_path)} is already up to date")
+            return output_path
+        keyframes = [int(round(t * fps)) for t in get_keyframe_times(output_path)]
+        dirty = _expand_to_gops(changed, keyframes, frame_count)
+        dirty_frames = sum(last - first for first, last in dirty)
+        if dirty_frames > frame_count * MAX_INCREMENTAL_SHARE:
+            dirty = None
+
+    with atomic_output(output_path, "incremental", duration_of=source_path) as temp_output_path:
+        if dirty is None:
+            render_frames(source_path, temp_output_path, edits, encoder_profile=encoder_profile)
+            mode = "full"
+        else:
+            _splice(
+                source_path, output_path, temp_output_path, edits, dirty, fps, frame_count,
+                encoder_profile,
+            )
+            mode = f"incremental ({sum(last - first for first, last in dirty)}/{frame_count} frames)"
+
+    with open(_sidecar_path(output_path), "w", encoding="utf-8") as f:
+        json.dump(
+            {"source": _source_fingerprint(source_path), "edits": edits, "encoder": encoder_profile, "files": files},
+            f,
+        )
+
+    time_taken = round((time.time() - start_time), 2)
+    print(f"Rendered {os.path.basename(output_path)} in {time_taken}s, {mode}")
+    return output_path
+
+
+def _splice_profile(source_path, encoder_profile):
+    """Encoder profile whose output can be spliced into source_path, or None"""
+    info = probe_video(source_path)
+    codec = SPLICE_ENCODERS.get(info["video_codec"])
+    if codec is None:
+        return None
+    return dict(encoder_profile, codec=codec, pix_fmt=info["pix_fmt"])
+
+
+def render_time_range(
+    source_path, output_path, edits, start=None, end=None, stream_copy=False, encoder_profile=None
+):
+    """
+    Render edits that only apply between start and end (seconds).
+    - Frames outside the range pass through untransformed
+    - With stream_copy, GOPs entirely outside the range are copied from the
+      source without being decoded; only the GOPs overlapping the range are
+      re-encoded with an encoder matching the source's codec. Sources with a
+      codec we cannot encode go through the frame loop instead.
+    """
+    edits = [dict(edit, start=start, end=end) for edit in _normalize(edits)]
+    encoder_profile = encoder_profile or ENCODER_PROFILE
+    fps, frame_count = _video_timing(source_path)
+
+    dirty = None
+    splice_profile = _splice_profile(source_path, encoder_profile) if stream_copy else None
+    if splice_profile:
+        keyframes = [int(round(t * fps)) for t in get_keyframe_times(source_path)]
+        ranges = _changed_frame_ranges([], edits, fps, frame_count)
+        dirty = _expand_to_gops(ranges, keyframes, frame_count)
+    elif stream_copy:
+        print(f"Cannot stream copy {os.path.basename(source_path)}, rendering every frame")
+
+    with atomic_output(output_path, "ranged", duration_of=source_path) as temp_output_path:
+        if dirty is None:
+            render_frames(source_path, temp_output_path, edits, encoder_profile=encoder_profile)
+        else:
+            _splice(
+                source_path, source_path, temp_output_path, edits, dirty, fps, frame_count,
+                splice_profile,
+            )
+    return output_path
+
+
+def _splice(source_path, previous_path, output_path, edits, dirty, fps, frame_count, encoder_profile):
+    piece_dir = tempfile.mkdtemp(prefix="incremental_")
+    try:
+        pieces = []
+        position = 0
+        for first, last in dirty + [(frame_count, frame_count)]:
+            if first > position:
+                piece = os.path.join(piece_dir, f"{len(pieces):04d}_copy.mp4")
+                pieces.append(copy_frames(previous_path, float(position / fps), first - position, piece))
+            if last > first:
+                piece = os.path.join(piece_dir, f"{len(pieces):04d}_render.mp4")
+                pieces.append(
+                    render_frames(source_path, piece, edits, first, last, encoder_profile, audio=False)
+                )
+            position = last
+
+        # Pieces are video only; the source's audio is untouched by frame edits
+        video_only = os.path.join(piece_dir, "video.mp4")
+        concat_copy(pieces, video_only)
+        mux_audio(video_only, source_path, output_path)
+    finally:
+        shutil.rmtree(piece_dir, ignore_errors=True)
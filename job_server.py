@@ -0,0 +1,211 @@
+"""
+Local HTTP job API for headless rendering.
+
+    python job_server.py [--port 8765] [--workers 2] [--watch watch.json]
+
+    POST   /jobs                {"input_path": ..., "chain": [[op, params], ...], "output_path": ...}
+    GET    /jobs                all known jobs
+    GET    /jobs/<id>           status and progress; ?wait=<seconds> blocks until it finishes
+    DELETE /jobs/<id>           cancel
+    GET    /jobs/<id>/result    the rendered file
+    GET    /metrics             scheduler queue and latency metrics
+
+Every client shares one JobScheduler, so the render cache, probe and
+keyframe caches stay warm across requests. Binds to localhost by default:
+paths in requests are read and written with the server's permissions.
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from jobs import DEFAULT_WORKERS, JobScheduler
+from main import OPERATIONS
+
+MAX_BODY_BYTES = 1024 * 1024
+RESULT_CHUNK_BYTES = 1024 * 1024
+MAX_WAIT_SECONDS = 300
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class JobServer:
+    def __init__(self, scheduler, host="127.0.0.1", port=8765):
+        self.scheduler = scheduler
+        self.host = host
+        self.port = port
+
+    async def serve(self):
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"Job API listening on http://{self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, query, body, keep_alive = request
+                try:
+                    await self._dispatch(writer, method, path, query, body)
+                except HTTPError as e:
+                    await self._send_json(writer, e.status, {"error": str(e)})
+                except Exception as e:
+                    await self._send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        method, target, version = request_line.decode("latin-1").split()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        url = urlsplit(target)
+        return method.upper(), url.path.rstrip("/") or "/", parse_qs(url.query), body, keep_alive
+
+    async def _dispatch(self, writer, method, path, query, body):
+        parts = path.strip("/").split("/")
+        if parts == ["metrics"] and method == "GET":
+            return await self._send_json(writer, HTTPStatus.OK, self.scheduler.metrics())
+        if parts[0] != "jobs" or len(parts) > 3:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+
+        if len(parts) == 1:
+            if method == "GET":
+                jobs = [job.to_dict() for job in self.scheduler.jobs()]
+                return await self._send_json(writer, HTTPStatus.OK, jobs)
+            if method == "POST":
+                job = self._submit(body)
+                return await self._send_json(writer, HTTPStatus.ACCEPTED, job.to_dict())
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on /jobs")
+
+        job = self.scheduler.get(parts[1])
+        if job is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown job {parts[1]}")
+
+        if len(parts) == 3:
+            if parts[2] != "result" or method != "GET":
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+            return await self._send_result(writer, job)
+
+        if method == "GET":
+            wait = float(query.get("wait", ["0"])[0])
+            if wait > 0 and not job.finished:
+                # Block a worker thread, not the event loop
+                await asyncio.to_thread(job.wait, min(wait, MAX_WAIT_SECONDS))
+            return await self._send_json(writer, HTTPStatus.OK, job.to_dict())
+        if method == "DELETE":
+            if not self.scheduler.cancel(job.id):
+                raise HTTPError(HTTPStatus.CONFLICT, f"Job {job.id} already {job.status}")
+            return await self._send_json(writer, HTTPStatus.ACCEPTED, job.to_dict())
+        raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+
+    def _submit(self, body):
+        try:
+            payload = json.loads(body or b"{}")
+            input_path = payload["input_path"]
+            chain = payload["chain"]
+        except (ValueError, KeyError) as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Expected JSON with input_path and chain ({e})")
+        for step in chain:
+            if not isinstance(step, list) or len(step) != 2 or step[0] not in OPERATIONS:
+                raise HTTPError(
+                    HTTPStatus.BAD_REQUEST,
+                    f"Invalid step {step!r}, expected [operation, params] with operation in {sorted(OPERATIONS)}",
+                )
+        try:
+            return self.scheduler.submit(input_path, chain, payload.get("output_path"))
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+
+    async def _send_result(self, writer, job):
+        if job.status != "done":
+            raise HTTPError(HTTPStatus.CONFLICT, f"Job {job.id} is {job.status}")
+        path = job.result_path
+        try:
+            size = os.path.getsize(path)
+            result = open(path, "rb")
+        except FileNotFoundError:
+            raise HTTPError(HTTPStatus.GONE, f"The result of job {job.id} no longer exists")
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "Content-Length": str(size),
+            "Content-Disposition": f'attachment; filename="{os.path.basename(path)}"',
+        }
+        self._write_head(writer, HTTPStatus.OK, headers)
+        with result as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, RESULT_CHUNK_BYTES)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+
+    async def _send_json(self, writer, status, payload):
+        body = json.dumps(payload, indent=2).encode()
+        self._write_head(
+            writer, status, {"Content-Type": "application/json", "Content-Length": str(len(body))}
+        )
+        writer.write(body)
+        await writer.drain()
+
+    def _write_head(self, writer, status, headers):
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP API for submitting render jobs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--watch", help="also run the watch folders from this config on the same workers")
+    args = parser.parse_args()
+
+    scheduler = JobScheduler(args.workers)
+    if args.watch:
+        from watch_daemon import WatchDaemon
+
+        with open(args.watch, encoding="utf-8") as f:
+            daemon = WatchDaemon(json.load(f), scheduler=scheduler)
+        threading.Thread(target=daemon.run, name="watch-daemon", daemon=True).start()
+
+    try:
+        asyncio.run(JobServer(scheduler, args.host, args.port).serve())
+    except KeyboardInterrupt:
+        print("Stopping job API, waiting for running jobs")
+    finally:
+        scheduler.shutdown()
+
+
+if __name__ == "__main__":
+    main()
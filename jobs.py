@@ -0,0 +1,272 @@
+import collections
+import itertools
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+from main import atomic_output, take_verification_seconds
+from render_cache import render_non_destructive
+
+DEFAULT_WORKERS = int(os.environ.get("VIDEO_EDITOR_WORKERS", "2"))
+
+# Results of jobs without an output_path, held apart from the render cache so
+# its eviction can't delete them before they are fetched
+RESULTS_DIR = os.environ.get(
+    "VIDEO_EDITOR_RESULTS_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "video-editor", "job-results"),
+)
+
+# Finished jobs kept for status queries and latency percentiles
+HISTORY_SIZE = 1000
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """One input file run through an operation chain (or a task) by the scheduler"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, input_path, chain, output_path=None, task=None):
+        self.id = str(next(self._ids))
+        self.input_path = input_path
+        self.chain = [(name, dict(params)) for name, params in chain]
+        self.output_path = output_path
+        self.task = task
+        self.status = QUEUED
+        self.step = 0
+        self.error = None
+        self.result_path = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.verify_seconds = 0.0
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+
+    @property
+    def progress(self):
+        if self.status == DONE:
+            return 1.0
+        return self.step / len(self.chain) if self.chain else 0.0
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def wait(self, timeout=None):
+        return self._done_event.wait(timeout)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "input_path": self.input_path,
+            "chain": self.chain,
+            "output_path": self.output_path,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "step": self.chain[self.step][0] if self.step < len(self.chain) else None,
+            "error": self.error,
+            "result_path": self.result_path,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "verify_seconds": round(self.verify_seconds, 3),
+        }
+
+
+class JobScheduler:
+    """
+    Bounded worker pool for headless renders (watch folders, job API).
+    - Each job renders its chain through the shared render cache, so a
+      repeated input/chain is served without re-rendering, then copies the
+      result to output_path; without one, the result is hard-linked (or
+      copied) into a directory owned by the scheduler, and removed when the
+      job leaves the history
+    - A job submitted with a task calls task(input_path) -> output path
+      instead (GUI batches, for conversions that aren't OPERATIONS); its
+      chain only describes it
+    - At most `workers` jobs run at once; the rest wait in FIFO order
+    - cancel() drops a queued job, or stops a running one before its next
+      step
+    - metrics() reports queue length, queue/processing latency and the
+      time spent verifying outputs (see main.atomic_output)
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.workers = workers
+        self._queue = queue.Queue()
+        self._jobs = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=HISTORY_SIZE)
+        self._verify_times = collections.deque(maxlen=HISTORY_SIZE)
+        self._counts = collections.Counter()
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        self._results_dir = tempfile.mkdtemp(prefix=f"{os.getpid()}_", dir=RESULTS_DIR)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, input_path, chain, output_path=None, task=None):
+        if not os.path.isfile(input_path):
+            raise ValueError(f"Input file not found: {input_path}")
+        if not chain:
+            raise ValueError("Operation chain is empty")
+        job = Job(input_path, chain, output_path, task)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Request cancellation; returns False if the job is unknown or already finished"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job._cancel_event.set()
+        return True
+
+    def metrics(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+            latencies = list(self._latencies)
+            verify_times = sorted(self._verify_times)
+            counts = dict(self._counts)
+        now = time.time()
+        queued = [job for job in jobs if job.status == QUEUED]
+        waits = sorted(started - submitted for submitted, started, _ in latencies)
+        processing = sorted(finished - started for _, started, finished in latencies)
+        totals = sorted(finished - submitted for submitted, _, finished in latencies)
+        return {
+            "workers": self.workers,
+            "queue_length": len(queued),
+            "running": sum(job.status == RUNNING for job in jobs),
+            "completed": counts.get(DONE, 0),
+            "failed": counts.get(FAILED, 0),
+            "cancelled": counts.get(CANCELLED, 0),
+            "oldest_queued_seconds": round(max((now - job.submitted_at for job in queued), default=0), 3),
+            "queue_wait_seconds": _summary(waits),
+            "processing_seconds": _summary(processing),
+            "latency_seconds": _summary(totals),
+            "verify_seconds": _summary(verify_times),
+        }
+
+    def shutdown(self, wait=True):
+        """Cancel everything still queued and stop the workers"""
+        for job in self.jobs():
+            if job.status == QUEUED:
+                job._cancel_event.set()
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+            shutil.rmtree(self._results_dir, ignore_errors=True)
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(self._jobs) - HISTORY_SIZE)]:
+            job = self._jobs.pop(job_id)
+            if job.result_path and os.path.dirname(job.result_path) == self._results_dir:
+                try:
+                    os.remove(job.result_path)
+                except OSError:
+                    pass
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job._cancel_event.is_set():
+                self._finish(job, CANCELLED)
+                continue
+
+            job.status = RUNNING
+            job.started_at = time.time()
+            # Verification runs on this thread, inside the render
+            take_verification_seconds()
+            try:
+                job.result_path = self._render(job)
+                job.verify_seconds = take_verification_seconds()
+                self._finish(job, DONE)
+            except JobCancelled:
+                self._finish(job, CANCELLED)
+            except Exception as e:
+                job.error = str(e)
+                self._finish(job, FAILED)
+                print(f"Job {job.id} ({os.path.basename(job.input_path)}) failed: {e}")
+
+    def _render(self, job):
+        if job.task is not None:
+            result_path = job.task(job.input_path)
+            job.step = len(job.chain)
+            return result_path
+
+        def on_step(index, name):
+            if job._cancel_event.is_set():
+                raise JobCancelled()
+            job.step = index
+
+        cached_path = render_non_destructive(job.input_path, job.chain, on_step=on_step)
+        if job._cancel_event.is_set():
+            raise JobCancelled()
+        job.step = len(job.chain)
+        if job.output_path is None:
+            # A second name for the cache entry survives its eviction
+            result_path = os.path.join(self._results_dir, job.id + os.path.splitext(cached_path)[1])
+            try:
+                os.link(cached_path, result_path)
+            except OSError:
+                shutil.copyfile(cached_path, result_path)
+            return result_path
+
+        os.makedirs(os.path.dirname(os.path.abspath(job.output_path)), exist_ok=True)
+        # A copy of a cache entry, which was verified when it was rendered
+        with atomic_output(job.output_path, "job", verify=False) as temp_output_path:
+            shutil.copyfile(cached_path, temp_output_path)
+        return job.output_path
+
+    def _finish(self, job, status):
+        job.finished_at = time.time()
+        job.status = status
+        with self._lock:
+            self._counts[status] += 1
+            if status == DONE:
+                self._latencies.append((job.submitted_at, job.started_at, job.finished_at))
+                self._verify_times.append(job.verify_seconds)
+        job._done_event.set()
+
+
+def _summary(values):
+    if not values:
+        return {"mean": None, "p50": None, "p95": None, "max": None}
+    return {
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(values[len(values) // 2], 3),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+        "max": round(values[-1], 3),
+    }
@@ -1,16 +1,106 @@
 import os
+import re
+import shutil
+import threading
 import time
-import cv2
-import matplotlib.pyplot as plt
-import numpy as np
-from moviepy import vfx
-from moviepy.video.io.VideoFileClip import VideoFileClip
+from contextlib import contextmanager
 
-from moviepy.video.io.VideoFileClip import VideoFileClip
+# cv2, numpy, moviepy and matplotlib are imported inside the functions that
+# use them: together they take most of a second to import, and the GUI, the
+# job API and the watch daemon should start without paying for them.
 
+# Encoder used by every frame loop (see ffmpeg_utils.encoder_args); any
+# libavcodec encoder works. Part of the render cache key so a change here
+# never serves stale renders.
+ENCODER_PROFILE = {
+    "codec": "libx264",
+    "crf": 20,
+    "preset": "medium",
+    "pix_fmt": "yuv420p",
+    "keyframe_interval": 2,
+}
+
+# Frames per transform call in the frame loops; larger batches amortise the
+# per-call overhead that dominates at small resolutions
+BATCH_SIZE = int(os.environ.get("VIDEO_EDITOR_BATCH_SIZE", "16"))
+
+# How rendered videos are checked before they replace anything (see
+# verify.verify_video): "fast", "full" (decode everything, log an MD5) or "off"
+VERIFY_MODE = os.environ.get("VIDEO_EDITOR_VERIFY", "fast")
+
+# Outputs with these extensions are verified; other files (sprite sheets,
+# maps) are written as-is
+VERIFIED_EXTENSIONS = (".mp4", ".mov", ".mkv", ".webm", ".avi", ".m4v")
+
+# Verification time per thread, collected by the job scheduler
+_verification = threading.local()
+
+# atomic_output's temp files are <name>_<tag>_temp<ext>
+_TEMP_OUTPUT = re.compile(r".+_.+_temp\.[^._]+$")
 
-import os
-from moviepy.video.io.VideoFileClip import VideoFileClip
+
+@contextmanager
+def open_video_capture(video_path):
+    """
+    Open a cv2.VideoCapture that is always released when the block exits,
+    so the input file is never left locked behind us.
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        yield cap
+    finally:
+        cap.release()
+
+
+def take_verification_seconds():
+    """Seconds this thread spent verifying outputs since the last call"""
+    seconds = getattr(_verification, "seconds", 0.0)
+    _verification.seconds = 0.0
+    return seconds
+
+
+def _verify_output(temp_output_path, output_path, duration_of):
+    from verify import video_duration, verify_video
+
+    expected_duration = video_duration(duration_of) if duration_of else None
+    report = verify_video(temp_output_path, expected_duration, full=VERIFY_MODE == "full")
+    _verification.seconds = getattr(_verification, "seconds", 0.0) + report["seconds"]
+    checksum = f", MD5 {report['checksum']}" if report["checksum"] else ""
+    print(
+        f"Verified {os.path.basename(output_path)} ({report['frames']} frames{checksum}) "
+        f"in {report['seconds']}s"
+    )
+
+
+def is_temp_output(path):
+    """Whether path is named like an atomic_output temp file"""
+    return _TEMP_OUTPUT.match(os.path.basename(path)) is not None
+
+
+@contextmanager
+def atomic_output(output_path, tag, duration_of=None, verify=True):
+    """
+    Commit layer for every overwrite-in-place operation.
+    - Yields a temp path next to output_path to write into
+    - A video temp file is verified first (see VERIFY_MODE); duration_of
+      names a file whose video duration the output must keep
+    - On success the temp file atomically replaces output_path (os.replace)
+    - On failure, including failed verification, the temp file is removed
+      and output_path is left untouched
+    """
+    base, ext = os.path.splitext(output_path)
+    temp_output_path = f"{base}_{tag}_temp{ext}"
+    try:
+        yield temp_output_path
+        if verify and VERIFY_MODE != "off" and ext.lower() in VERIFIED_EXTENSIONS:
+            _verify_output(temp_output_path, output_path, duration_of)
+    except BaseException:
+        if os.path.exists(temp_output_path):
+            os.remove(temp_output_path)
+        raise
+    os.replace(temp_output_path, output_path)
 
 
 def mp4_to_webm(input_video_path, crf=32, use_opus=True):
@@ -18,37 +108,39 @@ def mp4_to_webm(input_video_path, crf=32, use_opus=True):
     MP4 -> WEBM (VP9 + Opus/Vorbis)
     - Output path: same folder, same basename, .webm extension
     """
+    from moviepy import VideoFileClip
+
     base, _ = os.path.splitext(input_video_path)
     output_path = base + ".webm"
-    clip = VideoFileClip(input_video_path)
 
     common_ffmpeg = ["-b:v", "0", "-crf", str(crf)]
 
-    if use_opus:
-        try:
-            clip.write_videofile(
-                output_path,
-                codec="libvpx-vp9",
-                audio=True,
-                audio_codec="libopus",
-                audio_fps=48000,  # Opus requires 48k
-                temp_audiofile=base + "_temp.opus",
-                remove_temp=True,
-                ffmpeg_params=common_ffmpeg,
-            )
-            return output_path
-        except Exception:
-            pass
-
-    clip.write_videofile(
-        output_path,
-        codec="libvpx-vp9",
-        audio=True,
-        audio_codec="libvorbis",
-        temp_audiofile=base + "_temp.ogg",
-        remove_temp=True,
-        ffmpeg_params=common_ffmpeg,
-    )
+    with VideoFileClip(input_video_path) as clip:
+        if use_opus:
+            try:
+                clip.write_videofile(
+                    output_path,
+                    codec="libvpx-vp9",
+                    audio=True,
+                    audio_codec="libopus",
+                    audio_fps=48000,  # Opus requires 48k
+                    temp_audiofile=base + "_temp.opus",
+                    remove_temp=True,
+                    ffmpeg_params=common_ffmpeg,
+                )
+                return output_path
+            except Exception:
+                pass
+
+        clip.write_videofile(
+            output_path,
+            codec="libvpx-vp9",
+            audio=True,
+            audio_codec="libvorbis",
+            temp_audiofile=base + "_temp.ogg",
+            remove_temp=True,
+            ffmpeg_params=common_ffmpeg,
+        )
     return output_path
 
 
@@ -57,16 +149,18 @@ def webm_to_mp4(input_video_path, crf=20, preset="medium"):
     WEBM -> MP4 (H.264 + AAC)
     - Output path: same folder, same basename, .mp4 extension
     """
+    from moviepy import VideoFileClip
+
     base, _ = os.path.splitext(input_video_path)
     output_path = base + ".mp4"
-    clip = VideoFileClip(input_video_path)
-    clip.write_videofile(
-        output_path,
-        codec="libx264",
-        audio=True,
-        audio_codec="aac",
-        ffmpeg_params=["-crf", str(crf), "-preset", preset],
-    )
+    with VideoFileClip(input_video_path) as clip:
+        clip.write_videofile(
+            output_path,
+            codec="libx264",
+            audio=True,
+            audio_codec="aac",
+            ffmpeg_params=["-crf", str(crf), "-preset", preset],
+        )
     return output_path
 
 
@@ -76,24 +170,114 @@ def mkv_to_mp4(input_video_path, crf=20, preset="medium"):
     MKV -> MP4 (H.264 + AAC)
     - Output path: same folder, same basename, .mp4 extension
     """
+    from moviepy import VideoFileClip
+
     base, _ = os.path.splitext(input_video_path)
     output_path = base + ".mp4"
-    clip = VideoFileClip(input_video_path)
-    clip.write_videofile(
-        output_path,
-        codec="libx264",
-        audio=True,
-        audio_codec="aac",
-        ffmpeg_params=["-crf", str(crf), "-preset", preset],
-    )
+    with VideoFileClip(input_video_path) as clip:
+        clip.write_videofile(
+            output_path,
+            codec="libx264",
+            audio=True,
+            audio_codec="aac",
+            ffmpeg_params=["-crf", str(crf), "-preset", preset],
+        )
     return output_path
 
 
+# Share of a size limit kept free for container overhead
+TARGET_SIZE_MARGIN = 0.03
+
+# Encoder settings for target-size and auto-quality conversions, by output
+# container; these match what mp4_to_webm / webm_to_mp4 encode with
+CONVERSION_PROFILES = {
+    ".mp4": {"codec": "libx264", "preset": "medium", "pix_fmt": "yuv420p"},
+    ".webm": {"codec": "libvpx-vp9", "pix_fmt": "yuv420p", "extra": ["-row-mt", "1"]},
+}
+
+
+def convert_to_target_size(input_video_path, target_mb, output_format="mp4", audio_kbps=128, preset="medium"):
+    """
+    Convert to MP4 (H.264 + AAC) or WEBM (VP9 + Opus) so the file fits in
+    target_mb megabytes, using a two-pass encode at the bitrate the probed
+    duration allows
+    - Output path: same folder and basename with the new extension, plus a
+      _<size>MB suffix when that would overwrite the input
+    - Passes are cached (see ffmpeg_utils.encode_two_pass): a retry with a
+      different size limit only re-runs the second pass
+    """
+    from ffmpeg_utils import encode_two_pass, probe_video
+
+    ext = "." + output_format.lower().lstrip(".")
+    if ext not in CONVERSION_PROFILES:
+        raise ValueError(f"Target size encoding supports {', '.join(CONVERSION_PROFILES)}, not {ext}")
+    base, input_ext = os.path.splitext(input_video_path)
+    output_path = base + ext if input_ext.lower() != ext else f"{base}_{target_mb:g}MB{ext}"
+
+    info = probe_video(input_video_path)
+    if not info["duration"]:
+        raise ValueError(f"Could not read the duration of {input_video_path}")
+    target_bytes = target_mb * 1024 * 1024
+    total_kbps = target_bytes * 8 * (1 - TARGET_SIZE_MARGIN) / info["duration"] / 1000
+    if info["audio_codec"] is None:
+        audio_kbps = None
+    else:
+        # Audio never takes more than a quarter of the budget
+        audio_kbps = max(24, min(audio_kbps, int(total_kbps / 4)))
+    video_kbps = total_kbps - (audio_kbps or 0)
+    if video_kbps < 50:
+        raise ValueError(
+            f"{target_mb} MB is too small for {info['duration']:.0f}s of video "
+            f"({video_kbps:.0f} kb/s left for the picture)"
+        )
+
+    profile = dict(CONVERSION_PROFILES[ext])
+    if "preset" in profile:
+        profile["preset"] = preset
+    start_time = time.time()
+    with atomic_output(output_path, "target_size", duration_of=input_video_path) as temp_output_path:
+        # Rate control can overshoot by a few percent; the cached first pass
+        # makes an extra second pass at a lower bitrate cheap
+        for attempt in range(3):
+            cached = encode_two_pass(input_video_path, temp_output_path, profile, video_kbps, audio_kbps)
+            size = os.path.getsize(temp_output_path)
+            print(
+                f"Two-pass encode at {video_kbps:.0f} kb/s video: {size / 2**20:.2f} MB "
+                f"(target {target_mb} MB{', first pass cached' if cached else ''})"
+            )
+            if size <= target_bytes:
+                break
+            video_kbps *= target_bytes / size * 0.97
+        else:
+            raise RuntimeError(f"Could not fit {os.path.basename(input_video_path)} in {target_mb} MB")
+
+    time_taken = round((time.time() - start_time), 2)
+    print(f"Saved {os.path.basename(output_path)} ({size / 2**20:.2f} MB) in {time_taken}s")
+    return output_path
+
+
+def find_conversion_crf(input_video_path, output_format="mp4", target_ssim=0.98, preset="medium"):
+    """
+    The highest CRF for converting to MP4 or WEBM that keeps sampled
+    segments at target_ssim (see quality.find_crf)
+    """
+    from quality import find_crf
+
+    ext = "." + output_format.lower().lstrip(".")
+    if ext not in CONVERSION_PROFILES:
+        raise ValueError(f"Automatic quality supports {', '.join(CONVERSION_PROFILES)}, not {ext}")
+    profile = dict(CONVERSION_PROFILES[ext])
+    if "preset" in profile:
+        profile["preset"] = preset
+    crf, _ = find_crf(input_video_path, profile, target_ssim)
+    return crf
+
+
 def select_roi_from_video(video_path):
-    cap = cv2.VideoCapture(video_path)
+    import cv2
 
-    ret, frame = cap.read()
-    cap.release()
+    with open_video_capture(video_path) as cap:
+        ret, frame = cap.read()
 
     if not ret:
         raise ValueError("Could not read the first frame from video")
@@ -142,7 +326,11 @@ def select_roi_from_video(video_path):
 
 
 def show_frame_from_vid(video_path):
-    first_frame = cv2.VideoCapture(video_path).read()[1]
+    import cv2
+    import matplotlib.pyplot as plt
+
+    with open_video_capture(video_path) as cap:
+        first_frame = cap.read()[1]
     plt.imshow(cv2.cvtColor(first_frame, cv2.COLOR_BGR2RGB))
     plt.show()
 
@@ -152,44 +340,63 @@ def crop_image(image, box):
     return image[top:bottom, left:right]
 
 
-def crop_video(input_video_path, box, asyncly=False):
+def crop_video(
+    input_video_path,
+    box,
+    asyncly=False,
+    output_path=None,
+    start=None,
+    end=None,
+    stream_copy=False,
+    encoder_profile=None,
+    overlays=None,
+):
+    """
+    Crop every frame to box (left, top, right, bottom)
+    - Overwrites the input unless output_path is given
+    - With start/end (seconds) only that range is cropped, scaled back up to
+      the full frame size so the dimensions stay constant; stream_copy skips
+      decoding the GOPs outside the range
+    - overlays (see overlay.overlay_edits) are drawn onto the output frames
+      in the same pass
+    """
+    output_path = output_path or input_video_path
+
     def func():
+        if start is not None or end is not None:
+            return _render_ranged_edit(
+                input_video_path, output_path, "zoom", {"box": box}, start, end, stream_copy,
+                encoder_profile, overlays,
+            )
+
+        from ffmpeg_utils import FFmpegReader, FFmpegWriter
+        from transforms import crop_batch
+
         print(f"Cropping this video {os.path.basename(input_video_path)} to {box}")
         start_time = time.time()
-        temp_output_path = input_video_path.replace(
-            ".mp4", f"_cropped_temp_{box[0]}_{box[1]}_{box[2]}_{box[3]}.mp4"
-        )
 
         left, top, right, bottom = box
 
-        cap = cv2.VideoCapture(input_video_path)
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-
-        out = cv2.VideoWriter(
-            temp_output_path, fourcc, fps, (right - left, bottom - top)
-        )
-
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            cropped_frame = frame[top:bottom, left:right]
-            out.write(cropped_frame)
-
-        cap.release()
-        out.release()
-
-        if os.path.exists(input_video_path):
-            os.remove(input_video_path)
-
-        os.rename(temp_output_path, input_video_path)
+        with atomic_output(
+            output_path, f"cropped_{box[0]}_{box[1]}_{box[2]}_{box[3]}", duration_of=input_video_path
+        ) as temp_output_path:
+            with FFmpegReader(input_video_path) as reader:
+                with FFmpegWriter(
+                    temp_output_path,
+                    (right - left, bottom - top),
+                    reader.fps,
+                    encoder_profile or ENCODER_PROFILE,
+                    audio_source=input_video_path,
+                ) as out:
+                    cropped = (crop_batch(batch, box) for batch in reader.batches(BATCH_SIZE))
+                    for batch in _overlaid(cropped, overlays, reader.fps):
+                        out.write(batch)
 
         time_taken = round((time.time() - start_time), 2)
         print(
-            f"Saved cropped video as {os.path.basename(input_video_path)} in {time_taken}s (overwritten)"
+            f"Saved cropped video as {os.path.basename(output_path)} in {time_taken}s"
         )
-        return input_video_path
+        return output_path
 
     if not asyncly:
         return func()
@@ -201,201 +408,474 @@ def crop_video(input_video_path, box, asyncly=False):
         return thread
 
 
-def get_subclip(input_video_path, start_time, end_time):
+def _render_ranged_edit(
+    input_video_path, output_path, op, params, start, end, stream_copy, encoder_profile=None,
+    overlays=None,
+):
+    from incremental import render_frames, render_time_range
+
+    start_time = time.time()
+    print(f"Applying {op} to {os.path.basename(input_video_path)} from {start}s to {end}s")
+    if overlays:
+        # Overlays cover the whole video, so nothing can be stream copied
+        edits = [{"op": op, "params": params, "start": start, "end": end}] + list(overlays)
+        with atomic_output(output_path, "ranged", duration_of=input_video_path) as temp_output_path:
+            render_frames(input_video_path, temp_output_path, edits, encoder_profile=encoder_profile)
+    else:
+        render_time_range(
+            input_video_path,
+            output_path,
+            [{"op": op, "params": params}],
+            start=start,
+            end=end,
+            stream_copy=stream_copy,
+            encoder_profile=encoder_profile,
+        )
+    time_taken = round((time.time() - start_time), 2)
+    print(f"Saved {op} video as {os.path.basename(output_path)} in {time_taken}s")
+    return output_path
+
+
+def _overlaid(batches, overlays, fps):
+    # Draw overlay edits onto batches as they stream to the encoder
+    if not overlays:
+        yield from batches
+        return
+
+    from transforms import EditSchedule, apply_edits_batch
+
+    schedule = EditSchedule(overlays)
+    frame_index = 0
+    for batch in batches:
+        timestamps = [float((frame_index + i) / fps) for i in range(len(batch))]
+        yield apply_edits_batch(batch, schedule, timestamps)
+        frame_index += len(batch)
+
+
+def get_subclip(input_video_path, start_time, end_time, output_path=None):
+    from moviepy import VideoFileClip
+
+    output_path = output_path or input_video_path
     subclip_start_time = time.time()
 
     print(f"Clipping video from {start_time}s to {end_time}s")
 
-    temp_output_path = input_video_path.replace(
-        ".mp4", f"_subclip_temp_{start_time}_{end_time}.mp4"
-    )
-
-    clip = VideoFileClip(input_video_path)
-    subclip = clip.subclipped(start_time, end_time)
-    subclip.write_videofile(temp_output_path, codec="libx264")
-
-    # Close both clips to release file handles
-    subclip.close()
-    clip.close()
-
-    # Force garbage collection and wait for file handles to be released
-    import gc
-    import time as time_module
-    gc.collect()
-    time_module.sleep(1.5)
-
-    # Retry logic for file operations
-    max_retries = 5
-    for attempt in range(max_retries):
-        try:
-            if os.path.exists(input_video_path):
-                os.remove(input_video_path)
-            os.rename(temp_output_path, input_video_path)
-            break
-        except PermissionError as e:
-            if attempt < max_retries - 1:
-                print(f"File locked, retrying in 1 second... (attempt {attempt + 1}/{max_retries})")
-                time_module.sleep(1)
-            else:
-                raise Exception(f"Could not access file after {max_retries} attempts. Please close any programs using the video file.") from e
+    with atomic_output(
+        output_path, f"subclip_{start_time}_{end_time}"
+    ) as temp_output_path:
+        # Both clips own an ffmpeg reader on the input, so they have to be
+        # closed before the temp file can replace it
+        with VideoFileClip(input_video_path) as clip:
+            with clip.subclipped(start_time, end_time) as subclip:
+                subclip.write_videofile(temp_output_path, codec="libx264")
 
     time_taken = round((time.time() - subclip_start_time), 2)
-    print(f"Saved subclip as {os.path.basename(input_video_path)} in {time_taken}s (overwritten)")
+    print(f"Saved subclip as {os.path.basename(output_path)} in {time_taken}s")
 
-    return input_video_path
+    return output_path
 
 
 def convert_mp4_to_gif(input_video_path):
+    from moviepy import VideoFileClip
+
     # Generate the output GIF file path by replacing the .mp4 extension with .gif
     output_gif_path = input_video_path.replace(".mp4", ".gif")
 
     # Load the video file into a VideoFileClip object
-    clip = VideoFileClip(input_video_path)
-
-    # Write the video clip to a GIF file
-    clip.write_gif(output_gif_path)
+    with VideoFileClip(input_video_path) as clip:
+        # Write the video clip to a GIF file
+        clip.write_gif(output_gif_path)
 
     return output_gif_path
 
 
-def speed_up_mp4_video(input_video_path, speed_factor: float):
+def speed_up_mp4_video(input_video_path, speed_factor: float, output_path=None, start=None, end=None):
+    """
+    Change playback speed by speed_factor
+    - With start/end (seconds) only that range is sped up; the parts before
+      and after are kept as-is and everything is written in a single pass
+    """
+    from moviepy import VideoFileClip, concatenate_videoclips, vfx
+
+    output_path = output_path or input_video_path
     start_time = time.time()
 
-    temp_output_path = input_video_path.replace(".mp4", f"_sped_temp_{speed_factor}.mp4")
-    clip = VideoFileClip(input_video_path).fx(vfx.speedx, speed_factor)
-    clip.write_videofile(temp_output_path, codec="libx264")
-    clip.close()
+    with atomic_output(output_path, f"sped_{speed_factor}") as temp_output_path:
+        with VideoFileClip(input_video_path) as clip:
+            range_start = start or 0
+            range_end = clip.duration if end is None else min(end, clip.duration)
 
-    if os.path.exists(input_video_path):
-        os.remove(input_video_path)
+            sped = clip.subclipped(range_start, range_end).with_effects(
+                [vfx.MultiplySpeed(speed_factor)]
+            )
+            pieces = [sped]
+            if range_start > 0:
+                pieces.insert(0, clip.subclipped(0, range_start))
+            if range_end < clip.duration:
+                pieces.append(clip.subclipped(range_end))
 
-    os.rename(temp_output_path, input_video_path)
+            concatenate_videoclips(pieces).write_videofile(temp_output_path, codec="libx264")
 
     time_taken = round((time.time() - start_time), 2)
-    print(f"Saved sped video as {os.path.basename(input_video_path)} in {time_taken}s (overwritten)")
+    print(f"Saved sped video as {os.path.basename(output_path)} in {time_taken}s")
 
-    return input_video_path
+    return output_path
 
 
-def blur_video(video_path, region):
+def blur_video(
+    video_path, region, output_path=None, start=None, end=None, stream_copy=False, encoder_profile=None,
+    overlays=None, incremental=False,
+):
     # expects a region of XYXY
-    print(f"blurring this video: {os.path.basename(video_path)}")
-    cap = cv2.VideoCapture(video_path)
+    # start/end (seconds) limit the blur to a time range, overlays are drawn
+    # in the same pass, see crop_video
+    # incremental renders into a separate file (output_path, or
+    # <name>_blurred next to the input) and, when that file was rendered
+    # from this input before, re-encodes only the GOPs whose edits changed
+    # (see incremental.render_with_edits)
+    if incremental:
+        from incremental import render_with_edits
+
+        base, ext = os.path.splitext(video_path)
+        output_path = output_path or f"{base}_blurred{ext}"
+        if os.path.abspath(output_path) == os.path.abspath(video_path):
+            raise ValueError("An incremental blur needs an output file other than its input")
+        edits = [{"op": "blur", "params": {"region": list(region)}, "start": start, "end": end}]
+        return render_with_edits(video_path, output_path, edits + list(overlays or []), encoder_profile)
+
+    output_path = output_path or video_path
+    if start is not None or end is not None:
+        return _render_ranged_edit(
+            video_path, output_path, "blur", {"region": region}, start, end, stream_copy,
+            encoder_profile, overlays,
+        )
 
-    # Define the region (left, top, right, bottom)
-    left, top, right, bottom = region
+    from ffmpeg_utils import FFmpegReader, FFmpegWriter
+    from transforms import blur_region_batch
+
+    print(f"blurring this video: {os.path.basename(video_path)}")
 
     # Define the kernel size for the blur
     kernel_size = (15, 15)  # Adjust for desired blur effect
 
-    # Get the video properties
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    with atomic_output(output_path, "blurred", duration_of=video_path) as temp_output_path:
+        with FFmpegReader(video_path) as reader:
+            with FFmpegWriter(
+                temp_output_path,
+                (reader.width, reader.height),
+                reader.fps,
+                encoder_profile or ENCODER_PROFILE,
+                audio_source=video_path,
+            ) as out:
+                # Blur the region in place and write the batch
+                blurred = (blur_region_batch(batch, region, kernel_size) for batch in reader.batches(BATCH_SIZE))
+                for batch in _overlaid(blurred, overlays, reader.fps):
+                    out.write(batch)
+
+    print(f"blurred this video: {os.path.basename(output_path)}!")
+    return output_path
 
-    # Create the temp output video path
-    base, ext = os.path.splitext(video_path)
-    temp_output_path = f"{base}_blurred_temp{ext}"
 
-    # Create the VideoWriter object
-    out = cv2.VideoWriter(temp_output_path, fourcc, fps, (width, height))
+def color_video(
+    video_path,
+    output_path=None,
+    brightness=0.0,
+    contrast=1.0,
+    gamma=1.0,
+    saturation=1.0,
+    lut_path=None,
+    start=None,
+    end=None,
+    stream_copy=False,
+    encoder_profile=None,
+    overlays=None,
+):
+    """
+    Grade every frame with color.grade_batch: brightness/contrast/gamma,
+    saturation and an optional .cube 3D LUT
+    - start/end (seconds) limit the grade to a time range and overlays are
+      drawn in the same pass, see crop_video
+    """
+    output_path = output_path or video_path
+    params = {
+        "brightness": brightness, "contrast": contrast, "gamma": gamma,
+        "saturation": saturation, "lut_path": lut_path,
+    }
+    if start is not None or end is not None:
+        return _render_ranged_edit(
+            video_path, output_path, "color", params, start, end, stream_copy, encoder_profile, overlays
+        )
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    from color import grade_batch, load_cube
+    from ffmpeg_utils import FFmpegReader, FFmpegWriter
+
+    print(f"Grading {os.path.basename(video_path)}")
+    start_time = time.time()
+    if lut_path:
+        # Build the table before the decoder starts rather than mid-stream
+        load_cube(lut_path)
+
+    with atomic_output(output_path, "graded", duration_of=video_path) as temp_output_path:
+        with FFmpegReader(video_path) as reader:
+            with FFmpegWriter(
+                temp_output_path,
+                (reader.width, reader.height),
+                reader.fps,
+                encoder_profile or ENCODER_PROFILE,
+                audio_source=video_path,
+            ) as out:
+                graded = (grade_batch(batch, **params) for batch in reader.batches(BATCH_SIZE))
+                for batch in _overlaid(graded, overlays, reader.fps):
+                    out.write(batch)
+
+    time_taken = round((time.time() - start_time), 2)
+    print(f"Saved graded video as {os.path.basename(output_path)} in {time_taken}s")
+    return output_path
 
-        # Extract the region to be blurred
-        region = frame[top:bottom, left:right]
 
-        # Apply Gaussian blur to the region
-        blurred_region = cv2.GaussianBlur(region, kernel_size, 0)
+def stabilize_video(
+    video_path, output_path=None, smoothing=30, margin=0.05, box=None, encoder_profile=None
+):
+    """
+    Smooth out camera shake (see stabilize.py)
+    - smoothing is the radius in frames of the averaged camera path
+    - margin is the fraction trimmed from each side to hide moving borders
+    - box (XYXY) crops in the same warp, so the output is resampled once
+    - The motion analysis is cached next to the input, so re-rendering
+      with other settings skips it
+    """
+    from stabilize import stabilize
 
-        # Replace the original region with the blurred region
-        frame[top:bottom, left:right] = blurred_region
+    output_path = output_path or video_path
+    return stabilize(video_path, output_path, smoothing, margin, box, encoder_profile)
 
-        # Write the frame to the output video
-        out.write(frame)
 
-    cap.release()
-    out.release()
-    cv2.destroyAllWindows()
+def change_frame_rate(video_path, fps, output_path=None, mode="nearest", encoder_profile=None):
+    """
+    Convert to an exact frame rate: a Fraction or a string like "30000/1001"
+    or "29.97" (see framerate.convert_frame_rate for the modes)
+    - The duration is kept, so the original audio stays in sync
+    """
+    from framerate import convert_frame_rate
+
+    output_path = output_path or video_path
+    with atomic_output(output_path, "fps", duration_of=video_path) as temp_output_path:
+        convert_frame_rate(video_path, temp_output_path, fps, mode, encoder_profile)
+    return output_path
+
+
+def overlay_video(
+    video_path,
+    output_path=None,
+    image_path=None,
+    text=None,
+    srt_path=None,
+    position="bottom-right",
+    size=None,
+    opacity=0.8,
+    start=None,
+    end=None,
+    encoder_profile=None,
+):
+    """
+    Watermark with an image and/or text and burn in .srt captions
+    (see overlay.overlay_edits)
+    - Each overlay is pre-rendered once and only its bounding box is
+      blended per frame
+    - start/end (seconds) limit the watermark and captions to a time range
+    """
+    from incremental import render_frames
+    from overlay import overlay_edits
 
-    if os.path.exists(video_path):
-        os.remove(video_path)
+    output_path = output_path or video_path
+    edits = overlay_edits(image_path, text, srt_path, position, size, opacity, start=start, end=end)
+    if not edits:
+        raise ValueError("Nothing to overlay: give an image, text or captions")
 
-    os.rename(temp_output_path, video_path)
+    start_time = time.time()
+    with atomic_output(output_path, "overlaid", duration_of=video_path) as temp_output_path:
+        render_frames(video_path, temp_output_path, edits, encoder_profile=encoder_profile)
 
-    print(f"blurred this video: {os.path.basename(video_path)}! (overwritten)")
-    return video_path
+    time_taken = round((time.time() - start_time), 2)
+    print(f"Saved overlaid video as {os.path.basename(output_path)} in {time_taken}s")
+    return output_path
 
 
 def get_vid_dims(video_path):
-    cap = cv2.VideoCapture(video_path)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    cap.release()
-    return width, height
+    # Read from the container header; no decoder needed
+    from ffmpeg_utils import probe_video
 
+    info = probe_video(video_path)
+    return info["width"], info["height"]
 
-def stretch_video_dims(video_path, new_x, new_y):
-    print(f"Stretching {os.path.basename(video_path)} to {new_x}x{new_y}")
-    temp_video_path = video_path.replace(".mp4", f"_stretched_temp_{new_x}_{new_y}.mp4")
-    cap = cv2.VideoCapture(video_path)
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    out = cv2.VideoWriter(temp_video_path, fourcc, fps, (new_x, new_y))
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frame = cv2.resize(frame, (new_x, new_y), interpolation=cv2.INTER_LINEAR)
-        out.write(frame)
-    cap.release()
-    out.release()
 
-    if os.path.exists(video_path):
-        os.remove(video_path)
+def stretch_video_dims(video_path, new_x, new_y, output_path=None, encoder_profile=None, overlays=None):
+    import numpy as np
 
-    os.rename(temp_video_path, video_path)
+    from ffmpeg_utils import FFmpegReader, FFmpegWriter
+    from transforms import resize_batch
 
-    print(f"Stretched video saved as {os.path.basename(video_path)} (overwritten)")
-    return video_path
+    output_path = output_path or video_path
+    print(f"Stretching {os.path.basename(video_path)} to {new_x}x{new_y}")
+    with atomic_output(output_path, f"stretched_{new_x}_{new_y}", duration_of=video_path) as temp_video_path:
+        with FFmpegReader(video_path) as reader:
+            with FFmpegWriter(
+                temp_video_path,
+                (new_x, new_y),
+                reader.fps,
+                encoder_profile or ENCODER_PROFILE,
+                audio_source=video_path,
+            ) as out:
+                resized = np.empty((BATCH_SIZE, new_y, new_x, 3), dtype=np.uint8)
+                batches = (
+                    resize_batch(batch, (new_x, new_y), out=resized[:len(batch)])
+                    for batch in reader.batches(BATCH_SIZE)
+                )
+                # Overlays are sized for the output, after the resize
+                for batch in _overlaid(batches, overlays, reader.fps):
+                    out.write(batch)
+
+    print(f"Stretched video saved as {os.path.basename(output_path)}")
+    return output_path
 
 
 def get_video_duration(video_path):
-    clip = VideoFileClip(video_path)
-    return clip.duration
+    from ffmpeg_utils import probe_video
+
+    return probe_video(video_path)["duration"]
 
 
 def mp4_to_mp3(video_path):
+    from moviepy import VideoFileClip
+
     audio_path = video_path.replace(".mp4", ".mp3")
-    clip = VideoFileClip(video_path)
-    clip.audio.write_audiofile(audio_path)
+    with VideoFileClip(video_path) as clip:
+        clip.audio.write_audiofile(audio_path)
     return audio_path
 
 
-def mute_video(video_path):
+def mute_video(video_path, output_path=None):
+    from moviepy import VideoFileClip
+
+    output_path = output_path or video_path
     print(f"Muting video: {video_path}")
-    clip = VideoFileClip(video_path)
-    audio = clip.audio
-    if audio:
-        audio = audio.volumex(0)
-        temp_output_path = video_path.replace(".mp4", "_muted_temp.mp4")
-        clip.set_audio(audio).write_videofile(temp_output_path, codec="libx264")
-        clip.close()
-
-        if os.path.exists(video_path):
-            os.remove(video_path)
-
-        os.rename(temp_output_path, video_path)
-        print(f"Muted video saved (overwritten)")
-        return video_path
-    else:
+    with VideoFileClip(video_path) as clip:
+        has_audio = clip.audio is not None
+
+    if not has_audio:
         print("No audio track found in the video.")
-        return video_path
+        if output_path != video_path:
+            shutil.copyfile(video_path, output_path)
+        return output_path
+
+    with atomic_output(output_path, "muted", duration_of=video_path) as temp_output_path:
+        with VideoFileClip(video_path) as clip:
+            clip.with_volume_scaled(0).write_videofile(temp_output_path, codec="libx264")
+
+    print(f"Muted video saved as {os.path.basename(output_path)}")
+    return output_path
+
+
+def remove_silence(
+    video_path,
+    output_path=None,
+    threshold_db=-40.0,
+    min_silence=0.5,
+    padding=0.1,
+    segments=None,
+    encoder_profile=None,
+):
+    """
+    Cut the silent parts out of a video in a single decode/encode pass
+    - segments: the [(start, end), ...] keep-list to render, e.g. one already
+      previewed; detected from the audio (see audio_analysis.detect_silence)
+      when not given
+    """
+    from audio_analysis import detect_silence, keep_segments
+    from ffmpeg_utils import probe_video, render_segments
+
+    output_path = output_path or video_path
+    start_time = time.time()
+    duration = probe_video(video_path)["duration"]
+    if segments is None:
+        silences = detect_silence(video_path, threshold_db, min_silence, padding=padding)
+        segments = keep_segments(duration, silences)
+    kept = sum(end - start for start, end in segments)
+    print(
+        f"Removing silence from {os.path.basename(video_path)}: keeping {len(segments)} segments, "
+        f"{kept:.1f}s of {duration:.1f}s"
+    )
+
+    with atomic_output(output_path, "silence_removed") as temp_output_path:
+        render_segments(video_path, segments, temp_output_path, encoder_profile or ENCODER_PROFILE)
+
+    time_taken = round((time.time() - start_time), 2)
+    print(f"Saved silence-removed video as {os.path.basename(output_path)} in {time_taken}s")
+    return output_path
+
+
+def compress_static(
+    video_path,
+    output_path=None,
+    mode="vfr",
+    speed_factor=8,
+    threshold=1.0,
+    min_static=1.0,
+    encoder_profile=None,
+):
+    """
+    Shrink stretches where the picture doesn't change (screen recordings)
+    - mode "vfr" keeps a single frame's worth of each static run with the
+      original timing; the frame loops assume a constant frame rate, so use
+      it as the last step of a chain
+    - mode "speed" plays static runs speed_factor times faster
+    - See static_frames.detect_static_runs for threshold and min_static
+    """
+    from static_frames import compress_static_segments
+
+    output_path = output_path or video_path
+    start_time = time.time()
+    with atomic_output(output_path, f"static_{mode}") as temp_output_path:
+        compress_static_segments(
+            video_path, temp_output_path, mode, speed_factor, threshold, min_static,
+            encoder_profile or ENCODER_PROFILE,
+        )
+
+    time_taken = round((time.time() - start_time), 2)
+    print(f"Saved static-compressed video as {os.path.basename(output_path)} in {time_taken}s")
+    return output_path
+
 
+# Overwrite-in-place operations that can be chained and cached. Each takes the
+# input path first and accepts an output_path keyword.
+OPERATIONS = {
+    "crop": crop_video,
+    "trim": get_subclip,
+    "speed": speed_up_mp4_video,
+    "blur": blur_video,
+    "color": color_video,
+    "resize": stretch_video_dims,
+    "stabilize": stabilize_video,
+    "overlay": overlay_video,
+    "fps": change_frame_rate,
+    "mute": mute_video,
+    "silence": remove_silence,
+    "static": compress_static,
+}
+
+# Operations that re-encode the video with an encoder_profile; the others
+# copy the stream or encode with fixed settings
+ENCODED_OPERATIONS = {
+    "crop", "blur", "color", "resize", "stabilize", "overlay", "fps", "silence", "static",
+}
+
+def run_operation(name, input_video_path, output_path=None, encoder_profile=None, **params):
+    """Run an OPERATIONS entry; encoder_profile is ignored by operations outside ENCODED_OPERATIONS"""
+    if name not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {name}")
+    if encoder_profile is not None and name in ENCODED_OPERATIONS:
+        params = dict(params, encoder_profile=encoder_profile)
+    return OPERATIONS[name](input_video_path, **params, output_path=output_path)
 
 if __name__ == "__main__":
     file_path = r"C:\Users\matmi\Downloads\Untitled video - Made with Clipchamp (4).mp4"
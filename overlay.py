@@ -0,0 +1,220 @@
+import os
+import re
+
+import cv2
+import numpy as np
+
+POSITIONS = ("top-left", "top-right", "bottom-left", "bottom-right", "center", "bottom-center")
+
+# Overlay height as a share of the frame height, by kind
+DEFAULT_SIZES = {"image": 0.12, "text": 0.05}
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Pre-rendered patches by everything that shapes them; captions add one each,
+# so the cache is dropped once it grows past this
+_MAX_CACHED_PATCHES = 256
+_patch_cache = {}
+
+_SRT_TIME = re.compile(r"(\d+):(\d+):(\d+)[,.](\d+)")
+
+
+def _premultiply(bgr, alpha):
+    # Blending is out = (dst * (255 - a) + bgr * a) / 255; keep both terms
+    # ready as uint16 so compositing is one multiply-add per pixel
+    alpha = alpha.astype(np.uint16)[:, :, None]
+    return bgr.astype(np.uint16) * alpha, 255 - alpha
+
+
+def _trim(bgr, alpha):
+    # Drop fully transparent borders so compositing touches fewer pixels
+    rows = np.flatnonzero(alpha.any(axis=1))
+    cols = np.flatnonzero(alpha.any(axis=0))
+    if not len(rows):
+        return None
+    rows, cols = slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1)
+    return bgr[rows, cols], alpha[rows, cols]
+
+
+def render_text(text, height, color=(255, 255, 255), opacity=1.0):
+    """
+    Text as (bgr, alpha) uint8 arrays, each line height pixels tall and
+    centred, drawn anti-aliased with a black outline so it reads on any
+    background
+    """
+    lines = text.splitlines() or [""]
+    (_, line_height), baseline = cv2.getTextSize("Ag", FONT, 1.0, 2)
+    font_scale = height / (line_height + baseline)
+    thickness = max(1, int(round(font_scale * 2)))
+    outline = thickness + max(2, thickness)
+    sizes = [cv2.getTextSize(line, FONT, font_scale, outline)[0] for line in lines]
+    width = max(w for w, _ in sizes) + 2 * outline
+    canvas_height = height * len(lines) + 2 * outline
+
+    fill = np.zeros((canvas_height, width), dtype=np.uint8)
+    edge = np.zeros_like(fill)
+    for index, (line, (line_width, _)) in enumerate(zip(lines, sizes)):
+        origin = ((width - line_width) // 2, outline + height * index + int(round(line_height * font_scale)))
+        cv2.putText(edge, line, origin, FONT, font_scale, 255, outline, cv2.LINE_AA)
+        cv2.putText(fill, line, origin, FONT, font_scale, 255, thickness, cv2.LINE_AA)
+
+    # Text colour over a black outline: color = text * fill / alpha
+    alpha = np.maximum(edge, fill)
+    shade = np.divide(fill, alpha, out=np.zeros(fill.shape, dtype=np.float32), where=alpha > 0)
+    bgr = (shade[:, :, None] * np.array(color, dtype=np.float32)).astype(np.uint8)
+    return bgr, (alpha * opacity).astype(np.uint8)
+
+
+def load_image(image_path, height, opacity=1.0):
+    """An image (PNG alpha is kept) scaled to height pixels as (bgr, alpha) uint8 arrays"""
+    image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"Could not read overlay image {os.path.basename(image_path)}")
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if image.dtype != np.uint8:
+        image = (image / 257).astype(np.uint8)
+    width = max(1, int(round(image.shape[1] * height / image.shape[0])))
+    image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    if image.shape[2] == 4:
+        alpha = image[:, :, 3]
+    else:
+        alpha = np.full(image.shape[:2], 255, dtype=np.uint8)
+    return np.ascontiguousarray(image[:, :, :3]), (alpha * opacity).astype(np.uint8)
+
+
+def place(patch_size, frame_size, position="bottom-right", margin=0.03):
+    """Top-left corner (x, y) of a patch at position, margin a share of the frame height"""
+    if position not in POSITIONS:
+        raise ValueError(f"Unknown overlay position {position!r}, expected one of {', '.join(POSITIONS)}")
+    patch_width, patch_height = patch_size
+    width, height = frame_size
+    inset = int(round(height * margin))
+    vertical, _, horizontal = position.partition("-")
+    if position == "center":
+        vertical, horizontal = "center", "center"
+    x = {"left": inset, "right": width - patch_width - inset}.get(horizontal, (width - patch_width) // 2)
+    y = {"top": inset, "bottom": height - patch_height - inset}.get(vertical, (height - patch_height) // 2)
+    return x, y
+
+
+def prepare_patch(frame_size, image_path=None, text=None, position="bottom-right", size=None, opacity=0.8, margin=0.03):
+    """
+    The overlay for frames of frame_size=(w, h), pre-rendered once as
+    ((x, y), premultiplied bgr, 255 - alpha) clipped to the frame, or None
+    when nothing of it is visible
+    - size is the overlay height as a share of the frame height (per line
+      for text); cached until any setting or the image file changes
+    """
+    kind = "image" if image_path else "text"
+    stamp = os.stat(image_path).st_mtime_ns if image_path else None
+    key = (frame_size, image_path, stamp, text, position, size, opacity, margin)
+    if key in _patch_cache:
+        return _patch_cache[key]
+
+    height = max(2, int(round(frame_size[1] * (size or DEFAULT_SIZES[kind]))))
+    if image_path:
+        trimmed = _trim(*load_image(image_path, height, opacity))
+    else:
+        trimmed = _trim(*render_text(text or "", height, opacity=opacity))
+
+    patch = None
+    if trimmed is not None:
+        bgr, alpha = trimmed
+        x, y = place((bgr.shape[1], bgr.shape[0]), frame_size, position, margin)
+        # Clip to the frame, so later compositing never checks bounds
+        left, top = max(0, -x), max(0, -y)
+        right = min(bgr.shape[1], frame_size[0] - x)
+        bottom = min(bgr.shape[0], frame_size[1] - y)
+        if right > left and bottom > top:
+            patch = (x + left, y + top), *_premultiply(bgr[top:bottom, left:right], alpha[top:bottom, left:right])
+
+    if len(_patch_cache) >= _MAX_CACHED_PATCHES:
+        _patch_cache.clear()
+    _patch_cache[key] = patch
+    return patch
+
+
+def composite(frames, patch):
+    """
+    Blend a prepared patch into a (N, H, W, 3) batch (or one frame) in
+    place, touching only the pixels under its bounding box
+    """
+    (x, y), premultiplied, inverse_alpha = patch
+    height, width = inverse_alpha.shape[:2]
+    region = frames[..., y:y + height, x:x + width, :]
+    # uint16 throughout: dst * (255 - a) + bgr * a stays below 65536
+    blended = np.multiply(region, inverse_alpha, dtype=np.uint16)
+    blended += premultiplied
+    # Exact division by 255 with rounding, without leaving integers
+    blended += 128
+    blended += blended >> 8
+    blended >>= 8
+    region[...] = blended
+    return frames
+
+
+def overlay_batch(frames, **params):
+    """Overlay a (N, H, W, 3) batch in place; params as for prepare_patch"""
+    patch = prepare_patch((frames.shape[-2], frames.shape[-3]), **params)
+    if patch is not None:
+        composite(frames, patch)
+    return frames
+
+
+def overlay_frame(frame, **params):
+    return overlay_batch(frame, **params)
+
+
+def parse_srt(srt_path):
+    """Captions of an .srt file as [(start, end, text), ...] in seconds"""
+    with open(srt_path, encoding="utf-8-sig", errors="replace") as f:
+        blocks = re.split(r"\n\s*\n", f.read().replace("\r\n", "\n").strip())
+
+    captions = []
+    for block in blocks:
+        lines = block.strip().split("\n")
+        timing = next((i for i, line in enumerate(lines) if "-->" in line), None)
+        if timing is None:
+            continue
+        times = _SRT_TIME.findall(lines[timing])
+        if len(times) != 2:
+            continue
+        start, end = (int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 10 ** len(ms) for h, m, s, ms in times)
+        # Styling tags (<i>, {\an8}) can't be drawn, keep their text
+        text = re.sub(r"<[^>]+>|\{[^}]*\}", "", "\n".join(lines[timing + 1:])).strip()
+        if text and end > start:
+            captions.append((start, end, text))
+    return captions
+
+
+def overlay_edits(
+    image_path=None, text=None, srt_path=None, position="bottom-right", size=None, opacity=0.8,
+    margin=0.03, start=None, end=None,
+):
+    """
+    Frame edits (see transforms.apply_edits) for a watermark image and/or
+    text between start and end, plus one per caption of srt_path, drawn at
+    the bottom centre at full opacity
+    """
+    edits = []
+    common = {"position": position, "size": size, "opacity": opacity, "margin": margin}
+    if image_path:
+        edits.append({"op": "overlay", "params": dict(common, image_path=image_path), "start": start, "end": end})
+    if text:
+        params = dict(common, text=text)
+        if image_path:
+            # Below or above the image rather than on top of it
+            params["margin"] = margin + (size or DEFAULT_SIZES["image"]) + margin / 2
+        edits.append({"op": "overlay", "params": params, "start": start, "end": end})
+    if srt_path:
+        for caption_start, caption_end, caption in parse_srt(srt_path):
+            if start is not None and caption_end <= start or end is not None and caption_start >= end:
+                continue
+            edits.append({
+                "op": "overlay",
+                "params": {"text": caption, "position": "bottom-center", "size": size, "opacity": 1.0, "margin": margin},
+                "start": caption_start if start is None else max(start, caption_start),
+                "end": caption_end if end is None else min(end, caption_end),
+            })
+    return edits
@@ -0,0 +1,172 @@
+import threading
+
+import cv2
+from PIL import Image, ImageTk
+
+from main import open_video_capture
+
+
+def scale_to_fit(width, height, max_width, max_height, allow_upscale=False):
+    scale = min(max_width / width, max_height / height)
+    if not allow_upscale:
+        scale = min(scale, 1.0)
+    return scale
+
+
+def frame_to_preview(frame, max_width, max_height, allow_upscale=False):
+    """
+    Scale a BGR frame to fit max_width x max_height and convert it to a PIL
+    image. Returns (image, scale factor relative to the source frame).
+    """
+    original_height, original_width = frame.shape[:2]
+    scale = scale_to_fit(original_width, original_height, max_width, max_height, allow_upscale)
+    if scale != 1.0:
+        size = (max(1, int(original_width * scale)), max(1, int(original_height * scale)))
+        # INTER_AREA is both faster and cleaner than linear when shrinking
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        frame = cv2.resize(frame, size, interpolation=interpolation)
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)), scale
+
+
+def read_frame_at(cap, timestamp=None):
+    if timestamp is not None:
+        cap.set(cv2.CAP_PROP_POS_MSEC, timestamp * 1000)
+    ret, frame = cap.read()
+    return frame if ret else None
+
+
+def decode_preview_frame(video_path, timestamp=None, max_width=640, max_height=360, allow_upscale=False):
+    """One-shot decode of a scaled preview frame, returns (image, scale) or None"""
+    with open_video_capture(video_path) as cap:
+        frame = read_frame_at(cap, timestamp)
+    if frame is None:
+        return None
+    return frame_to_preview(frame, max_width, max_height, allow_upscale)
+
+
+class PreviewService:
+    """
+    Decodes and scales preview frames on a background thread so Tk callbacks
+    only queue work.
+    - Requests go to a channel ("crop", "blur", "trim", ...); a newer request
+      replaces one still waiting on the same channel, and a result that is
+      already stale when it finishes is dropped
+    - Captures stay open between requests for scrubbing and are owned by the
+      service; release() closes them once no decode is using them
+    - Finished images are handed back to Tk with root.after, where the
+      PhotoImage is built and the callback runs
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._generations = {}
+        self._captures = {}
+        self._released_paths = set()
+        self._capture_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(
+        self,
+        channel,
+        video_path,
+        callback,
+        timestamp=None,
+        max_size=(640, 360),
+        allow_upscale=False,
+        keep_open=False,
+        on_error=None,
+    ):
+        """
+        Queue a preview; callback(photo, image, scale) runs on the Tk thread.
+        - keep_open keeps the capture around for the next request (scrubbing)
+        """
+        with self._condition:
+            if keep_open:
+                self._released_paths.discard(video_path)
+            generation = self._generations.get(channel, 0) + 1
+            self._generations[channel] = generation
+            self._pending[channel] = (
+                generation, video_path, timestamp, max_size, allow_upscale, keep_open, callback, on_error
+            )
+            self._condition.notify()
+
+    def release(self, video_path=None):
+        """
+        Close the service's captures (all of them, or just video_path's).
+        Returns once no decode is using them, and they are not reopened until
+        a new keep_open request for the path arrives.
+        """
+        with self._condition:
+            paths = [video_path] if video_path else list(self._captures)
+            self._released_paths.update(paths)
+            for channel, request in list(self._pending.items()):
+                if request[1] in paths:
+                    del self._pending[channel]
+
+        with self._capture_lock:
+            for path in paths:
+                cap = self._captures.pop(path, None)
+                if cap is not None:
+                    cap.release()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self.release()
+
+    def _is_current(self, channel, generation):
+        with self._condition:
+            return self._generations.get(channel) == generation
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                channel = next(iter(self._pending))
+                request = self._pending.pop(channel)
+
+            generation, video_path, timestamp, max_size, allow_upscale, keep_open, callback, on_error = request
+            try:
+                result = self._decode(video_path, timestamp, max_size, allow_upscale, keep_open)
+                error = None if result else "Could not read video frame"
+            except Exception as e:
+                result, error = None, str(e)
+
+            if not self._is_current(channel, generation):
+                continue
+            self.root.after(0, self._deliver, channel, generation, result, error, callback, on_error)
+
+    def _decode(self, video_path, timestamp, max_size, allow_upscale, keep_open):
+        if not keep_open:
+            return decode_preview_frame(video_path, timestamp, *max_size, allow_upscale)
+
+        with self._capture_lock:
+            if video_path in self._released_paths:
+                return None
+            cap = self._captures.get(video_path)
+            if cap is None:
+                cap = cv2.VideoCapture(video_path)
+                self._captures[video_path] = cap
+            frame = read_frame_at(cap, timestamp)
+        if frame is None:
+            return None
+        return frame_to_preview(frame, *max_size, allow_upscale)
+
+    def _deliver(self, channel, generation, result, error, callback, on_error):
+        # A newer request may have been queued while this one waited for Tk
+        if not self._is_current(channel, generation):
+            return
+        if result is None:
+            if on_error:
+                on_error(error)
+            return
+        image, scale = result
+        callback(ImageTk.PhotoImage(image), image, scale)
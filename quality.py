@@ -0,0 +1,167 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from ffmpeg_utils import FFmpegReader, encoder_args, probe_video, run_ffmpeg
+from static_frames import frame_differences
+
+# CRFs tried per encoder, best quality first
+CRF_CANDIDATES = {
+    "libx264": [16, 18, 20, 22, 24, 26, 28, 30],
+    "libx265": [18, 20, 22, 24, 26, 28, 30, 32],
+    "libvpx-vp9": [24, 28, 31, 34, 37, 40, 44, 48],
+}
+
+# Quality is measured on the luma plane at this width at most; SSIM on
+# downscaled frames tracks full-size SSIM closely and costs far less
+METRIC_WIDTH = 640
+
+# Standard SSIM constants for 8-bit images
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+
+def psnr(reference, distorted):
+    """PSNR in dB of a (N, H, W) batch against its reference, one value per frame"""
+    error = (reference.astype(np.float32) - distorted.astype(np.float32)) ** 2
+    mse = error.reshape(len(error), -1).mean(axis=1)
+    return 10 * np.log10(255.0 ** 2 / np.maximum(mse, 1e-10))
+
+
+def _gaussian(frames):
+    # One blur call for the whole batch: frames become the channels of a
+    # single (H, W, N) image (OpenCV takes up to 512 channels)
+    stacked = np.ascontiguousarray(frames.transpose(1, 2, 0))
+    chunks = [
+        cv2.GaussianBlur(stacked[:, :, i:i + 512], (11, 11), 1.5).reshape(stacked.shape[0], stacked.shape[1], -1)
+        for i in range(0, stacked.shape[2], 512)
+    ]
+    return np.concatenate(chunks, axis=2).transpose(2, 0, 1)
+
+
+def ssim(reference, distorted):
+    """Mean SSIM (Gaussian window, sigma 1.5) of each frame of a (N, H, W) batch"""
+    x = reference.astype(np.float32)
+    y = distorted.astype(np.float32)
+    mu_x, mu_y = _gaussian(x), _gaussian(y)
+    mu_xx, mu_yy, mu_xy = mu_x * mu_x, mu_y * mu_y, mu_x * mu_y
+    sigma_xx = _gaussian(x * x) - mu_xx
+    sigma_yy = _gaussian(y * y) - mu_yy
+    sigma_xy = _gaussian(x * y) - mu_xy
+    ssim_map = ((2 * mu_xy + _C1) * (2 * sigma_xy + _C2)) / (
+        (mu_xx + mu_yy + _C1) * (sigma_xx + sigma_yy + _C2)
+    )
+    return ssim_map.reshape(len(ssim_map), -1).mean(axis=1)
+
+
+def choose_samples(video_path, count=4, sample_seconds=2.0):
+    """
+    Pick count sample windows [(start, duration), ...] spread over the
+    video's range of scene complexity, from one pass over thumbnails.
+    Windows are ranked by motion (mean frame difference) and taken at evenly
+    spaced ranks, always including the most complex one.
+    """
+    differences, fps = frame_differences(video_path)
+    differences[~np.isfinite(differences)] = 0
+    window = max(1, int(round(sample_seconds * float(fps))))
+    window_count = len(differences) // window
+    if window_count <= count:
+        # Short video: sample it whole
+        return [(0.0, len(differences) / float(fps))]
+
+    complexity = differences[: window_count * window].reshape(window_count, window).mean(axis=1)
+    order = np.argsort(complexity)
+    picks = sorted({int(order[int(round(i))]) for i in np.linspace(0, window_count - 1, count)})
+    return [(pick * window / float(fps), window / float(fps)) for pick in picks]
+
+
+def _luma_frames(video_path, start=None, frames=None, size=None):
+    with FFmpegReader(video_path, start=start, frames=frames, size=size, pix_fmt="gray") as reader:
+        return np.stack([frame[:, :, 0].copy() for frame in reader])
+
+
+def _encode_sample(video_path, start, duration, profile, output_path, threads):
+    run_ffmpeg(
+        ["-ss", f"{start:.3f}", "-t", f"{duration:.3f}", "-i", video_path, "-map", "0:v:0", "-an"]
+        + encoder_args(profile) + ["-threads", str(threads), output_path]
+    )
+    return output_path
+
+
+def find_crf(video_path, profile, target_ssim=0.98, min_psnr=None, samples=4, sample_seconds=2.0, workers=None):
+    """
+    The highest CRF whose encode keeps every sample at or above target_ssim
+    (and min_psnr, when given), without encoding the whole video.
+    - Samples are chosen by choose_samples and compared with the source on
+      the luma plane
+    - The candidate CRFs are bisected (quality falls as CRF rises), each step
+      encoding and measuring all samples in parallel
+    - Returns (crf, results) where results maps each tried crf -> (worst
+      ssim, worst psnr, bytes per second of the samples); crf is the lowest
+      candidate if none meets the target
+    """
+    start_time = time.time()
+    candidates = CRF_CANDIDATES.get(profile["codec"])
+    if candidates is None:
+        raise ValueError(f"No CRF candidates for encoder {profile['codec']}")
+
+    info = probe_video(video_path)
+    width = min(info["width"], METRIC_WIDTH)
+    size = (width, max(2, int(round(info["height"] * width / info["width"] / 2)) * 2))
+    windows = choose_samples(video_path, samples, sample_seconds)
+    workers = workers or min(len(windows), os.cpu_count() or 1)
+    # Parallel encodes share the cores instead of each starting a thread per core
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    work_dir = tempfile.mkdtemp(prefix="crf_search_")
+    try:
+        def reference(window):
+            start, duration = window
+            return _luma_frames(video_path, start, int(round(duration * float(info["fps"]))), size)
+
+        def measure(index, crf):
+            start, duration = windows[index]
+            path = os.path.join(work_dir, f"{index}_{crf}.mkv")
+            _encode_sample(video_path, start, duration, dict(profile, crf=crf), path, threads)
+            encoded = _luma_frames(path, size=size)
+            source = references[index]
+            frames = min(len(source), len(encoded))
+            return (
+                float(ssim(source[:frames], encoded[:frames]).min()),
+                float(psnr(source[:frames], encoded[:frames]).min()),
+                os.path.getsize(path) / duration,
+            )
+
+        results = {}
+        chosen = candidates[0]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            references = list(pool.map(reference, windows))
+            low, high = 0, len(candidates) - 1
+            while low <= high:
+                middle = (low + high) // 2
+                crf = candidates[middle]
+                scores = list(pool.map(lambda index: measure(index, crf), range(len(windows))))
+                results[crf] = (
+                    min(score[0] for score in scores),
+                    min(score[1] for score in scores),
+                    sum(score[2] for score in scores) / len(scores),
+                )
+                worst_ssim, worst_psnr, _ = results[crf]
+                if worst_ssim >= target_ssim and (min_psnr is None or worst_psnr >= min_psnr):
+                    chosen = crf
+                    low = middle + 1
+                else:
+                    high = middle - 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(
+        f"CRF search for {os.path.basename(video_path)}: CRF {chosen} meets SSIM {target_ssim} "
+        f"({len(windows)} samples, {len(results)} CRFs tried in {round(time.time() - start_time, 2)}s)"
+    )
+    return chosen, dict(sorted(results.items()))
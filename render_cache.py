@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from main import ENCODED_OPERATIONS, ENCODER_PROFILE, run_operation
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "VIDEO_EDITOR_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "video-editor", "renders"),
+)
+DEFAULT_QUOTA_MB = int(os.environ.get("VIDEO_EDITOR_CACHE_QUOTA_MB", "5120"))
+
+# Bump when the meaning of a cached render changes without its inputs changing
+CACHE_VERSION = 1
+
+
+def referenced_files(params):
+    """
+    Paths of the files a step or edit reads, found under any *_path key of
+    params, including those nested in lists and dicts (overlays[*].params)
+    """
+    files = []
+    if isinstance(params, dict):
+        for key, value in params.items():
+            if key.endswith("_path") and isinstance(value, str) and os.path.isfile(value):
+                files.append(os.path.abspath(value))
+            else:
+                files += referenced_files(value)
+    elif isinstance(params, (list, tuple)):
+        for value in params:
+            files += referenced_files(value)
+    return sorted(set(files))
+
+
+class RenderCache:
+    """
+    Non-destructive output mode: operations render into a content-addressed
+    cache instead of overwriting their input.
+    - Key = hash(input content, operation chain, parameters, encoder profile);
+      the profile only counts for steps that encode with it, and files the
+      parameters point at (LUTs, watermarks, captions) count by content
+    - Every prefix of a chain is cached, so changing the last step re-uses
+      the earlier ones
+    - Least recently used entries are evicted once the quota is exceeded
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, quota_mb=DEFAULT_QUOTA_MB):
+        self.cache_dir = cache_dir
+        self.quota_bytes = quota_mb * 1024 * 1024
+        self._content_hashes = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def content_hash(self, path):
+        # Hashing a long recording takes a while, so remember it until the
+        # file changes on disk
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if memo_key in self._content_hashes:
+            return self._content_hashes[memo_key]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+        self._content_hashes[memo_key] = content_hash
+        return content_hash
+
+    def step_key(self, parent_key, name, params, encoder_profile):
+        payload = json.dumps(
+            {
+                "version": CACHE_VERSION,
+                "parent": parent_key,
+                "operation": name,
+                "params": params,
+                "encoder": encoder_profile,
+                # Editing a LUT or watermark in place keeps its path
+                "files": {path: self.content_hash(path) for path in referenced_files(params)},
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def entry_path(self, key, ext):
+        return os.path.join(self.cache_dir, key + ext)
+
+    def lookup(self, key, ext):
+        path = self.entry_path(key, ext)
+        if not os.path.exists(path):
+            return None
+        # mtime doubles as the LRU timestamp
+        os.utime(path)
+        return path
+
+    def _key_lock(self, key):
+        # Concurrent jobs rendering the same step wait for one render rather
+        # than writing the same entry twice
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def render(self, input_video_path, chain, encoder_profile=None, on_step=None):
+        """
+        Run chain, a list of (operation name, params dict), without touching
+        input_video_path. Returns the path of the cached result.
+        - on_step(index, name) is called before each step; raising from it
+          stops the chain between steps
+        """
+        if encoder_profile is None:
+            encoder_profile = ENCODER_PROFILE
+        _, ext = os.path.splitext(input_video_path)
+
+        key = self.content_hash(input_video_path)
+        current_path = input_video_path
+        for index, (name, params) in enumerate(chain):
+            if on_step:
+                on_step(index, name)
+            step_profile = encoder_profile if name in ENCODED_OPERATIONS else None
+            key = self.step_key(key, name, params, step_profile)
+            with self._key_lock(key):
+                cached_path = self.lookup(key, ext)
+                if cached_path:
+                    print(f"Render cache hit for {name} ({key[:12]})")
+                    current_path = cached_path
+                    continue
+
+                start_time = time.time()
+                current_path = run_operation(
+                    name, current_path, output_path=self.entry_path(key, ext),
+                    encoder_profile=step_profile, **params
+                )
+                print(
+                    f"Render cache stored {name} ({key[:12]}) in {round(time.time() - start_time, 2)}s"
+                )
+            self.evict(keep=current_path)
+
+        return current_path
+
+    def evict(self, keep=None):
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                # Skip in-progress atomic_output temp files
+                if "_temp" in name or not os.path.isfile(path):
+                    continue
+                stat = os.stat(path)
+                total += stat.st_size
+                # The render just handed to the caller is never evicted
+                if path != keep:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            for _, size, path in sorted(entries):
+                if total <= self.quota_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    # Still being read by someone; try again next time
+                    pass
+
+    def clear(self):
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if os.path.isfile(path):
+                    os.remove(path)
+
+
+_default_cache = None
+
+
+def get_render_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RenderCache()
+    return _default_cache
+
+
+def render_non_destructive(input_video_path, chain, encoder_profile=None, on_step=None):
+    return get_render_cache().render(input_video_path, chain, encoder_profile, on_step)
@@ -0,0 +1,265 @@
+"""
+Frame sampling for analysis and model inference.
+
+    with FrameSampler("talk.mp4", fps=1, size=(224, 224), colorspace="rgb") as sampler:
+        for timestamps, frames in sampler:
+            model.predict(frames)          # frames: (N, 224, 224, 3) uint8
+
+    results = map_videos(paths, embed_batch, fps=0.5, size=(224, None))
+"""
+import bisect
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+
+import numpy as np
+
+from ffmpeg_utils import FFmpegReader, frame_shape, get_keyframe_times, probe_video
+
+COLORSPACES = {"rgb": "rgb24", "bgr": "bgr24", "gray": "gray"}
+
+# Starting a new ffmpeg reader costs about as much as decoding this many
+# frames; a seek is only worth it when it skips more than that
+SEEK_COST_FRAMES = 30
+
+# Below this sample interval (seconds) samples are too close together for a
+# seek to ever skip anything, and the keyframe index isn't read at all
+MIN_SEEK_INTERVAL = 1.0
+
+# A sample at time t shows the frame on screen at t, floor(t * fps); this
+# share of a frame absorbs timestamps rounded to the container's time base
+FRAME_EPSILON = 0.01
+
+
+def sample_times(duration, fps, start=0.0, end=None):
+    """Evenly spaced sample timestamps from start (inclusive) to end (exclusive)"""
+    end = duration if end is None else min(end, duration)
+    count = max(0, int(np.ceil((end - start) * fps - 1e-6)))
+    return [start + float(index / Fraction(fps)) for index in range(count)]
+
+
+def frame_index(timestamp, native_fps):
+    """Index of the source frame on screen at timestamp"""
+    return int(np.floor(timestamp * float(native_fps) + FRAME_EPSILON))
+
+
+def select_expression(start, fps, first, last, native_fps, seek):
+    """
+    ffmpeg select expression keeping the frames shown at sample times
+    start + j / fps for j in [first, last], for a decode that seeked to seek
+    - Each frame's index comes from its pts (t + seek after the seek resets
+      timestamps), and it is kept when the first sample at or after its
+      start still falls before the next frame, matching frame_index
+    """
+    native, rate = float(native_fps), float(fps)
+    return (
+        f"st(0,round((t+{seek!r})*{native!r}));"
+        f"st(1,max(ceil(((ld(0)-{FRAME_EPSILON})/{native!r}-{start!r})*{rate!r}),{first}));"
+        f"lte(ld(1),{last})*lt(({start!r}+ld(1)/{rate!r})*{native!r}+{FRAME_EPSILON},ld(0)+1)"
+    )
+
+
+def plan_spans(times, keyframes, native_fps, seek_cost_frames=SEEK_COST_FRAMES):
+    """
+    Group sample times into spans that are each decoded by one reader.
+    - Between two samples, decoding straight through costs one frame per
+      source frame; seeking costs seek_cost_frames plus the frames from the
+      keyframe before the next sample up to it
+    - A new span starts wherever the seek is cheaper, so sparse sampling of
+      long-GOP video skips the spans nobody asked for
+    """
+    if not times:
+        return []
+    spans = [[times[0]]]
+    for previous, current in zip(times, times[1:]):
+        index = bisect.bisect_right(keyframes, current + 1e-6) - 1
+        keyframe = keyframes[index] if index >= 0 else 0.0
+        straight = (current - previous) * native_fps
+        seek = seek_cost_frames + (current - keyframe) * native_fps
+        if keyframe > previous and seek < straight:
+            spans.append([current])
+        else:
+            spans[-1].append(current)
+    return spans
+
+
+def _output_size(info, size):
+    # (w, None) or (None, h) keeps the aspect ratio; even sizes suit every pix_fmt
+    if size is None:
+        return None
+    width, height = size
+    if width is None and height is None:
+        return None
+    if width is None:
+        width = max(2, int(round(info["width"] * height / info["height"] / 2)) * 2)
+    if height is None:
+        height = max(2, int(round(info["height"] * width / info["width"] / 2)) * 2)
+    return int(width), int(height)
+
+
+class FrameSampler:
+    """
+    Frames of one video at a chosen rate, size and colorspace, as batches.
+    - Iterating yields (timestamps, frames): a list of seconds and a fresh
+      (N, H, W, C) uint8 array (C is 1 for gray) of up to batch_size frames
+    - Each sample is the frame on screen at its timestamp (see
+      frame_index); frames are picked by pts in ffmpeg, so skipped frames
+      are never scaled or converted, and repeated when fps is above the
+      source rate
+    - Sparse sampling seeks through the keyframe index (see plan_spans)
+      instead of decoding everything in between
+    - prefetch > 0 decodes that many batches ahead on a background thread
+    """
+
+    def __init__(
+        self, video_path, fps=None, size=None, colorspace="rgb", batch_size=32,
+        start=0.0, end=None, prefetch=0,
+    ):
+        if colorspace not in COLORSPACES:
+            raise ValueError(f"Unknown colorspace {colorspace!r}, expected one of {sorted(COLORSPACES)}")
+        self.video_path = video_path
+        self.info = probe_video(video_path)
+        self.fps = Fraction(fps).limit_denominator(1001) if fps else self.info["fps"]
+        self.size = _output_size(self.info, size)
+        self.pix_fmt = COLORSPACES[colorspace]
+        width, height = self.size or (self.info["width"], self.info["height"])
+        self.shape = frame_shape(self.pix_fmt, width, height)
+        self.batch_size = batch_size
+        self.start = start
+        self.end = end
+        self.prefetch = prefetch
+
+        self._readers = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def spans(self):
+        """The sample times grouped into spans, one reader each"""
+        duration = self.info["duration"]
+        if duration is None:
+            raise ValueError(f"Unknown duration for {self.video_path}")
+        times = sample_times(duration, self.fps, self.start, self.end)
+        native_fps = float(self.info["fps"])
+        if not times or 1 / float(self.fps) < MIN_SEEK_INTERVAL:
+            return [times] if times else []
+        return plan_spans(times, get_keyframe_times(self.video_path), native_fps)
+
+    def _open_span(self, span):
+        # Decode from just before the first sample's frame, keeping only the
+        # frames the span's samples show
+        native_fps = self.info["fps"]
+        first = int(round((span[0] - self.start) * self.fps))
+        first_frame = frame_index(span[0], native_fps)
+        seek = max(0.0, (first_frame - 0.5) / float(native_fps))
+        select = select_expression(self.start, self.fps, first, first + len(span) - 1, native_fps, seek)
+        distinct = len({frame_index(t, native_fps) for t in span})
+        return FFmpegReader(
+            self.video_path, start=seek, frames=distinct, size=self.size,
+            pix_fmt=self.pix_fmt, info=self.info, select=select,
+        )
+
+    def _batches(self):
+        native_fps = self.info["fps"]
+        batch = np.empty((self.batch_size, *self.shape), dtype=np.uint8)
+        frame = np.empty(self.shape, dtype=np.uint8)
+        timestamps = []
+        for span in self.spans():
+            reader = self._open_span(span)
+            self._readers.append(reader)
+            try:
+                current = None
+                for timestamp in span:
+                    if self._stop.is_set():
+                        break
+                    # Samples closer together than source frames repeat a frame
+                    index = frame_index(timestamp, native_fps)
+                    if index != current:
+                        if not reader.readinto(frame):
+                            break
+                        current = index
+                    batch[len(timestamps)] = frame
+                    timestamps.append(timestamp)
+                    if len(timestamps) == self.batch_size:
+                        yield timestamps, batch.copy()
+                        timestamps = []
+            finally:
+                reader.close()
+                self._readers.remove(reader)
+            if self._stop.is_set():
+                return
+        if timestamps:
+            yield timestamps, batch[:len(timestamps)].copy()
+
+    def _put(self, output, item):
+        # Gives up once the consumer has closed the sampler and stopped reading
+        while not self._stop.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _prefetch(self, output):
+        try:
+            for item in self._batches():
+                self._put(output, item)
+        except Exception as e:
+            self._put(output, e)
+        self._put(output, None)
+
+    def __iter__(self):
+        self._stop.clear()
+        if not self.prefetch:
+            yield from self._batches()
+            return
+
+        output = queue.Queue(maxsize=self.prefetch)
+        self._thread = threading.Thread(target=self._prefetch, args=(output,), daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                item = output.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop prefetching and end any decode still running"""
+        self._stop.set()
+        for reader in list(self._readers):
+            reader.proc.kill()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _map_video(video_path, function, options):
+    with FrameSampler(video_path, **options) as sampler:
+        return [function(video_path, timestamps, frames) for timestamps, frames in sampler]
+
+
+def map_videos(video_paths, function, workers=None, **options):
+    """
+    Run function(video_path, timestamps, frames) on every batch of every
+    video, one video per worker process; options are FrameSampler's.
+    - function must be picklable (defined at module level) and should return
+      something small (scores, embeddings) rather than the frames
+    - Returns {video_path: [result per batch]} in the order of video_paths
+    """
+    video_paths = list(video_paths)
+    workers = workers or min(len(video_paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_map_video, path, function, options) for path in video_paths]
+        return {path: future.result() for path, future in zip(video_paths, futures)}
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import nullcontext
+
+import cv2
+import numpy as np
+
+from ffmpeg_utils import FFmpegReader, FFmpegWriter, probe_video, yuv_planes
+from frame_store import FrameStore
+from main import BATCH_SIZE, ENCODER_PROFILE, atomic_output
+
+# Motion is estimated on grayscale frames this wide; tracking is far
+# cheaper and the estimate barely changes
+ANALYSIS_WIDTH = 320
+
+MOTION_CACHE_DIR = os.environ.get(
+    "VIDEO_EDITOR_MOTION_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "video-editor", "motion"),
+)
+
+# Bump when the analysis changes meaning, so old sidecars are recomputed
+MOTION_VERSION = 1
+
+
+def _motion_file_candidates(video_path):
+    # Next to the video when possible, in the user cache otherwise
+    name = hashlib.sha1(os.path.abspath(video_path).encode()).hexdigest() + ".motion.json"
+    return [video_path + ".motion.json", os.path.join(MOTION_CACHE_DIR, name)]
+
+
+def _fingerprint(video_path, analysis_width):
+    stat = os.stat(video_path)
+    return {
+        "version": MOTION_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "analysis_width": analysis_width,
+    }
+
+
+def _gray_frames(video_path, info, size, store=None):
+    # Downscaled gray frames, decoded by ffmpeg or taken from a yuv420p
+    # store's luma plane
+    if store is not None:
+        for index in range(len(store)):
+            luma = yuv_planes(store.yuv(index), info["width"], info["height"])[0]
+            yield cv2.resize(luma, size, interpolation=cv2.INTER_AREA)
+        return
+    with FFmpegReader(video_path, size=size, pix_fmt="gray", info=info) as reader:
+        for batch in reader.batches(BATCH_SIZE):
+            for frame in batch:
+                yield frame[:, :, 0].copy()
+
+
+def estimate_motion(video_path, analysis_width=ANALYSIS_WIDTH, store=None):
+    """
+    Frame-to-frame camera motion as a (N, 3) array of (dx, dy, angle):
+    how far each frame's content moved from the previous frame, in full
+    resolution pixels and radians. The first row is zero.
+    - Corners are tracked with pyramidal Lucas-Kanade on downscaled gray
+      frames and fitted with a rotation + translation (+ uniform scale)
+      model, which rejects outliers with RANSAC
+    - store, a full-size yuv420p FrameStore of the video, is read instead
+      of decoding it
+    """
+    info = probe_video(video_path)
+    width = min(analysis_width, info["width"])
+    height = max(2, int(round(info["height"] * width / info["width"] / 2)) * 2)
+    scale_x, scale_y = info["width"] / width, info["height"] / height
+    min_distance = max(5, width // 32)
+
+    motion = []
+    previous = None
+    for current in _gray_frames(video_path, info, (width, height), store):
+        step = (0.0, 0.0, 0.0)
+        if previous is not None:
+            points = cv2.goodFeaturesToTrack(
+                previous, maxCorners=200, qualityLevel=0.01, minDistance=min_distance, blockSize=3
+            )
+            if points is not None and len(points) >= 6:
+                tracked, status, _ = cv2.calcOpticalFlowPyrLK(previous, current, points, None)
+                valid = status.ravel() == 1
+                if valid.sum() >= 6:
+                    matrix, _ = cv2.estimateAffinePartial2D(points[valid], tracked[valid])
+                    if matrix is not None:
+                        step = (
+                            float(matrix[0, 2] * scale_x),
+                            float(matrix[1, 2] * scale_y),
+                            float(np.arctan2(matrix[1, 0], matrix[0, 0])),
+                        )
+        motion.append(step)
+        previous = current
+    return np.array(motion, dtype=np.float64).reshape(-1, 3)
+
+
+def cached_motion(video_path, analysis_width=ANALYSIS_WIDTH):
+    """The motion from the video's sidecar, or None when it is missing or stale"""
+    fingerprint = _fingerprint(video_path, analysis_width)
+    for path in _motion_file_candidates(video_path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if cached.get("source") == fingerprint:
+            return np.array(cached["motion"], dtype=np.float64).reshape(-1, 3)
+    return None
+
+
+def get_motion(video_path, analysis_width=ANALYSIS_WIDTH, store=None):
+    """
+    estimate_motion, read from the video's motion sidecar when it was made
+    from the same file and settings, and stored there otherwise. Smoothing
+    and crop settings are applied at render time, so changing them never
+    re-runs the analysis.
+    """
+    motion = cached_motion(video_path, analysis_width)
+    if motion is not None:
+        return motion
+
+    start_time = time.time()
+    motion = estimate_motion(video_path, analysis_width, store)
+    payload = {"source": _fingerprint(video_path, analysis_width), "motion": np.round(motion, 4).tolist()}
+    for path in _motion_file_candidates(video_path):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            temp_path = path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(temp_path, path)
+            break
+        except OSError:
+            continue
+    print(
+        f"Analysed motion of {os.path.basename(video_path)} ({len(motion)} frames) "
+        f"in {round(time.time() - start_time, 2)}s"
+    )
+    return motion
+
+
+def smooth_corrections(motion, smoothing=30):
+    """
+    Per-frame (dx, dy, angle) corrections that move each frame from the
+    camera's actual path onto a moving average of it over
+    2 * smoothing + 1 frames
+    """
+    trajectory = np.cumsum(motion, axis=0)
+    if smoothing <= 0 or len(trajectory) == 0:
+        return np.zeros_like(trajectory)
+    window = 2 * int(smoothing) + 1
+    padded = np.pad(trajectory, ((smoothing, smoothing), (0, 0)), mode="edge")
+    kernel = np.ones(window) / window
+    smoothed = np.stack([np.convolve(padded[:, axis], kernel, mode="valid") for axis in range(3)], axis=1)
+    return smoothed - trajectory
+
+
+def warp_matrices(corrections, frame_size, box=None, margin=0.05):
+    """
+    One 2x3 matrix per frame doing the stabilising correction and the crop
+    in a single warp.
+    - The correction rotates about the frame centre and then translates
+    - The output is box (XYXY, the whole frame by default) with margin
+      (a fraction of its size) trimmed from every side and scaled back up
+      to the box size, which hides the borders the correction uncovers
+    """
+    width, height = frame_size
+    left, top, right, bottom = box or (0, 0, width, height)
+    out_width, out_height = right - left, bottom - top
+    inner_left = left + out_width * margin
+    inner_top = top + out_height * margin
+    zoom = 1 / (1 - 2 * margin)
+    crop = np.array([
+        [zoom, 0, -inner_left * zoom],
+        [0, zoom, -inner_top * zoom],
+        [0, 0, 1],
+    ])
+
+    center_x, center_y = width / 2, height / 2
+    matrices = np.empty((len(corrections), 2, 3))
+    for index, (dx, dy, angle) in enumerate(corrections):
+        cos, sin = np.cos(angle), np.sin(angle)
+        correction = np.array([
+            [cos, -sin, center_x - cos * center_x + sin * center_y + dx],
+            [sin, cos, center_y - sin * center_x - cos * center_y + dy],
+            [0, 0, 1],
+        ])
+        matrices[index] = (crop @ correction)[:2]
+    return matrices, (out_width, out_height)
+
+
+def stabilize(
+    video_path, output_path, smoothing=30, margin=0.05, box=None, encoder_profile=None,
+    analysis_width=ANALYSIS_WIDTH,
+):
+    """
+    Stabilise video_path into output_path, cropping to box in the same
+    warp (see warp_matrices). Motion comes from get_motion's sidecar cache.
+    - Without a cached analysis the video is decoded once into a yuv420p
+      FrameStore that both the analysis and the render read; videos over
+      the store's limit are decoded twice instead
+    """
+    if not 0 <= margin < 0.5:
+        raise ValueError("Crop margin must be between 0 and 0.5")
+    store = None
+    if cached_motion(video_path, analysis_width) is None:
+        try:
+            store = FrameStore(video_path, pix_fmt="yuv420p")
+        except ValueError as e:
+            print(f"{e}; decoding {os.path.basename(video_path)} twice instead")
+    try:
+        _stabilize(video_path, output_path, smoothing, margin, box, encoder_profile, analysis_width, store)
+    finally:
+        if store is not None:
+            store.close()
+    return output_path
+
+
+def _stabilize(video_path, output_path, smoothing, margin, box, encoder_profile, analysis_width, store):
+    motion = get_motion(video_path, analysis_width, store)
+    start_time = time.time()
+    info = probe_video(video_path)
+    matrices, size = warp_matrices(
+        smooth_corrections(motion, smoothing), (info["width"], info["height"]), box, margin
+    )
+    out_width, out_height = size
+
+    with atomic_output(output_path, "stabilized", duration_of=video_path) as temp_output_path:
+        # The store is closed by stabilize, once the render is done
+        with FFmpegReader(video_path, info=info) if store is None else nullcontext(store) as reader:
+            with FFmpegWriter(
+                temp_output_path, size, info["fps"], encoder_profile or ENCODER_PROFILE, audio_source=video_path
+            ) as out:
+                warped = np.empty((BATCH_SIZE, out_height, out_width, 3), dtype=np.uint8)
+                index = 0
+                for batch in reader.batches(BATCH_SIZE):
+                    for frame, target in zip(batch, warped):
+                        # The decoder may return a frame or two more than the analysis saw
+                        matrix = matrices[min(index, len(matrices) - 1)]
+                        cv2.warpAffine(
+                            frame, matrix, size, dst=target, flags=cv2.INTER_LINEAR,
+                            borderMode=cv2.BORDER_REPLICATE,
+                        )
+                        index += 1
+                    out.write(warped[:len(batch)])
+
+    print(
+        f"Stabilised {os.path.basename(video_path)} into {os.path.basename(output_path)} "
+        f"in {round(time.time() - start_time, 2)}s"
+    )
@@ -0,0 +1,147 @@
+import os
+import time
+
+import numpy as np
+
+from ffmpeg_utils import (
+    FFmpegReader, encoder_args, filter_script, filtered_audio_codec, probe_video, run_ffmpeg
+)
+
+# Frames are compared as small grayscale thumbnails: enough to tell a still
+# screen from a changing one, and decoding them costs little
+ANALYSIS_WIDTH = 160
+ANALYSIS_BATCH = 64
+
+
+def frame_differences(video_path, width=ANALYSIS_WIDTH):
+    """
+    Mean absolute difference (0-255) between each frame and the previous one,
+    from one streaming pass over downscaled grayscale frames. The first
+    frame's difference is inf.
+    """
+    info = probe_video(video_path)
+    height = max(2, int(round(info["height"] * width / info["width"] / 2)) * 2)
+    differences = []
+    previous = None
+    with FFmpegReader(video_path, size=(width, height), pix_fmt="gray", info=info) as reader:
+        for batch in reader.batches(ANALYSIS_BATCH):
+            frames = batch.astype(np.int16)
+            if previous is None:
+                differences.append(np.array([np.inf]))
+            else:
+                differences.append(np.abs(frames[:1] - previous).mean(axis=(1, 2, 3)))
+            differences.append(np.abs(frames[1:] - frames[:-1]).mean(axis=(1, 2, 3)))
+            previous = frames[-1:]
+    return np.concatenate(differences) if differences else np.empty(0), info["fps"]
+
+
+def detect_static_runs(video_path, threshold=1.0, min_static=1.0, width=ANALYSIS_WIDTH):
+    """
+    Runs of (near-)identical frames as [(first_frame, last_frame), ...],
+    inclusive, each at least min_static seconds long.
+    - A frame is static when it differs from the previous one by at most
+      threshold (mean absolute difference of the thumbnails, 0-255), which
+      lets a blinking cursor or compression noise through
+    Returns (runs, fps, frame_count).
+    """
+    differences, fps = frame_differences(video_path, width)
+    static = differences <= threshold
+    edges = np.diff(np.concatenate([[False], static, [False]]).astype(np.int8))
+    # A run starts at the frame before its first static frame: the one the
+    # following frames repeat
+    starts = np.flatnonzero(edges == 1) - 1
+    ends = np.flatnonzero(edges == -1) - 1
+    min_frames = max(2, int(round(min_static * float(fps))))
+    runs = [
+        (int(first), int(last)) for first, last in zip(starts, ends) if last - first + 1 >= min_frames
+    ]
+    return runs, fps, len(differences)
+
+
+def _frame_condition(runs, inner=False):
+    # between() over frame numbers n; inner skips each run's first and last frame
+    offset = 1 if inner else 0
+    return "+".join(f"between(n,{first + offset},{last - offset})" for first, last in runs)
+
+
+def render_static_vfr(video_path, runs, output_path, profile):
+    """
+    Encode one frame at each end of every static run and drop the ones in
+    between, keeping the original timestamps (variable frame rate). Audio
+    is untouched, so it is copied when the container allows.
+    """
+    runs = [(first, last) for first, last in runs if last - first >= 2]
+    graph = "[0:v]null[v]" if not runs else f"[0:v]select='not({_frame_condition(runs, inner=True)})'[v]"
+    same_container = os.path.splitext(video_path)[1].lower() == os.path.splitext(output_path)[1].lower()
+    with filter_script(graph) as script_path:
+        args = [
+            "-i", video_path, "-filter_complex_script", script_path,
+            "-map", "[v]", "-map", "0:a?", "-fps_mode", "vfr",
+            "-c:a", "copy" if same_container else filtered_audio_codec(output_path, profile),
+            # With B-frames the mp4 muxer cuts the stream's duration short
+            # when the last frame is held for a long time
+            "-bf", "0",
+        ]
+        run_ffmpeg(args + encoder_args(profile) + [output_path])
+    return output_path
+
+
+def render_static_speedup(video_path, runs, output_path, profile, speed_factor=8):
+    """
+    Play static runs speed_factor times faster at the original frame rate.
+    - Every speed_factor-th frame of a run is kept and the rest dropped
+    - A sped-up run keeps only as much of its audio as its new length,
+      the start of it, so everything after stays in sync
+    """
+    info = probe_video(video_path)
+    fps = float(info["fps"])
+    step = max(1, int(round(speed_factor)))
+    if runs:
+        static = _frame_condition(runs)
+        video_condition = "+".join(
+            f"between(n,{first},{last})*not(mod(n-{first},{step}))" for first, last in runs
+        )
+        # select leaves the stream without a frame rate, so the source's is
+        # given to both the timestamps and the encoder (ffmpeg would pick 25)
+        graph = f"[0:v]select='not({static})+{video_condition}',setpts=N/({info['fps']})/TB[v]"
+    else:
+        graph = "[0:v]null[v]"
+
+    has_audio = info["audio_codec"] is not None
+    if has_audio:
+        if runs:
+            # Audio of a run lasts as long as the frames kept from it
+            cut = "+".join(
+                f"between(t,{(first + (last - first) // step + 1) / fps:.4f},{(last + 1) / fps:.4f})"
+                for first, last in runs
+            )
+            graph += f";[0:a]aselect='not({cut})',asetpts=N/SR/TB[a]"
+        else:
+            graph += ";[0:a]anull[a]"
+
+    with filter_script(graph) as script_path:
+        args = ["-i", video_path, "-filter_complex_script", script_path, "-map", "[v]", "-r", str(info["fps"])]
+        if has_audio:
+            args += ["-map", "[a]", "-c:a", filtered_audio_codec(output_path, profile)]
+        run_ffmpeg(args + encoder_args(profile) + [output_path])
+    return output_path
+
+
+def compress_static_segments(
+    video_path, output_path, mode="vfr", speed_factor=8, threshold=1.0, min_static=1.0, profile=None
+):
+    """Detect static runs in video_path and render them with render_static_vfr or render_static_speedup"""
+    start_time = time.time()
+    runs, fps, frame_count = detect_static_runs(video_path, threshold, min_static)
+    static_frames = sum(last - first + 1 for first, last in runs)
+    print(
+        f"Found {len(runs)} static runs in {os.path.basename(video_path)}: {static_frames}/{frame_count} "
+        f"frames in {round(time.time() - start_time, 2)}s"
+    )
+    if mode == "vfr":
+        render_static_vfr(video_path, runs, output_path, profile)
+    elif mode == "speed":
+        render_static_speedup(video_path, runs, output_path, profile, speed_factor)
+    else:
+        raise ValueError(f"Unknown static segment mode: {mode}")
+    return runs
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ffmpeg_utils import run_ffmpeg  # noqa: E402
+
+
+def make_clip(path, seconds, fps="30", size="160x120", audio_seconds=None, gop=None, args=()):
+    """A test pattern clip (testsrc2 shows a frame counter), with sine audio when audio_seconds is set"""
+    command = ["-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration={seconds}"]
+    if audio_seconds:
+        command += ["-f", "lavfi", "-i", f"sine=frequency=440:duration={audio_seconds}"]
+    command += ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "ultrafast"]
+    if gop:
+        command += ["-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0"]
+    if audio_seconds:
+        command += ["-c:a", "aac"]
+    run_ffmpeg(command + list(args) + [str(path)])
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def media(tmp_path_factory):
+    return tmp_path_factory.mktemp("media")
+
+
+@pytest.fixture(scope="session")
+def ntsc_clip(media):
+    # 29.97 fps, 12 s, keyframes every 2 s so spans really seek
+    return make_clip(media / "ntsc.mp4", 12, fps="30000/1001", gop=60)
+
+
+@pytest.fixture(scope="session")
+def long_audio_clip(media):
+    # 5 s of video under 7 s of audio
+    return make_clip(media / "long_audio.mp4", 5, audio_seconds=7)
+
+
+@pytest.fixture(scope="session")
+def static_clip(media):
+    # 2 s of motion, then the last frame held for 3 s, at 29.97 fps
+    return make_clip(
+        media / "static.mp4", 2, fps="30000/1001", audio_seconds=5,
+        args=["-vf", "tpad=stop_mode=clone:stop_duration=3"],
+    )
+
+
+@pytest.fixture(scope="session")
+def sparse_keyframe_clip(media):
+    # 6 s with a keyframe every 2 s
+    return make_clip(media / "sparse.mp4", 6, gop=60)
@@ -0,0 +1,35 @@
+import os
+import time
+from fractions import Fraction
+
+import ffmpeg_utils
+import main
+from ffmpeg_utils import encode_two_pass, probe_video, render_segments
+from verify import verify_video
+
+
+def test_render_segments_keeps_rate_and_frames(ntsc_clip, tmp_path):
+    output_path = str(tmp_path / "segments.mp4")
+    render_segments(ntsc_clip, [(1.0, 3.0), (5.0, 6.0)], output_path, main.ENCODER_PROFILE)
+    assert probe_video(output_path)["fps"] == Fraction(30000, 1001)
+    # Frames 30-89 and 150-179 of the 29.97 fps source fall in the segments
+    assert verify_video(output_path, expected_duration=3.0)["frames"] == 90
+
+
+def test_two_pass_keeps_only_recent_passlogs(ntsc_clip, tmp_path, monkeypatch):
+    passlog_dir = tmp_path / "passlogs"
+    passlog_dir.mkdir()
+    monkeypatch.setattr(ffmpeg_utils, "PASSLOG_DIR", str(passlog_dir))
+    monkeypatch.setattr(ffmpeg_utils, "MAX_PASSLOGS", 2)
+    old = time.time() - 3 * 24 * 60 * 60
+    names = ["a" * 40 + "-0.log", "a" * 40 + "-0.log.mbtree", "b" * 40 + "-0.log", "c" * 40 + "_1_temp-0.log"]
+    for i, name in enumerate(names):
+        (passlog_dir / name).write_text("stats")
+        os.utime(passlog_dir / name, (old + i * 60, old + i * 60))
+
+    output_path = str(tmp_path / "two_pass.mp4")
+    assert not encode_two_pass(ntsc_clip, output_path, main.ENCODER_PROFILE, 200)
+    # The new first pass and the most recently used old one survive; the
+    # older pass goes with its extras, and so does the crashed temp file
+    new_prefix = os.path.basename(ffmpeg_utils._passlog_prefix(ntsc_clip, main.ENCODER_PROFILE))
+    assert {name[:40] for name in os.listdir(passlog_dir)} == {"b" * 40, new_prefix}
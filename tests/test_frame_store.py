@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from conftest import make_clip
+from ffmpeg_utils import FFmpegReader, frame_shape, yuv420p_to_bgr
+from frame_store import FrameStore
+
+
+@pytest.fixture(scope="module")
+def odd_clip(media):
+    # yuv444p, as yuv420p can't hold odd sizes
+    return make_clip(media / "odd.mp4", 2, args=["-vf", "scale=161:121", "-pix_fmt", "yuv444p"])
+
+
+def test_yuv420p_shape_has_rounded_up_chroma():
+    assert frame_shape("yuv420p", 161, 121) == (161 * 121 + 2 * 81 * 61,)
+    assert frame_shape("yuv420p", 160, 120) == (160 * 120 * 3 // 2,)
+
+
+def test_odd_size_yuv_store_matches_bgr_decode(odd_clip):
+    with FFmpegReader(odd_clip) as reader:
+        decoded = np.stack([frame.copy() for frame in reader])
+    with FrameStore(odd_clip, pix_fmt="yuv420p") as store:
+        assert len(store) == len(decoded)
+        for index in (0, len(store) - 1):
+            frame = store.bgr(index)
+            assert frame.shape == (121, 161, 3)
+            # Chroma is subsampled in the store, so allow for its rounding
+            assert np.abs(frame.astype(int) - decoded[index]).mean() < 8
+
+
+def test_store_grows_past_the_estimate(ntsc_clip, monkeypatch):
+    import frame_store
+
+    real_probe = frame_store.probe_video
+    monkeypatch.setattr(frame_store, "probe_video", lambda path: dict(real_probe(path), duration=None))
+    monkeypatch.setattr(frame_store, "GROWTH_FRAMES", 32)
+    with FrameStore(ntsc_clip, size=(32, 24)) as store:
+        assert len(store) == 360
+
+
+def test_store_over_the_limit_fails(ntsc_clip, monkeypatch):
+    import frame_store
+
+    real_probe = frame_store.probe_video
+    monkeypatch.setattr(frame_store, "probe_video", lambda path: dict(real_probe(path), duration=None))
+    with pytest.raises(ValueError, match="frame store limit"):
+        # 300 frames of 64x48 BGR fit in 3 MB
+        FrameStore(ntsc_clip, size=(64, 48), max_mb=3)
+
+
+def test_store_exactly_at_the_limit_fits(ntsc_clip):
+    # 1 MB holds 360 frames of 97x10 BGR, leaving no room for the slack
+    # added to the estimate
+    with FrameStore(ntsc_clip, size=(97, 10), max_mb=1) as store:
+        assert store.max_frames == 360
+        assert len(store) == 360
+
+
+def test_yuv420p_to_bgr_even_matches_cv2():
+    import cv2
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=frame_shape("yuv420p", 8, 6), dtype=np.uint8)
+    expected = cv2.cvtColor(frame.reshape(9, 8), cv2.COLOR_YUV2BGR_I420)
+    assert np.array_equal(yuv420p_to_bgr(frame, 8, 6), expected)
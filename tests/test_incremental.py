@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+import main
+from verify import verify_video
+
+
+def test_incremental_blur_rerenders_only_changed_gops(ntsc_clip, tmp_path, capsys):
+    source = str(tmp_path / "source.mp4")
+    with open(ntsc_clip, "rb") as src, open(source, "wb") as dst:
+        dst.write(src.read())
+
+    output_path = main.blur_video(source, (10, 10, 60, 60), start=0.0, end=1.0, incremental=True)
+    assert output_path == str(tmp_path / "source_blurred.mp4")
+    assert "full" in capsys.readouterr().out
+    with open(output_path + ".edits.json", encoding="utf-8") as f:
+        assert json.load(f)["edits"][0]["params"] == {"region": [10, 10, 60, 60]}
+
+    main.blur_video(source, (10, 10, 60, 60), start=0.0, end=1.0, incremental=True)
+    assert "already up to date" in capsys.readouterr().out
+
+    main.blur_video(source, (10, 10, 80, 80), start=0.0, end=1.0, incremental=True)
+    assert "incremental (" in capsys.readouterr().out
+    assert verify_video(output_path, full=True)["frames"] == 360
+    assert os.path.getsize(source) == os.path.getsize(ntsc_clip)
+
+
+def test_incremental_blur_needs_a_separate_output(ntsc_clip):
+    with pytest.raises(ValueError):
+        main.blur_video(ntsc_clip, (0, 0, 10, 10), output_path=ntsc_clip, incremental=True)
+
+
+def test_swapped_watermark_image_is_rerendered(ntsc_clip, tmp_path, capsys):
+    import cv2
+    import numpy as np
+
+    from overlay import overlay_edits
+
+    source = str(tmp_path / "source.mp4")
+    with open(ntsc_clip, "rb") as src, open(source, "wb") as dst:
+        dst.write(src.read())
+    logo = str(tmp_path / "logo.png")
+    cv2.imwrite(logo, np.full((20, 20, 3), 255, dtype=np.uint8))
+    overlays = overlay_edits(image_path=logo, start=0.0, end=1.0)
+
+    main.blur_video(source, (10, 10, 60, 60), overlays=overlays, incremental=True)
+    capsys.readouterr()
+    main.blur_video(source, (10, 10, 60, 60), overlays=overlays, incremental=True)
+    assert "already up to date" in capsys.readouterr().out
+
+    cv2.imwrite(logo, np.zeros((20, 20, 3), dtype=np.uint8))
+    os.utime(logo, ns=(os.stat(logo).st_atime_ns, os.stat(logo).st_mtime_ns + 10 ** 9))
+    main.blur_video(source, (10, 10, 60, 60), overlays=overlays, incremental=True)
+    out = capsys.readouterr().out
+    assert "already up to date" not in out
+    assert "incremental (" in out
@@ -0,0 +1,39 @@
+import asyncio
+import os
+from http import HTTPStatus
+
+import pytest
+
+import jobs
+import render_cache
+from job_server import HTTPError, JobServer
+from jobs import DONE, JobScheduler
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    # No room in the cache: every render evicts the ones before it
+    monkeypatch.setattr(render_cache, "_default_cache", render_cache.RenderCache(str(tmp_path / "cache"), quota_mb=0))
+    monkeypatch.setattr(jobs, "RESULTS_DIR", str(tmp_path / "results"))
+    scheduler = JobScheduler(workers=1)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_unrouted_results_survive_cache_eviction(ntsc_clip, scheduler):
+    first = scheduler.submit(ntsc_clip, [("resize", {"new_x": 80, "new_y": 60})])
+    first.wait(60)
+    second = scheduler.submit(ntsc_clip, [("resize", {"new_x": 64, "new_y": 48})])
+    second.wait(60)
+    assert first.status == second.status == DONE
+    assert len(os.listdir(render_cache.get_render_cache().cache_dir)) == 1
+    assert os.path.getsize(first.result_path) > 0
+
+
+def test_missing_result_is_gone(ntsc_clip, scheduler):
+    job = scheduler.submit(ntsc_clip, [("resize", {"new_x": 80, "new_y": 60})])
+    job.wait(60)
+    os.remove(job.result_path)
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(JobServer(scheduler)._send_result(None, job))
+    assert error.value.status == HTTPStatus.GONE
@@ -0,0 +1,56 @@
+import main
+from ffmpeg_utils import probe_video
+from render_cache import RenderCache
+
+
+def test_encoder_profile_reaches_the_encoder(ntsc_clip, tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    chain = [("resize", {"new_x": 80, "new_y": 60})]
+    mpeg4 = dict(main.ENCODER_PROFILE, codec="mpeg4", crf=None, preset=None, pix_fmt="yuv420p")
+
+    default_path = cache.render(ntsc_clip, chain)
+    mpeg4_path = cache.render(ntsc_clip, chain, encoder_profile=mpeg4)
+    assert default_path != mpeg4_path
+    assert probe_video(default_path)["video_codec"] == "h264"
+    assert probe_video(mpeg4_path)["video_codec"] == "mpeg4"
+
+
+def test_encoder_profile_is_not_keyed_for_unencoded_steps(ntsc_clip, tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    mpeg4 = dict(main.ENCODER_PROFILE, codec="mpeg4")
+    first = cache.render(ntsc_clip, [("mute", {})])
+    assert cache.render(ntsc_clip, [("mute", {})], encoder_profile=mpeg4) == first
+
+
+def _write_cube(path, invert):
+    lines = ["LUT_3D_SIZE 2"]
+    for b in (0, 1):
+        for g in (0, 1):
+            for r in (0, 1):
+                lines.append(" ".join(str(1 - c if invert else c) for c in (r, g, b)))
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_editing_a_referenced_file_misses_the_cache(ntsc_clip, tmp_path, capsys):
+    cache = RenderCache(str(tmp_path / "cache"))
+    lut_path = tmp_path / "look.cube"
+    _write_cube(lut_path, invert=False)
+    chain = [("color", {"lut_path": str(lut_path)})]
+
+    first = cache.render(ntsc_clip, chain)
+    assert cache.render(ntsc_clip, chain) == first
+    assert "Render cache hit" in capsys.readouterr().out
+
+    _write_cube(lut_path, invert=True)
+    second = cache.render(ntsc_clip, chain)
+    assert second != first
+    assert "Render cache hit" not in capsys.readouterr().out
+
+
+def test_nested_overlay_files_are_referenced(tmp_path):
+    from render_cache import referenced_files
+
+    image = tmp_path / "logo.png"
+    image.write_bytes(b"png")
+    params = {"region": [0, 0, 1, 1], "overlays": [{"op": "overlay", "params": {"image_path": str(image)}}]}
+    assert referenced_files(params) == [str(image)]
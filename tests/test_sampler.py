@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from ffmpeg_utils import FFmpegReader
+from sampler import FrameSampler, frame_index
+
+
+@pytest.fixture(scope="module")
+def decoded(ntsc_clip):
+    with FFmpegReader(ntsc_clip, pix_fmt="rgb24") as reader:
+        return np.stack([frame.copy() for frame in reader])
+
+
+@pytest.mark.parametrize("fps, start", [(2, 0.0), (0.25, 0.0), (45, 0.3), (1 / 3, 0.3), (None, 5.0)])
+def test_samples_match_full_decode(ntsc_clip, decoded, fps, start):
+    samples = 0
+    with FrameSampler(ntsc_clip, fps=fps, batch_size=8, colorspace="rgb", start=start) as sampler:
+        native_fps = sampler.info["fps"]
+        expected = sum(len(span) for span in sampler.spans())
+        for timestamps, frames in sampler:
+            for timestamp, frame in zip(timestamps, frames):
+                index = frame_index(timestamp, native_fps)
+                assert np.array_equal(frame, decoded[index]), f"sample at {timestamp:.3f}s is not frame {index}"
+                samples += 1
+    assert samples == expected > 0
+
+
+def test_frame_index_rounds_down():
+    assert frame_index(0.0, 30) == 0
+    assert frame_index(0.5, 30000 / 1001) == 14
+    assert frame_index(4.0, 30000 / 1001) == 119
@@ -0,0 +1,31 @@
+import shutil
+
+import numpy as np
+
+import stabilize
+from frame_store import FrameStore
+from verify import verify_video
+
+
+def test_store_motion_matches_decoded_motion(ntsc_clip):
+    decoded = stabilize.estimate_motion(ntsc_clip, analysis_width=80)
+    with FrameStore(ntsc_clip, pix_fmt="yuv420p") as store:
+        stored = stabilize.estimate_motion(ntsc_clip, analysis_width=80, store=store)
+    assert stored.shape == decoded.shape
+    assert np.abs(stored - decoded).max() < 1.0
+
+
+def test_stabilize_decodes_once_into_a_store(ntsc_clip, tmp_path, monkeypatch, capsys):
+    source = str(tmp_path / "shaky.mp4")
+    shutil.copyfile(ntsc_clip, source)
+    output_path = str(tmp_path / "stable.mp4")
+
+    stabilize.stabilize(source, output_path)
+    out = capsys.readouterr().out
+    assert "frame store" in out and "Analysed motion" in out
+    assert verify_video(output_path, expected_duration=12.0)["frames"] == 360
+
+    # With the analysis cached, the render decodes the source directly
+    monkeypatch.setattr(stabilize, "FrameStore", None)
+    stabilize.stabilize(source, output_path)
+    assert "Analysed motion" not in capsys.readouterr().out
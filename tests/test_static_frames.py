@@ -0,0 +1,17 @@
+from fractions import Fraction
+
+import main
+from ffmpeg_utils import probe_video
+from static_frames import detect_static_runs, render_static_speedup
+from verify import verify_video
+
+
+def test_speedup_keeps_rate(static_clip, tmp_path):
+    runs, fps, frame_count = detect_static_runs(static_clip)
+    assert len(runs) == 1
+    output_path = str(tmp_path / "speedup.mp4")
+    render_static_speedup(static_clip, runs, output_path, main.ENCODER_PROFILE, speed_factor=8)
+    assert probe_video(output_path)["fps"] == Fraction(30000, 1001)
+    # Every 8th frame of a run is kept, starting with its first
+    kept = frame_count - sum(last - first - (last - first) // 8 for first, last in runs)
+    assert verify_video(output_path)["frames"] == kept
@@ -0,0 +1,24 @@
+import pytest
+
+from ffmpeg_utils import get_keyframe_times
+from thumbnails import even_keyframes, extract_thumbnails
+
+
+def test_even_keyframes_fall_back_to_exact_times():
+    times = even_keyframes([0.0, 2.0, 4.0], 6.0, 10)
+    assert len(times) == 10
+    assert times == sorted(times)
+    assert {0.0, 2.0, 4.0} <= set(times)
+
+
+def test_even_keyframes_prefer_keyframes():
+    keyframes = [i * 0.5 for i in range(20)]
+    assert set(even_keyframes(keyframes, 10.0, 5)) <= set(keyframes)
+
+
+def test_even_mode_returns_count_thumbnails(sparse_keyframe_clip):
+    assert get_keyframe_times(sparse_keyframe_clip) == pytest.approx([0.0, 2.0, 4.0])
+    times, images = extract_thumbnails(sparse_keyframe_clip, count=10, width=80)
+    assert len(times) == len(images) == 10
+    # Distinct times show distinct frames (testsrc2 changes every frame)
+    assert len({image.tobytes() for image in images}) == 10
@@ -0,0 +1,29 @@
+import pytest
+
+from conftest import make_clip
+from ffmpeg_utils import probe_video
+from timeline import assemble_timeline, is_compatible, probe_segments
+from verify import verify_video
+
+
+def test_unaligned_in_point_keeps_stream_copy_join(ntsc_clip, tmp_path, capsys):
+    segments = [(ntsc_clip, 0.0, 2.0), (ntsc_clip, 0.5, 5.0)]
+    probed = probe_segments(segments)
+    assert not probed[1]["keyframe_aligned"]
+    assert probed[1]["next_keyframe"] == pytest.approx(2.0, abs=0.02)
+
+    output_path = str(tmp_path / "timeline.mp4")
+    assemble_timeline(segments, output_path)
+    assert "(1 normalized, stream copy)" in capsys.readouterr().out
+    # Frames 0-59, then 15-149
+    assert verify_video(output_path, expected_duration=6.5, full=True)["frames"] == 195
+
+
+def test_mismatched_source_is_encoded_like_the_reference(ntsc_clip, media, tmp_path, capsys):
+    other = make_clip(media / "other.mkv", 4, fps="25", size="320x240", audio_seconds=4)
+    output_path = str(tmp_path / "timeline.mp4")
+    assemble_timeline([(ntsc_clip, 0.0, 2.0), (other, 1.0, 3.0)], output_path)
+    assert "stream copy" in capsys.readouterr().out
+    info = probe_video(output_path)
+    assert is_compatible(info, dict(probe_video(ntsc_clip), audio_codec=None, sample_rate=None, channels=None))
+    assert verify_video(output_path, full=True)["frames"] == 120
@@ -0,0 +1,43 @@
+import random
+
+import numpy as np
+
+import transforms
+from transforms import EditSchedule, apply_edits_batch, edit_applies
+
+
+def _edits(count, seed=0):
+    rng = random.Random(seed)
+    edits = [{"op": "overlay", "params": {"text": "watermark"}, "start": None, "end": None}]
+    for index in range(count):
+        start = rng.uniform(0, 100)
+        edits.append({"op": "overlay", "params": {"text": str(index)}, "start": start, "end": start + rng.uniform(0.1, 5)})
+    return edits
+
+
+def test_schedule_matches_a_scan_of_every_edit():
+    edits = _edits(500)
+    schedule = EditSchedule(edits)
+    # In order, then a jump back as an incremental re-render would do
+    for first in list(np.arange(0, 110, 0.5)) + [20.0, 20.5]:
+        last = first + 0.45
+        expected = [e for e in edits if any(edit_applies(e, t) for t in np.linspace(first, last, 10))]
+        found = schedule.overlapping(first, last)
+        assert all(edit in found for edit in expected)
+        assert [edits.index(edit) for edit in found] == sorted(edits.index(edit) for edit in found)
+        assert all(
+            (edit["start"] is None or edit["start"] <= last) and (edit["end"] is None or edit["end"] > first)
+            for edit in found
+        )
+
+
+def test_only_overlapping_captions_are_composited(monkeypatch):
+    applied = []
+    monkeypatch.setitem(transforms.BATCH_EDITS, "overlay", lambda frames, text: applied.append(text))
+    edits = _edits(1000)
+    schedule = EditSchedule(edits)
+    frames = np.zeros((10, 4, 4, 3), dtype=np.uint8)
+    apply_edits_batch(frames, schedule, [50 + i / 30 for i in range(10)])
+    expected = [e["params"]["text"] for e in edits if any(edit_applies(e, 50 + i / 30) for i in range(10))]
+    assert applied == expected
+    assert len(applied) < 100
@@ -0,0 +1,34 @@
+import pytest
+
+import main
+from verify import OutputVerificationError, verify_video, video_duration
+
+
+def test_video_duration_leaves_out_longer_audio(long_audio_clip):
+    assert video_duration(long_audio_clip) == pytest.approx(5.0, abs=0.05)
+
+
+def test_audio_longer_than_video_passes(long_audio_clip):
+    report = verify_video(long_audio_clip, expected_duration=5.0)
+    assert report["frames"] == 150
+    assert report["duration"] == pytest.approx(5.0, abs=0.05)
+
+
+def test_crop_keeps_audio_longer_than_video(long_audio_clip, tmp_path):
+    output_path = str(tmp_path / "cropped.mp4")
+    main.crop_video(long_audio_clip, (0, 0, 80, 60), output_path=output_path)
+    assert verify_video(output_path, expected_duration=video_duration(long_audio_clip))["frames"] == 150
+
+
+def test_wrong_duration_fails(long_audio_clip):
+    with pytest.raises(OutputVerificationError, match="video stream is 5.00s"):
+        verify_video(long_audio_clip, expected_duration=7.0)
+
+
+def test_truncated_file_fails(long_audio_clip, tmp_path):
+    truncated = tmp_path / "truncated.mp4"
+    with open(long_audio_clip, "rb") as f:
+        data = f.read()
+    truncated.write_bytes(data[: len(data) // 2])
+    with pytest.raises(OutputVerificationError):
+        verify_video(str(truncated))
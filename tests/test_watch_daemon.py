@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from watch_daemon import WatchDaemon
+
+
+class _Scheduler:
+    workers = 1
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, path, chain, output_path):
+        self.submitted.append((path, output_path))
+
+        class Job:
+            id = str(len(self.submitted))
+
+        return Job()
+
+    def shutdown(self):
+        pass
+
+
+def _daemon(tmp_path, **folder):
+    config = {"folders": [dict({"path": str(tmp_path / "in"), "chain": [["mute", {}]]}, **folder)]}
+    return WatchDaemon(config, scheduler=_Scheduler())
+
+
+def test_output_dir_cannot_be_the_watched_folder(tmp_path):
+    with pytest.raises(ValueError, match="is a watched folder"):
+        _daemon(tmp_path, output_dir=str(tmp_path / "in"))
+
+
+def test_output_dir_resolving_to_the_watched_folder_is_rejected(tmp_path):
+    (tmp_path / "in").mkdir()
+    os.symlink(tmp_path / "in", tmp_path / "alias")
+    with pytest.raises(ValueError, match="is a watched folder"):
+        _daemon(tmp_path, output_dir=str(tmp_path / "alias"))
+
+
+def test_temp_files_are_skipped_but_similar_names_are_not(tmp_path):
+    daemon = _daemon(tmp_path)
+    folder = str(tmp_path / "in")
+    assert daemon._wants(os.path.join(folder, "holiday_temp_cut.mp4"))
+    assert not daemon._wants(os.path.join(folder, "holiday_cropped_0_0_10_10_temp.mp4"))
+    assert not daemon._wants(os.path.join(folder, ".partial.mp4"))
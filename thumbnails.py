@@ -0,0 +1,249 @@
+"""
+Poster frames and hover-scrub sprite sheets.
+
+    python thumbnails.py VIDEO_OR_FOLDER [--output-dir thumbs] [--count 100]
+                         [--mode even|scene] [--width 160] [--format jpg|webp] [--workers 4]
+
+For each video writes <name>_poster.jpg, <name>_sprites_<n>.<format> and
+a <name>_sprites.vtt / <name>_sprites.json map of where each thumbnail sits
+in the sheets. Frames are read at keyframes where there are enough of
+them, so little between them is ever decoded.
+"""
+import argparse
+import bisect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from ffmpeg_utils import FFmpegReader, get_keyframe_times, probe_video
+from main import atomic_output, open_video_capture
+from preview import frame_to_preview, read_frame_at
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".webm", ".avi", ".m4v")
+
+SHEET_COLUMNS = 10
+SHEET_ROWS = 10
+SAVE_OPTIONS = {
+    "jpg": {"format": "JPEG", "quality": 80, "optimize": True},
+    "webp": {"format": "WEBP", "quality": 75, "method": 4},
+}
+
+
+def thumbnail_size(info, width):
+    height = max(2, int(round(info["height"] * width / info["width"] / 2)) * 2)
+    return width, height
+
+
+def nearest_keyframe(keyframes, target):
+    position = bisect.bisect_left(keyframes, target)
+    return min(keyframes[max(0, position - 1):position + 1], key=lambda t: abs(t - target))
+
+
+def even_keyframes(keyframes, duration, count):
+    """
+    A time for each of count equal slices of the video, in order: the
+    keyframe nearest the slice's middle, or the middle itself when that
+    keyframe is already taken (keyframes sparser than the slices), which
+    costs an accurate seek decoding from the keyframe before it
+    """
+    if not keyframes:
+        return [0.0]
+    picks = set()
+    for index in range(count):
+        target = (index + 0.5) * duration / count
+        nearest = nearest_keyframe(keyframes, target)
+        picks.add(target if nearest in picks else nearest)
+    return sorted(picks)
+
+
+def scene_keyframes(video_path, count, size, info):
+    """
+    The count keyframes that differ most from the keyframe before them,
+    plus the first, as (times, BGR frames at size). Encoders place keyframes
+    at scene cuts, so this finds scene starts from one keyframe-only pass.
+    """
+    times = get_keyframe_times(video_path)
+    with FFmpegReader(video_path, size=size, info=info, keyframes_only=True) as reader:
+        frames = [frame.copy() for frame in reader]
+    frames = frames[:len(times)]
+    times = times[:len(frames)]
+    if len(frames) <= count:
+        return times, frames
+
+    stack = np.stack(frames).astype(np.int16)
+    changes = np.abs(stack[1:] - stack[:-1]).mean(axis=(1, 2, 3))
+    chosen = sorted([0] + [int(i) + 1 for i in np.argsort(changes)[::-1][:count - 1]])
+    return [times[i] for i in chosen], [frames[i] for i in chosen]
+
+
+def extract_thumbnails(video_path, count=100, width=160, mode="even"):
+    """
+    Up to count thumbnails of video_path as (times, PIL images), each width
+    pixels wide, taken at keyframes.
+    - even: the keyframes closest to evenly spaced times, each read with one
+      seek through the same decode path as the GUI previews; where
+      keyframes are too sparse, the evenly spaced times themselves
+    - scene: the keyframes that start the biggest visual changes
+    """
+    info = probe_video(video_path)
+    size = thumbnail_size(info, width)
+    if mode == "scene":
+        times, frames = scene_keyframes(video_path, count, size, info)
+        return times, [frame_to_preview(frame, *size, allow_upscale=True)[0] for frame in frames]
+    if mode != "even":
+        raise ValueError(f"Unknown thumbnail mode: {mode}")
+
+    times, images = [], []
+    with open_video_capture(video_path) as cap:
+        for timestamp in even_keyframes(get_keyframe_times(video_path), info["duration"] or 0, count):
+            frame = read_frame_at(cap, timestamp)
+            if frame is None:
+                continue
+            times.append(timestamp)
+            images.append(frame_to_preview(frame, *size, allow_upscale=True)[0])
+    return times, images
+
+
+def _vtt_time(seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}"
+
+
+def build_sprite_sheets(
+    times, images, duration, output_base, image_format="jpg", columns=SHEET_COLUMNS, rows=SHEET_ROWS
+):
+    """
+    Tile images into sheets of columns x rows and write output_base's
+    _sprites_<n> sheets plus a WebVTT and a JSON map of them.
+    - Each thumbnail covers the video from its time to the next one's
+    Returns the paths written.
+    """
+    if not images:
+        raise ValueError("No thumbnails to tile")
+    tile_width, tile_height = images[0].size
+    per_sheet = columns * rows
+    written = []
+    entries = []
+
+    for sheet_index, first in enumerate(range(0, len(images), per_sheet)):
+        tiles = images[first:first + per_sheet]
+        sheet_rows = (len(tiles) + columns - 1) // columns
+        sheet = Image.new("RGB", (tile_width * min(columns, len(tiles)), tile_height * sheet_rows))
+        sheet_path = f"{output_base}_sprites_{sheet_index}.{image_format}"
+        for offset, tile in enumerate(tiles):
+            x, y = offset % columns * tile_width, offset // columns * tile_height
+            sheet.paste(tile, (x, y))
+            index = first + offset
+            end = times[index + 1] if index + 1 < len(times) else max(duration, times[index])
+            entries.append({
+                "start": round(times[index], 3), "end": round(end, 3),
+                "sheet": os.path.basename(sheet_path), "x": x, "y": y, "w": tile_width, "h": tile_height,
+            })
+        with atomic_output(sheet_path, "sprite") as temp_path:
+            sheet.save(temp_path, **SAVE_OPTIONS[image_format])
+        written.append(sheet_path)
+
+    vtt_path = f"{output_base}_sprites.vtt"
+    with atomic_output(vtt_path, "sprite") as temp_path:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("WEBVTT\n\n")
+            for entry in entries:
+                f.write(
+                    f"{_vtt_time(entry['start'])} --> {_vtt_time(entry['end'])}\n"
+                    f"{entry['sheet']}#xywh={entry['x']},{entry['y']},{entry['w']},{entry['h']}\n\n"
+                )
+    json_path = f"{output_base}_sprites.json"
+    with atomic_output(json_path, "sprite") as temp_path:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"tile_width": tile_width, "tile_height": tile_height, "thumbnails": entries}, f, indent=2)
+    return written + [vtt_path, json_path]
+
+
+def save_poster(video_path, output_path, max_size=(1280, 720), position=0.1):
+    """
+    Save the keyframe nearest position (fraction of the duration) as a
+    poster image, scaled down to fit max_size
+    """
+    info = probe_video(video_path)
+    keyframes = get_keyframe_times(video_path) or [0.0]
+    timestamp = nearest_keyframe(keyframes, (info["duration"] or 0) * position)
+    with open_video_capture(video_path) as cap:
+        frame = read_frame_at(cap, timestamp)
+    if frame is None:
+        raise ValueError(f"Could not read a frame from {video_path}")
+    image, _ = frame_to_preview(frame, *max_size)
+    with atomic_output(output_path, "poster") as temp_path:
+        image.save(temp_path, quality=85)
+    return output_path
+
+
+def export_thumbnails(video_path, output_dir=None, count=100, width=160, mode="even", image_format="jpg"):
+    """Poster, sprite sheets and maps for one video; returns the paths written"""
+    start_time = time.time()
+    output_dir = output_dir or os.path.dirname(os.path.abspath(video_path))
+    os.makedirs(output_dir, exist_ok=True)
+    output_base = os.path.join(output_dir, os.path.splitext(os.path.basename(video_path))[0])
+
+    times, images = extract_thumbnails(video_path, count, width, mode)
+    duration = probe_video(video_path)["duration"] or 0
+    written = [save_poster(video_path, f"{output_base}_poster.jpg")]
+    written += build_sprite_sheets(times, images, duration, output_base, image_format)
+    print(
+        f"Exported {len(images)} thumbnails of {os.path.basename(video_path)} "
+        f"in {round(time.time() - start_time, 2)}s"
+    )
+    return written
+
+
+def export_directory(folder, output_dir=None, workers=None, **options):
+    """
+    export_thumbnails for every video in folder (not recursive), one video
+    per worker process. Returns {video_path: paths written or the error}.
+    """
+    video_paths = sorted(
+        entry.path for entry in os.scandir(folder)
+        if entry.is_file() and entry.name.lower().endswith(VIDEO_EXTENSIONS)
+    )
+    if not video_paths:
+        return {}
+    workers = workers or min(len(video_paths), os.cpu_count() or 1)
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {path: pool.submit(export_thumbnails, path, output_dir, **options) for path in video_paths}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                results[path] = e
+                print(f"Thumbnails failed for {os.path.basename(path)}: {e}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export poster frames and sprite sheets")
+    parser.add_argument("path", help="a video, or a folder of videos")
+    parser.add_argument("--output-dir", help="defaults to next to each video")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--mode", choices=["even", "scene"], default="even")
+    parser.add_argument("--width", type=int, default=160)
+    parser.add_argument("--format", choices=sorted(SAVE_OPTIONS), default="jpg")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    options = {"count": args.count, "width": args.width, "mode": args.mode, "image_format": args.format}
+    if os.path.isdir(args.path):
+        start_time = time.time()
+        results = export_directory(args.path, args.output_dir, args.workers, **options)
+        failed = sum(isinstance(result, Exception) for result in results.values())
+        print(f"{len(results) - failed}/{len(results)} videos exported in {round(time.time() - start_time, 2)}s")
+    else:
+        export_thumbnails(args.path, args.output_dir, **options)
+
+
+if __name__ == "__main__":
+    main()
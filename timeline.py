@@ -0,0 +1,166 @@
+import os
+import shutil
+import tempfile
+import time
+
+from ffmpeg_utils import concat_copy, copy_segment, encoder_args, get_keyframe_times, probe_video, run_ffmpeg
+from main import ENCODER_PROFILE, atomic_output
+
+# Stream parameters that have to match for the concat demuxer to join files
+COMPAT_KEYS = (
+    "video_codec", "pix_fmt", "width", "height", "fps", "timescale", "audio_codec", "sample_rate", "channels",
+)
+
+# Encoders producing the codecs probe_video reports, for pieces that have to
+# match a reference stream
+VIDEO_ENCODERS = {"h264": "libx264", "hevc": "libx265", "vp9": "libvpx-vp9", "vp8": "libvpx", "mpeg4": "mpeg4"}
+AUDIO_ENCODERS = {"aac": "aac", "mp3": "libmp3lame", "opus": "libopus", "vorbis": "libvorbis", "ac3": "ac3"}
+CHANNEL_COUNTS = {"mono": 1, "stereo": 2}
+
+
+def probe_segments(segments):
+    """
+    Probe a timeline, an ordered list of (file, in, out) segments in seconds.
+    - out may be None for "until the end"
+    - Each returned dict holds the probe info plus the segment and whether its
+      in point sits on a keyframe (a stream copy can only start there)
+    - next_keyframe is the first keyframe after the in point (None when
+      there is none before the out point): everything from there on can be
+      stream-copied
+    """
+    probed = []
+    for path, in_time, out_time in segments:
+        info = probe_video(path)
+        half_frame = 0.5 / float(info["fps"]) if info["fps"] else 0.02
+        keyframes = get_keyframe_times(path)
+        keyframe_aligned = any(abs(t - in_time) <= half_frame for t in keyframes)
+        end = info["duration"] if out_time is None else out_time
+        next_keyframe = next((t for t in keyframes if in_time + half_frame < t < end - half_frame), None)
+        probed.append(
+            dict(
+                info, path=path, in_time=in_time, out_time=out_time, keyframe_aligned=keyframe_aligned,
+                next_keyframe=next_keyframe,
+            )
+        )
+    return probed
+
+
+def is_compatible(segment, reference):
+    return all(segment[key] == reference[key] for key in COMPAT_KEYS)
+
+
+def encode_like(segment, in_time, out_time, reference, piece_path, profile=None):
+    """
+    Encode [in_time, out_time) of a segment's file once, with the reference's
+    codec, pix_fmt, size, fps, timescale and audio (codec, sample rate,
+    channels), so the piece joins the reference with the concat demuxer.
+    - profile supplies the quality settings (ENCODER_PROFILE by default)
+    - A missing audio track is filled with silence when the reference has one
+    """
+    profile = dict(
+        profile or ENCODER_PROFILE,
+        codec=VIDEO_ENCODERS.get(reference["video_codec"], (profile or ENCODER_PROFILE)["codec"]),
+        pix_fmt=reference["pix_fmt"],
+    )
+    args = ["-ss", f"{in_time:.6f}", "-i", segment["path"]]
+    if reference["audio_codec"] and not segment["audio_codec"]:
+        args += ["-f", "lavfi", "-i", f"anullsrc=r={reference['sample_rate']}:cl={reference['channels']}"]
+    if out_time is not None:
+        args += ["-t", f"{out_time - in_time:.6f}"]
+    args += [
+        "-map", "0:v:0",
+        "-vf", f"scale={reference['width']}:{reference['height']}",
+        "-r", str(reference["fps"]),
+        # B-frames start a piece's decode timestamps below zero, which the
+        # join would have to squeeze into the previous piece's last frame
+        "-bf", "0",
+    ]
+    if reference["timescale"]:
+        args += ["-video_track_timescale", str(reference["timescale"])]
+    if reference["audio_codec"]:
+        args += [
+            "-map", "0:a:0" if segment["audio_codec"] else "1:a:0",
+            "-c:a", AUDIO_ENCODERS.get(reference["audio_codec"], reference["audio_codec"]),
+            "-ar", str(reference["sample_rate"]),
+        ]
+        if reference["channels"] in CHANNEL_COUNTS:
+            args += ["-ac", str(CHANNEL_COUNTS[reference["channels"]])]
+    run_ffmpeg(args + encoder_args(profile) + [piece_path])
+    return piece_path
+
+
+def _normalize_segment(segment, reference, piece_dir, index):
+    """
+    Bring one segment in line with the reference with as little encoding as
+    possible. Returns the paths of its pieces.
+    - A matching segment that starts between keyframes only has its head,
+      up to the next keyframe, encoded; the rest is stream-copied
+    - Anything else is encoded once, straight from its source
+    """
+    in_time, out_time = segment["in_time"], segment["out_time"]
+    head_path = os.path.join(piece_dir, f"{index:04d}_head.mp4")
+    if is_compatible(segment, reference) and segment["next_keyframe"] is not None:
+        tail_path = os.path.join(piece_dir, f"{index:04d}.mp4")
+        # Half a frame short of the keyframe, so it isn't encoded as well
+        head_end = segment["next_keyframe"] - 0.5 / float(segment["fps"])
+        encode_like(segment, in_time, head_end, reference, head_path)
+        copy_segment(segment["path"], segment["next_keyframe"], out_time, tail_path)
+        return [head_path, tail_path]
+    return [encode_like(segment, in_time, out_time, reference, head_path)]
+
+
+def assemble_timeline(segments, output_path):
+    """
+    Join an ordered list of (file, in, out) segments into output_path.
+    - When every segment matches the first one (codec, resolution, fps,
+      audio) and starts on a keyframe, everything is stream-copied
+    - Otherwise only the mismatched segments are normalized (see
+      _normalize_segment) to the first one's stream parameters; if the
+      pieces still differ afterwards they are joined with a single re-encode
+    """
+    start_time = time.time()
+    probed = probe_segments(segments)
+    reference = probed[0]
+
+    piece_dir = tempfile.mkdtemp(prefix="timeline_")
+    try:
+        pieces = []
+        normalized = 0
+        for index, segment in enumerate(probed):
+            if is_compatible(segment, reference) and segment["keyframe_aligned"]:
+                piece_path = os.path.join(piece_dir, f"{index:04d}.mp4")
+                pieces.append(copy_segment(segment["path"], segment["in_time"], segment["out_time"], piece_path))
+            else:
+                pieces += _normalize_segment(segment, reference, piece_dir, index)
+                normalized += 1
+
+        piece_info = [probe_video(piece) for piece in pieces]
+        with atomic_output(output_path, "timeline") as temp_output_path:
+            if all(is_compatible(info, piece_info[0]) for info in piece_info):
+                concat_copy(pieces, temp_output_path)
+                mode = "stream copy"
+            else:
+                _concat_reencode(pieces, temp_output_path)
+                mode = "re-encoded join"
+    finally:
+        shutil.rmtree(piece_dir, ignore_errors=True)
+
+    time_taken = round((time.time() - start_time), 2)
+    print(
+        f"Assembled {len(segments)} segments into {os.path.basename(output_path)} "
+        f"in {time_taken}s ({normalized} normalized, {mode})"
+    )
+    return output_path
+
+
+def _concat_reencode(pieces, output_path):
+    from moviepy import VideoFileClip, concatenate_videoclips
+
+    clips = [VideoFileClip(piece) for piece in pieces]
+    try:
+        concatenate_videoclips(clips, method="compose").write_videofile(
+            output_path, codec="libx264", audio_codec="aac"
+        )
+    finally:
+        for clip in clips:
+            clip.close()
@@ -0,0 +1,192 @@
+import bisect
+import math
+
+import cv2
+import numpy as np
+
+from color import grade_batch, grade_frame
+from overlay import overlay_batch, overlay_frame
+
+# OpenCV filters handle at most this many channels per call (CV_CN_MAX)
+MAX_STACKED_CHANNELS = 512
+
+# Stacking a batch into one image only beats per-frame calls while the call
+# overhead dominates, i.e. for small regions (see benchmarks/bench_transforms.py)
+STACKED_BLUR_MAX_PIXELS = 8192
+
+
+def blur_region(frame, region, kernel_size=(15, 15)):
+    # expects a region of XYXY, blurs it in place
+    left, top, right, bottom = region
+    frame[top:bottom, left:right] = cv2.GaussianBlur(
+        frame[top:bottom, left:right], tuple(kernel_size), 0
+    )
+    return frame
+
+
+def zoom_to_region(frame, box):
+    # Crop to box (XYXY) and scale back up to the full frame size, so a crop
+    # applied to part of a video keeps the output dimensions constant
+    left, top, right, bottom = box
+    height, width = frame.shape[:2]
+    return cv2.resize(
+        frame[top:bottom, left:right], (width, height), interpolation=cv2.INTER_LINEAR
+    )
+
+
+def _stack_channels(frames):
+    # (N, H, W, C) -> (H, W, N*C): OpenCV treats every frame's channels as
+    # extra channels of one image, so a single call covers the whole batch
+    count, height, width, channels = frames.shape
+    return np.ascontiguousarray(frames.transpose(1, 2, 0, 3)).reshape(height, width, count * channels)
+
+
+def _unstack_channels(image, count, out=None):
+    height, width = image.shape[:2]
+    unstacked = image.reshape(height, width, count, -1).transpose(2, 0, 1, 3)
+    if out is None:
+        return np.ascontiguousarray(unstacked)
+    out[...] = unstacked
+    return out
+
+
+def _batch_chunks(frames):
+    step = max(1, MAX_STACKED_CHANNELS // frames.shape[3])
+    for index in range(0, len(frames), step):
+        yield index, frames[index:index + step]
+
+
+def crop_batch(frames, box):
+    """Crop a (N, H, W, C) batch to box (XYXY); a view, nothing is copied"""
+    left, top, right, bottom = box
+    return frames[:, top:bottom, left:right]
+
+
+def resize_batch(frames, size, interpolation=cv2.INTER_LINEAR, out=None):
+    """
+    Resize a (N, H, W, C) batch to size=(w, h) into a preallocated batch.
+    cv2.resize's many-channel path is far slower than its 3-channel one, so
+    this stays one call per frame, writing straight into out.
+    """
+    width, height = size
+    if out is None:
+        out = np.empty((len(frames), height, width, frames.shape[3]), dtype=frames.dtype)
+    for frame, resized in zip(frames, out):
+        cv2.resize(frame, (width, height), dst=resized, interpolation=interpolation)
+    return out
+
+
+def blur_region_batch(frames, region, kernel_size=(15, 15)):
+    """Blur region (XYXY) of every frame of a (N, H, W, C) batch in place"""
+    left, top, right, bottom = region
+    if (right - left) * (bottom - top) > STACKED_BLUR_MAX_PIXELS:
+        for frame in frames:
+            blur_region(frame, region, kernel_size)
+        return frames
+
+    for index, chunk in _batch_chunks(frames):
+        patch = chunk[:, top:bottom, left:right]
+        blurred = cv2.GaussianBlur(_stack_channels(patch), tuple(kernel_size), 0)
+        _unstack_channels(blurred, len(chunk), patch)
+    return frames
+
+
+# Per-frame edits that keep the frame size and timing, so they can be applied
+# to any time range of a video (see incremental.py)
+FRAME_EDITS = {
+    "blur": blur_region,
+    "zoom": zoom_to_region,
+    "color": grade_frame,
+    "overlay": overlay_frame,
+}
+
+# Batch versions of FRAME_EDITS, taking a (N, H, W, C) batch
+BATCH_EDITS = {
+    "blur": blur_region_batch,
+    "color": grade_batch,
+    "overlay": overlay_batch,
+}
+
+
+def edit_applies(edit, timestamp):
+    start = edit.get("start")
+    end = edit.get("end")
+    if start is not None and timestamp < start:
+        return False
+    if end is not None and timestamp >= end:
+        return False
+    return True
+
+
+def apply_edits(frame, edits, timestamp):
+    """
+    Apply every edit whose time range covers timestamp.
+    - An edit is {"op": name in FRAME_EDITS, "params": {...}, "start": s, "end": e}
+    - start/end are optional and default to the whole video
+    """
+    for edit in edits:
+        if edit_applies(edit, timestamp):
+            frame = FRAME_EDITS[edit["op"]](frame, **edit.get("params", {}))
+    return frame
+
+
+class EditSchedule:
+    """
+    Edits sorted by start time once, for batches applied in time order:
+    each batch bisects for the edits starting by its end and drops those
+    that ended, so a long list of short edits (one per caption) costs a
+    batch only the few that overlap it
+    """
+
+    def __init__(self, edits):
+        self.edits = list(edits)
+        self._order = sorted(range(len(self.edits)), key=lambda index: self._start(index))
+        self._starts = [self._start(index) for index in self._order]
+        self._started = 0
+        self._active = []
+        self._time = None
+
+    def _start(self, index):
+        start = self.edits[index].get("start")
+        return -math.inf if start is None else start
+
+    def _end(self, index):
+        end = self.edits[index].get("end")
+        return math.inf if end is None else end
+
+    def overlapping(self, first, last):
+        """Edits covering any time in [first, last], in their original order"""
+        started = bisect.bisect_right(self._starts, last)
+        if self._time is None or first < self._time:
+            # First batch, or a jump back: everything started so far
+            self._active = self._order[:started]
+            self._started = started
+        elif started > self._started:
+            self._active += self._order[self._started:started]
+            self._started = started
+        self._time = first
+        self._active = [index for index in self._active if self._end(index) > first]
+        return [self.edits[index] for index in sorted(self._active)]
+
+
+def apply_edits_batch(frames, edits, timestamps):
+    """
+    apply_edits for a (N, H, W, C) batch with one timestamp per frame;
+    edits may be an EditSchedule, so only the edits overlapping the batch
+    are looked at
+    """
+    if isinstance(edits, EditSchedule):
+        edits = edits.overlapping(timestamps[0], timestamps[-1]) if len(timestamps) else []
+    for edit in edits:
+        # Timestamps are increasing, so the frames an edit covers are a slice
+        selected = [index for index, t in enumerate(timestamps) if edit_applies(edit, t)]
+        if not selected:
+            continue
+        params = edit.get("params", {})
+        covered = frames[selected[0]:selected[-1] + 1]
+        if edit["op"] in BATCH_EDITS:
+            BATCH_EDITS[edit["op"]](covered, **params)
+        else:
+            for index in range(len(covered)):
+                covered[index] = FRAME_EDITS[edit["op"]](covered[index], **params)
+    return frames
@@ -0,0 +1,146 @@
+import os
+import re
+import time
+
+from ffmpeg_utils import probe_video, run_ffmpeg
+
+# Durations may differ by this much (or by this share of the duration,
+# whichever is more): a frame or two of rounding, or audio that runs a
+# little past the video
+DURATION_TOLERANCE_SECONDS = 0.5
+DURATION_TOLERANCE_SHARE = 0.01
+
+# How much is decoded at each end of the file; a seek lands on the keyframe
+# before the end window, so the whole last GOP is always covered
+EDGE_SECONDS = 3.0
+
+
+class OutputVerificationError(RuntimeError):
+    pass
+
+
+def _progress(result, key):
+    # The last value -progress reported for key
+    values = re.findall(rf"^{key}=(\S+)$", result.stdout.decode(errors="replace"), re.MULTILINE)
+    return values[-1] if values else None
+
+
+def _run_checked(path, args, what):
+    result = run_ffmpeg(
+        ["-v", "error", "-xerror", *args, "-progress", "pipe:1", "-nostats"], check=False
+    )
+    errors = result.stderr.decode(errors="replace").strip().splitlines()
+    if result.returncode != 0 or errors:
+        detail = " | ".join(errors[-3:]) or f"ffmpeg exited with {result.returncode}"
+        raise OutputVerificationError(f"{os.path.basename(path)}: {what} failed: {detail}")
+    return result
+
+
+def _decoded_frames(path, args, what):
+    result = _run_checked(path, args + ["-map", "0:v:0", "-f", "null", "-"], what)
+    frames = int(_progress(result, "frame") or 0)
+    if not frames:
+        raise OutputVerificationError(f"{os.path.basename(path)}: {what} decoded no frames")
+    return frames
+
+
+def _packet_summary(framecrc):
+    # Video packet count and where each stream's last packet ends (seconds),
+    # from framecrc lines "stream, dts, pts, duration, size, hash" under
+    # "#tb <stream>: n/d" headers; stream 0 is the video
+    time_bases = {
+        int(stream): int(numerator) / int(denominator)
+        for stream, numerator, denominator in re.findall(r"^#tb (\d+): (\d+)/(\d+)", framecrc, re.MULTILINE)
+    }
+    frames = 0
+    ends = {}
+    for line in framecrc.splitlines():
+        if line.startswith("#"):
+            continue
+        fields = line.split(",")
+        if len(fields) >= 4:
+            stream = int(fields[0])
+            frames += stream == 0
+            ends[stream] = max(ends.get(stream, 0), int(fields[2]) + int(fields[3]))
+    return frames, {stream: end * time_bases.get(stream, 0) for stream, end in ends.items()}
+
+
+def _read_packets(path, streams):
+    # Listing packets without decoding them (framecrc over a stream copy)
+    maps = [arg for stream in streams for arg in ("-map", stream)]
+    result = _run_checked(path, ["-i", path, *maps, "-c", "copy", "-f", "framecrc", "-"], "reading packets")
+    return _packet_summary(result.stdout.decode(errors="replace"))
+
+
+def video_duration(path):
+    """
+    Where the video stream of path ends (seconds), from its packets; unlike
+    the container duration this leaves out audio running past the video
+    """
+    return _read_packets(path, ["0:v:0"])[1].get(0, 0.0)
+
+
+def _within_tolerance(actual, expected):
+    return abs(actual - expected) <= max(DURATION_TOLERANCE_SECONDS, expected * DURATION_TOLERANCE_SHARE)
+
+
+def verify_video(path, expected_duration=None, full=False):
+    """
+    Check a rendered video before it is trusted, raising
+    OutputVerificationError when it is empty, truncated or undecodable.
+    - fast (default): container metadata, a stream-copy pass over the
+      packets (no decoding) for the frame count and where the stream
+      really ends, and a decode of the first and last few seconds
+    - full: decodes every frame instead, returning an MD5 of the decoded
+      picture for archives
+    - expected_duration (seconds) is compared with the video stream's
+      (see video_duration), so longer or shorter audio doesn't count
+    Returns {"frames", "duration", "checksum", "seconds"}.
+    """
+    start_time = time.time()
+    name = os.path.basename(path)
+    if not os.path.isfile(path) or os.path.getsize(path) == 0:
+        raise OutputVerificationError(f"{name}: output is missing or empty")
+    try:
+        info = probe_video(path)
+    except ValueError as e:
+        raise OutputVerificationError(f"{name}: {e}")
+    container_duration = info["duration"]
+    if not container_duration or not info["width"] or not info["height"]:
+        raise OutputVerificationError(f"{name}: container reports no duration or picture size")
+
+    # The packets find streams cut short of what the header promises: the
+    # longest stream has to reach the container's duration
+    frames, ends = _read_packets(path, ["0:v:0", "0:a?"])
+    if not frames:
+        raise OutputVerificationError(f"{name}: no video frames")
+    duration = ends[0]
+    if not _within_tolerance(max(ends.values()), container_duration):
+        raise OutputVerificationError(
+            f"{name}: streams end at {max(ends.values()):.2f}s of {container_duration:.2f}s"
+        )
+    if expected_duration is not None and not _within_tolerance(duration, expected_duration):
+        raise OutputVerificationError(
+            f"{name}: video stream is {duration:.2f}s, expected {expected_duration:.2f}s"
+        )
+
+    checksum = None
+    if full:
+        result = _run_checked(path, ["-i", path, "-map", "0:v:0", "-f", "md5", "-"], "full decode")
+        match = re.search(r"MD5=([0-9a-f]+)", result.stdout.decode(errors="replace"))
+        checksum = match.group(1) if match else None
+        decoded = int(_progress(result, "frame") or 0)
+        if decoded != frames:
+            raise OutputVerificationError(f"{name}: decoded {decoded} of {frames} frames")
+    else:
+        _decoded_frames(path, ["-i", path, "-t", f"{EDGE_SECONDS}"], "decoding the first GOP")
+        _decoded_frames(
+            path, ["-ss", f"{max(0.0, duration - EDGE_SECONDS):.3f}", "-i", path], "decoding the last GOP"
+        )
+
+    return {
+        "frames": frames,
+        "duration": duration,
+        "checksum": checksum,
+        "seconds": round(time.time() - start_time, 3),
+    }
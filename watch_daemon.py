@@ -0,0 +1,272 @@
+"""
+Watch-folder daemon: applies a per-folder operation chain to every new
+video dropped into the configured folders.
+
+    python watch_daemon.py watch.json
+
+watch.json:
+    {
+        "workers": 2,
+        "settle_seconds": 5,
+        "metrics_interval": 60,
+        "metrics_file": "watch_metrics.json",
+        "folders": [
+            {
+                "path": "/shared/raw",
+                "output_dir": "/shared/raw/processed",
+                "chain": [["crop", {"box": [0, 0, 1280, 720]}], ["mute", {}]]
+            }
+        ]
+    }
+
+Chains use main.OPERATIONS names. Outputs keep the input's file name and
+default to a "processed" folder inside the watched folder (folders are not
+watched recursively).
+"""
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+
+from jobs import JobScheduler
+from main import OPERATIONS, is_temp_output
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".webm", ".avi", ".m4v")
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = os.O_NONBLOCK
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Reports files closed after writing or moved into the folders (Linux only)"""
+
+    def __init__(self, folders):
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._folders = {}
+        for folder in folders:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"Cannot watch {folder}")
+            self._folders[wd] = folder
+
+    def poll(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, _, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if wd in self._folders and name:
+                paths.append(os.path.join(self._folders[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Portable fallback: rescans the folders and reports new or changed files"""
+
+    def __init__(self, folders, interval=2.0):
+        self.folders = folders
+        self.interval = interval
+        self._seen = {}
+        self._scan()
+
+    def _scan(self):
+        changed = []
+        for folder in self.folders:
+            try:
+                entries = list(os.scandir(folder))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_size, stat.st_mtime_ns)
+                if self._seen.get(entry.path) != signature:
+                    self._seen[entry.path] = signature
+                    changed.append(entry.path)
+        return changed
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        return self._scan()
+
+    def close(self):
+        pass
+
+
+def create_watcher(folders, poll_interval=2.0):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(folders)
+        except OSError as e:
+            print(f"inotify unavailable ({e}), polling every {poll_interval}s")
+    return PollingWatcher(folders, poll_interval)
+
+
+class WatchDaemon:
+    """
+    Turns files appearing in watched folders into scheduler jobs.
+    - A file is submitted once its size and mtime have not changed for
+      settle_seconds, so copies still in progress are never picked up
+    - Each (path, size, mtime) is submitted once; overwriting a file with a
+      new recording processes it again
+    - Files already present at startup are skipped unless process_existing
+    """
+
+    def __init__(self, config, scheduler=None):
+        self.folders = {}
+        for folder in config["folders"]:
+            path = os.path.abspath(folder["path"])
+            for name, _ in folder["chain"]:
+                if name not in OPERATIONS:
+                    raise ValueError(f"Unknown operation {name!r} for {path}")
+            self.folders[path] = {
+                "chain": folder["chain"],
+                "output_dir": os.path.abspath(folder.get("output_dir") or os.path.join(path, "processed")),
+                "extensions": tuple(e.lower() for e in folder.get("extensions", VIDEO_EXTENSIONS)),
+            }
+            os.makedirs(path, exist_ok=True)
+
+        # Outputs keep their input's name, so writing them into a watched
+        # folder would overwrite the input and queue it again, forever
+        watched = {os.path.realpath(path) for path in self.folders}
+        self._output_dirs = {os.path.realpath(folder["output_dir"]) for folder in self.folders.values()}
+        for path, folder in self.folders.items():
+            if os.path.realpath(folder["output_dir"]) in watched:
+                raise ValueError(f"Output folder {folder['output_dir']} of {path} is a watched folder")
+
+        self.settle_seconds = config.get("settle_seconds", 5)
+        self.metrics_interval = config.get("metrics_interval", 60)
+        self.metrics_file = config.get("metrics_file")
+        self.scheduler = scheduler or JobScheduler(config.get("workers", 2))
+        self.watcher = create_watcher(list(self.folders), config.get("poll_interval", 2.0))
+
+        self._pending = {}
+        self._submitted = set()
+        if not config.get("process_existing", False):
+            for path in self._existing_files():
+                self._submitted.add(self._signature(path))
+
+    def _existing_files(self):
+        for folder in self.folders:
+            for entry in os.scandir(folder):
+                if entry.is_file():
+                    yield entry.path
+
+    def _signature(self, path):
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns
+
+    def _wants(self, path):
+        folder = self.folders.get(os.path.dirname(path))
+        name = os.path.basename(path)
+        # Skip our own outputs, atomic_output temp files and hidden/partial downloads
+        if folder is None or os.path.realpath(os.path.dirname(path)) in self._output_dirs:
+            return False
+        if name.startswith(".") or is_temp_output(name):
+            return False
+        return name.lower().endswith(folder["extensions"])
+
+    def _check_pending(self):
+        now = time.time()
+        for path, (signature, since) in list(self._pending.items()):
+            try:
+                current = self._signature(path)
+            except FileNotFoundError:
+                del self._pending[path]
+                continue
+            if current != signature:
+                self._pending[path] = (current, now)
+            elif now - since >= self.settle_seconds:
+                del self._pending[path]
+                self._submit(path, current)
+
+    def _submit(self, path, signature):
+        if signature in self._submitted:
+            return
+        self._submitted.add(signature)
+        folder = self.folders[os.path.dirname(path)]
+        output_path = os.path.join(folder["output_dir"], os.path.basename(path))
+        job = self.scheduler.submit(path, folder["chain"], output_path)
+        print(f"Queued job {job.id}: {path} -> {output_path}")
+
+    def report_metrics(self):
+        metrics = self.scheduler.metrics()
+        latency = metrics["latency_seconds"]
+        verify = metrics["verify_seconds"]
+        print(
+            f"Watch metrics: {metrics['queue_length']} queued, {metrics['running']} running, "
+            f"{metrics['completed']} done, {metrics['failed']} failed, "
+            f"latency p50 {latency['p50']}s p95 {latency['p95']}s, verify p50 {verify['p50']}s"
+        )
+        if self.metrics_file:
+            temp_path = self.metrics_file + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(dict(metrics, pending_settle=len(self._pending), time=time.time()), f, indent=2)
+            os.replace(temp_path, self.metrics_file)
+
+    def run(self):
+        print(f"Watching {len(self.folders)} folder(s) with {self.scheduler.workers} worker(s)")
+        last_report = time.time()
+        try:
+            while True:
+                for path in self.watcher.poll(timeout=1.0):
+                    if self._wants(path):
+                        try:
+                            self._pending[path] = (self._signature(path), time.time())
+                        except FileNotFoundError:
+                            pass
+                self._check_pending()
+                if time.time() - last_report >= self.metrics_interval:
+                    self.report_metrics()
+                    last_report = time.time()
+        except KeyboardInterrupt:
+            print("Stopping watch daemon, waiting for running jobs")
+        finally:
+            self.watcher.close()
+            self.scheduler.shutdown()
+            self.report_metrics()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply operation chains to videos dropped into folders")
+    parser.add_argument("config", help="JSON config file (see watch_daemon.py)")
+    parser.add_argument("--process-existing", action="store_true", help="also process files already present")
+    args = parser.parse_args()
+
+    with open(args.config, encoding="utf-8") as f:
+        config = json.load(f)
+    if args.process_existing:
+        config["process_existing"] = True
+    WatchDaemon(config).run()
+
+
+if __name__ == "__main__":
+    main()